@@ -1,21 +1,132 @@
 from django.contrib import admin
 from .models import (
-    UserProfile, AttendanceRecord, PlacementUpdate, PlacementApplication,
-    ApplicationRequest, GoverningBody, School, Department, Program,
+    UserProfile, CourseSection, AttendanceRecord, AttendanceDailyRollup, AttendanceRosterEntry, PlacementUpdate, PlacementApplication,
+    ApplicationRequest, ReviewAuditEntry, BackgroundJob, GoverningBody, School, Department, Program,
     FacultyMember, AcademicSection, SupportCell
 )
 
-# Register all models
-admin.site.register(UserProfile)
-admin.site.register(AttendanceRecord)
-admin.site.register(PlacementUpdate)
-admin.site.register(PlacementApplication)
-admin.site.register(ApplicationRequest)
-admin.site.register(GoverningBody)
-admin.site.register(School)
-admin.site.register(Department)
-admin.site.register(Program)
-admin.site.register(FacultyMember)
-admin.site.register(AcademicSection)
-admin.site.register(SupportCell)
+# Changelists join every relation their __str__ / list_display reads (list_select_related),
+# so a page costs a fixed number of queries; foreign keys to large tables use raw_id_fields
+# instead of a <select> of every row.
+
+
+class SelectRelatedAdmin(admin.ModelAdmin):
+    """For models with a SelectRelatedManager: the changelist only applies list_select_related
+    to querysets without select_related, so drop the manager's default joins first."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(None)
+
+
+@admin.register(UserProfile)
+class UserProfileAdmin(admin.ModelAdmin):
+    list_display = ['user', 'enrollment_no', 'role', 'department', 'school', 'cgpa']
+    list_select_related = ['user']
+    list_filter = ['role']
+    search_fields = ['enrollment_no', 'user__username']
+    raw_id_fields = ['user']
+
+
+@admin.register(AttendanceRecord)
+class AttendanceRecordAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course_section', 'date', 'status']
+    list_select_related = ['student', 'course_section']
+    raw_id_fields = ['student', 'course_section', 'faculty']
+
+
+@admin.register(AttendanceDailyRollup)
+class AttendanceDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['date', 'course_section', 'faculty', 'present_count', 'total_count']
+    list_select_related = ['course_section', 'faculty']
+    raw_id_fields = ['course_section', 'faculty']
+
+
+@admin.register(AttendanceRosterEntry)
+class AttendanceRosterEntryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'course_section', 'faculty']
+    list_select_related = ['student', 'course_section', 'faculty']
+    raw_id_fields = ['student', 'course_section', 'faculty']
+
+
+@admin.register(PlacementUpdate)
+class PlacementUpdateAdmin(admin.ModelAdmin):
+    list_display = ['company_name', 'role', 'status', 'last_date', 'created_by']
+    list_select_related = ['created_by']
+    list_filter = ['status']
+    raw_id_fields = ['created_by', 'approved_by']
+
+
+@admin.register(PlacementApplication)
+class PlacementApplicationAdmin(SelectRelatedAdmin):
+    list_display = ['student_name', 'enrollment_no', 'placement', 'status', 'applied_at']
+    list_select_related = ['placement']
+    list_filter = ['status']
+    raw_id_fields = ['placement', 'student']
+
+
+@admin.register(ApplicationRequest)
+class ApplicationRequestAdmin(admin.ModelAdmin):
+    list_display = ['application_type', 'student_name', 'enrollment_no', 'status', 'reviewed_by']
+    list_select_related = ['reviewed_by']
+    list_filter = ['application_type', 'status']
+    raw_id_fields = ['student', 'reviewed_by']
 
+
+@admin.register(ReviewAuditEntry)
+class ReviewAuditEntryAdmin(admin.ModelAdmin):
+    list_display = ['target_type', 'target_id', 'action', 'previous_status', 'new_status', 'reviewer', 'created_at']
+    list_select_related = ['reviewer']
+    list_filter = ['target_type', 'action']
+    raw_id_fields = ['reviewer']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status']
+    raw_id_fields = ['created_by']
+
+
+@admin.register(Department)
+class DepartmentAdmin(SelectRelatedAdmin):
+    list_display = ['name', 'short_name', 'school', 'hod', 'program_count', 'faculty_count', 'student_count', 'is_active']
+    list_select_related = ['school', 'hod']
+    raw_id_fields = ['hod']
+
+
+@admin.register(Program)
+class ProgramAdmin(SelectRelatedAdmin):
+    list_display = ['name', 'degree_type', 'department', 'is_active']
+    list_select_related = ['department__school']
+
+
+@admin.register(FacultyMember)
+class FacultyMemberAdmin(SelectRelatedAdmin):
+    list_display = ['user', 'department', 'rank', 'is_active']
+    list_select_related = ['user', 'department__school']
+    raw_id_fields = ['user']
+
+
+@admin.register(School)
+class SchoolAdmin(admin.ModelAdmin):
+    list_display = ['name', 'short_name', 'dean', 'department_count', 'program_count', 'is_active']
+    list_select_related = ['dean']
+    raw_id_fields = ['dean']
+
+
+@admin.register(AcademicSection)
+class AcademicSectionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'section_type', 'incharge', 'is_active']
+    list_select_related = ['incharge']
+    raw_id_fields = ['incharge']
+
+
+@admin.register(SupportCell)
+class SupportCellAdmin(admin.ModelAdmin):
+    list_display = ['name', 'cell_type', 'coordinator', 'is_active']
+    list_select_related = ['coordinator']
+    raw_id_fields = ['coordinator']
+
+
+admin.site.register(CourseSection)
+admin.site.register(GoverningBody)
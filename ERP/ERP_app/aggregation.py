@@ -0,0 +1,267 @@
+"""
+Single-pass multi-dimension aggregation for the attendance dashboards.
+
+A dashboard asks for several breakdowns (school-wise, department-wise, ...) of
+the same filtered queryset. Instead of one GROUP BY per breakdown, aggregate()
+computes all of them with a single query:
+
+* PostgreSQL: one GROUP BY GROUPING SETS (...) statement.
+* Other backends (SQLite): one GROUP BY over the finest grain that covers
+  every requested breakdown, streamed and rolled up in Python.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import connections
+from django.db.models import Count, F, Q, Sum
+
+from . import leaves
+from .models import AttendanceRecord, legacy_expression
+
+# kind is one of 'count', 'count_if', 'sum' or 'distinct'
+Measure = namedtuple('Measure', ['name', 'kind', 'field', 'value'], defaults=[None, None])
+
+RECORD_MEASURES = [
+    Measure('total_classes', 'count'),
+    Measure('total_present', 'count_if', 'status', AttendanceRecord.PRESENT),
+    Measure('total_absent', 'count_if', 'status', AttendanceRecord.ABSENT),
+    Measure('total_late', 'count_if', 'status', AttendanceRecord.LATE),
+    Measure('total_students', 'distinct', 'student_id'),
+]
+
+# Records on an approved-leave day (see leaves.py)
+LEAVE_MEASURES = [
+    Measure('total_on_leave', 'count_if', 'on_leave', True),
+]
+
+ROLLUP_MEASURES = [
+    Measure('total_classes', 'sum', 'total_count'),
+    Measure('total_present', 'sum', 'present_count'),
+    Measure('total_absent', 'sum', 'absent_count'),
+    Measure('total_late', 'sum', 'late_count'),
+]
+
+ROSTER_MEASURES = [
+    Measure('total_students', 'distinct', 'student_id'),
+]
+
+
+class AggregationResult:
+    """All breakdowns of one aggregate() call, addressable by name.
+
+    result['dept_wise'] is a list of dicts holding the grouping fields and the
+    measures; result.totals holds the measures over the whole queryset.
+    """
+
+    def __init__(self, groupings):
+        self.groupings = groupings
+        self.rows = {name: [] for name in groupings}
+        self.totals = {}
+
+    def __getitem__(self, name):
+        return self.rows[name]
+
+    def __contains__(self, name):
+        return name in self.rows
+
+    def as_context(self):
+        return dict(self.rows)
+
+    def merge(self, other):
+        """Add the measures of another result computed with the same groupings"""
+        for name, fields in self.groupings.items():
+            extra = {tuple(row[f] for f in fields): row for row in other.rows.get(name, [])}
+            for row in self.rows[name]:
+                match = extra.get(tuple(row[f] for f in fields), {})
+                for key in other.totals:
+                    row[key] = match.get(key, 0)
+        self.totals.update(other.totals)
+        return self
+
+
+def aggregate(queryset, groupings, measures=RECORD_MEASURES):
+    """Compute every grouping in `groupings` (name -> list of fields) in one query.
+
+    Fields may use the model's LEGACY_FIELDS names (school, department, ...).
+    """
+    queryset = queryset.order_by()
+    legacy_fields = getattr(queryset.model, 'LEGACY_FIELDS', {})
+    if connections[queryset.db].vendor == 'postgresql':
+        result = _aggregate_grouping_sets(queryset, groupings, measures, legacy_fields)
+    else:
+        result = _aggregate_streaming(queryset, groupings, measures, legacy_fields)
+
+    for rows in result.rows.values():
+        for row in rows:
+            _add_percentage(row)
+    _add_percentage(result.totals)
+    return result
+
+
+def aggregate_attendance(records, groupings, flag_leave=False):
+    """Breakdowns of a raw AttendanceRecord queryset; flag_leave adds total_on_leave"""
+    if flag_leave:
+        return aggregate(leaves.annotate_on_leave(records), groupings, RECORD_MEASURES + LEAVE_MEASURES)
+    return aggregate(records, groupings, RECORD_MEASURES)
+
+
+def aggregate_rollup(rollups, roster, groupings):
+    """Breakdowns of the rollup tables: one query for the counts, one for distinct students"""
+    result = aggregate(rollups, groupings, ROLLUP_MEASURES)
+    return result.merge(aggregate(roster, groupings, ROSTER_MEASURES))
+
+
+def _add_percentage(row):
+    if 'total_present' in row and 'total_classes' in row:
+        total = row['total_classes'] or 0
+        row['attendance_percentage'] = round((row['total_present'] or 0) / total * 100, 2) if total else 0
+
+
+def _grouping_fields(groupings):
+    fields = []
+    for group_fields in groupings.values():
+        for field in group_fields:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+# ==================== POSTGRESQL: GROUPING SETS ====================
+
+def _column(field, legacy_fields):
+    if field in legacy_fields:
+        return legacy_expression(legacy_fields[field])
+    return F(field)
+
+
+def _aggregate_grouping_sets(queryset, groupings, measures, legacy_fields):
+    fields = _grouping_fields(groupings)
+    aliases = {field: f'g{i}' for i, field in enumerate(fields)}
+
+    columns = {alias: _column(field, legacy_fields) for field, alias in aliases.items()}
+    measure_columns = {}
+    for i, measure in enumerate(measures):
+        if measure.kind != 'count':
+            measure_columns[measure.field] = measure_columns.get(measure.field, f'm{i}')
+    columns.update({alias: F(field) for field, alias in measure_columns.items()})
+
+    inner_sql, inner_params = queryset.values(**columns).query.sql_with_params()
+
+    select = [f'"{alias}"' for alias in aliases.values()]
+    params = []
+    if aliases:
+        select.append('GROUPING({}) AS "grouping_mask"'.format(', '.join(f'"{a}"' for a in aliases.values())))
+    for measure in measures:
+        column = f'"{measure_columns[measure.field]}"' if measure.field else None
+        if measure.kind == 'count':
+            select.append(f'COUNT(*) AS "{measure.name}"')
+        elif measure.kind == 'count_if':
+            select.append(f'COUNT(*) FILTER (WHERE {column} = %s) AS "{measure.name}"')
+            params.append(measure.value)
+        elif measure.kind == 'sum':
+            select.append(f'COALESCE(SUM({column}), 0) AS "{measure.name}"')
+        elif measure.kind == 'distinct':
+            select.append(f'COUNT(DISTINCT {column}) AS "{measure.name}"')
+
+    # GROUPING() sets a bit (most significant first) for every column NOT in the set
+    masks = defaultdict(list)
+    for name, group_fields in groupings.items():
+        mask = 0
+        for field in fields:
+            mask = (mask << 1) | (0 if field in group_fields else 1)
+        masks[mask].append(name)
+    total_mask = (1 << len(fields)) - 1
+
+    sets = ['({})'.format(', '.join(f'"{aliases[f]}"' for f in group_fields)) for group_fields in groupings.values()]
+    sets.append('()')
+    sql = 'SELECT {} FROM ({}) AS "aggregation_source" GROUP BY GROUPING SETS ({})'.format(
+        ', '.join(select), inner_sql, ', '.join(dict.fromkeys(sets)),
+    )
+
+    result = AggregationResult(groupings)
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params + list(inner_params))
+        names = [col[0] for col in cursor.description]
+        for values in cursor.fetchall():
+            row = dict(zip(names, values))
+            mask = row.pop('grouping_mask', total_mask)
+            values_by_field = {field: row.pop(alias) for field, alias in aliases.items()}
+            if mask == total_mask:
+                result.totals = dict(row)
+            for name in masks.get(mask, []):
+                group_row = {field: values_by_field[field] for field in groupings[name]}
+                group_row.update(row)
+                result.rows[name].append(group_row)
+
+    for name, group_fields in groupings.items():
+        result.rows[name].sort(key=lambda r: tuple(_sort_key(r[f]) for f in group_fields))
+    return result
+
+
+# ==================== FALLBACK: FINEST GRAIN + PYTHON ROLLUP ====================
+
+def _aggregate_streaming(queryset, groupings, measures, legacy_fields, chunk_size=2000):
+    fields = _grouping_fields(groupings)
+    distinct_fields = [m.field for m in measures if m.kind == 'distinct']
+    grain = fields + [f for f in distinct_fields if f not in fields]
+    plain = [f for f in grain if f not in legacy_fields]
+    legacy = {f: _column(f, legacy_fields) for f in grain if f in legacy_fields}
+
+    annotations = {}
+    for measure in measures:
+        if measure.kind == 'count':
+            annotations[measure.name] = Count('pk')
+        elif measure.kind == 'count_if':
+            annotations[measure.name] = Count('pk', filter=Q(**{measure.field: measure.value}))
+        elif measure.kind == 'sum':
+            annotations[measure.name] = Sum(measure.field)
+    additive = list(annotations)
+
+    buckets = {name: {} for name in groupings}
+    totals = _empty_bucket(additive, distinct_fields)
+    rows = queryset.values(*plain, **legacy).annotate(**annotations) if grain else [queryset.aggregate(**annotations)]
+    if grain:
+        rows = rows.iterator(chunk_size=chunk_size)
+
+    for row in rows:
+        targets = [totals]
+        for name, group_fields in groupings.items():
+            key = tuple(row[f] for f in group_fields)
+            bucket = buckets[name].get(key)
+            if bucket is None:
+                bucket = buckets[name][key] = _empty_bucket(additive, distinct_fields)
+            targets.append(bucket)
+        for bucket in targets:
+            for measure_name in additive:
+                bucket[measure_name] += row[measure_name] or 0
+            for field in distinct_fields:
+                bucket[field].add(row[field])
+
+    result = AggregationResult(groupings)
+    result.totals = _finish_bucket(totals, measures)
+    for name, group_fields in groupings.items():
+        for key in sorted(buckets[name], key=lambda k: tuple(_sort_key(v) for v in k)):
+            row = dict(zip(group_fields, key))
+            row.update(_finish_bucket(buckets[name][key], measures))
+            result.rows[name].append(row)
+    return result
+
+
+def _empty_bucket(additive, distinct_fields):
+    bucket = dict.fromkeys(additive, 0)
+    bucket.update({field: set() for field in distinct_fields})
+    return bucket
+
+
+def _finish_bucket(bucket, measures):
+    finished = {}
+    for measure in measures:
+        if measure.kind == 'distinct':
+            finished[measure.name] = len(bucket[measure.field] - {None})
+        else:
+            finished[measure.name] = bucket[measure.name]
+    return finished
+
+
+def _sort_key(value):
+    # None sorts first; mixed types never meet within a single column
+    return (value is not None, value if value is not None else 0)
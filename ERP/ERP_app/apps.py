@@ -5,3 +5,7 @@ class ErpAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ERP_app'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .template_warmup import warm_up_on_startup
+        warm_up_on_startup()
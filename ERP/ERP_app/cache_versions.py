@@ -0,0 +1,30 @@
+"""
+Version counters for cached data.
+
+Cached entries are keyed by the current version of what they were built
+from; invalidating moves the counter forward, so every process rebuilds on
+its next read and the superseded entries simply expire.
+"""
+import time
+
+from django.core.cache import cache
+
+
+def _initial_version():
+    # Time based, so a counter lost to eviction never restarts below stale entries
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
@@ -0,0 +1,86 @@
+"""
+Denormalized School and Department counters.
+
+School.department_count / program_count and Department.program_count /
+faculty_count / student_count are columns, so listing the structure reads
+them with the rows instead of running a COUNT per school or department.
+The signals keep them current:
+
+- creating or deleting a Department, Program or FacultyMember adds or
+  subtracts one from its parents;
+- moving one to another parent (a transfer) moves the count, in one
+  transaction;
+- student_count follows UserProfile.department_ref, so creating, deleting
+  or re-departmenting a profile adjusts it.
+
+Every change is an UPDATE ... SET n = n + delta, so concurrent saves cannot
+lose an increment. Writes that skip signals (bulk_create, queryset
+update/delete, raw SQL) leave the counters stale; bulk paths in this app call
+reconcile() afterwards, and the reconcile_structure_counters command repairs
+anything else.
+"""
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import Department, School
+
+SCHOOL_COUNTERS = tuple(School.count_expressions())
+DEPARTMENT_COUNTERS = tuple(Department.count_expressions())
+
+
+def adjust(queryset, **deltas):
+    """Add each delta to its counter column on every row of `queryset`, never going below zero"""
+    deltas = {field: Greatest(F(field) + delta, Value(0)) for field, delta in deltas.items() if delta}
+    if deltas:
+        queryset.update(**deltas)
+
+
+def schools_of(department_id):
+    return School.objects.filter(departments=department_id)
+
+
+def move(model, old_id, new_id, **deltas):
+    """A transfer: take `deltas` off the old parent and add them to the new one"""
+    with transaction.atomic():
+        if old_id is not None:
+            adjust(model.objects.filter(pk=old_id), **{field: -delta for field, delta in deltas.items()})
+        if new_id is not None:
+            adjust(model.objects.filter(pk=new_id), **deltas)
+
+
+def recount_students(department_ids):
+    """Recount student_count for these departments"""
+    departments = Department.objects.filter(pk__in=[dept_id for dept_id in department_ids if dept_id])
+    departments.update(student_count=Department.count_expressions()['student_count'])
+
+
+def drift(model):
+    """[(row id, field, stored, live)] for every counter that disagrees with a recount"""
+    fields = SCHOOL_COUNTERS if model is School else DEPARTMENT_COUNTERS
+    rows = model.objects.select_related(None).with_counts().values('id', *fields, *[f'live_{f}' for f in fields])
+    return [
+        (row['id'], field, row[field], row[f'live_{field}'])
+        for row in rows.iterator()
+        for field in fields
+        if row[field] != row[f'live_{field}']
+    ]
+
+
+def reconcile(dry_run=False):
+    """Recount every counter and fix the ones that drifted; returns {model name: drift()}"""
+    report = {}
+    with transaction.atomic():
+        for model in (School, Department):
+            drifted = drift(model)
+            report[model.__name__] = drifted
+            if dry_run:
+                continue
+            expressions = model.count_expressions()
+            by_field = {}
+            for pk, field, _, _ in drifted:
+                by_field.setdefault(field, []).append(pk)
+            for field, ids in by_field.items():
+                for start in range(0, len(ids), 500):
+                    model.objects.filter(pk__in=ids[start:start + 500]).update(**{field: expressions[field]})
+    return report
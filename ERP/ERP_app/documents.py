@@ -0,0 +1,312 @@
+"""
+Server-side PDF documents for approved application requests.
+
+An approved ApplicationRequest is rendered to PDF once, by the run_jobs
+worker: approving (reviews.review() or saving the row) queues a
+generate_documents job, and the generate_documents command renders a whole
+day's approvals in one batch. The letter text comes from
+templates/documents/application-request.txt and is laid out by a small
+built-in PDF writer (standard Helvetica fonts, no embedded resources), so no
+PDF library is needed and the same request always produces the same bytes.
+Those fonts only cover WinAnsi (cp1252) text; a request with other
+characters is refused with DocumentError rather than printed with '?'.
+
+Files are content-addressed: DOCUMENT_ROOT/<ab>/<sha256>.pdf, named by the
+SHA-256 of their bytes, which ApplicationRequest.document_digest records.
+Re-rendering an unchanged request finds the file already there and writes
+nothing; a changed one gets a new file and digest. The digest doubles as a
+strong ETag, so serve() answers repeat downloads with 304 Not Modified, and
+hands the file itself to the web server (X-Sendfile / X-Accel-Redirect) when
+DOCUMENT_SENDFILE_HEADER is set, or streams it with FileResponse otherwise.
+A request whose file is missing is never rendered in the request: serve()
+queues a job and answers 202 with Retry-After, or 422 with the reason if
+the last attempt could not render it.
+"""
+import hashlib
+import os
+import tempfile
+import textwrap
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header
+
+from . import jobs
+from .models import ApplicationRequest, BackgroundJob
+
+GENERATE_DOCUMENTS = 'ERP_app.documents.generate_documents'
+DOCUMENT_TEMPLATE = 'documents/application-request.txt'
+
+# A4 in points, with 2cm margins
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 57
+LINE_HEIGHT = 1.5
+
+# Line prefix in the template -> (font resource, size)
+STYLES = (('## ', ('F2', 12)), ('# ', ('F2', 16)), ('', ('F1', 11)))
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold'}
+# Average glyph width as a share of the font size, for wrapping
+GLYPH_WIDTH = {'F1': 0.5, 'F2': 0.56}
+# Python's name for the fonts' WinAnsiEncoding
+TEXT_ENCODING = 'cp1252'
+
+# Seconds a client should wait before asking again for a document being rendered
+RETRY_AFTER = 5
+
+
+class DocumentError(ValueError):
+    """The request cannot be rendered; the message is written for the student"""
+
+
+def get_document_root():
+    return str(getattr(settings, 'DOCUMENT_ROOT', os.path.join(settings.MEDIA_ROOT, 'documents')))
+
+
+def get_sendfile_header():
+    return getattr(settings, 'DOCUMENT_SENDFILE_HEADER', None)
+
+
+def get_sendfile_prefix():
+    return getattr(settings, 'DOCUMENT_SENDFILE_PREFIX', None)
+
+
+# ==================== PDF WRITER ====================
+
+def unsupported_characters(text):
+    """Sorted distinct characters of `text` that the built-in fonts cannot show"""
+    unsupported = set()
+    for char in set(text):
+        try:
+            char.encode(TEXT_ENCODING)
+        except UnicodeEncodeError:
+            unsupported.add(char)
+    return sorted(unsupported)
+
+
+def pdf_string(text):
+    """A PDF literal string in WinAnsi encoding; raises UnicodeEncodeError for other characters"""
+    encoded = text.encode(TEXT_ENCODING)
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def layout(text):
+    """[[(font, size, x, y, line)]] per page for the template's text"""
+    pages, page = [], []
+    y = PAGE_HEIGHT - MARGIN
+    for raw in text.splitlines():
+        raw = raw.rstrip()
+        prefix, (font, size) = next(style for style in STYLES if raw.startswith(style[0]))
+        content = raw[len(prefix):]
+        width = int((PAGE_WIDTH - 2 * MARGIN) / (size * GLYPH_WIDTH[font]))
+        for line in textwrap.wrap(content, width) or ['']:
+            step = size * LINE_HEIGHT
+            if y - step < MARGIN:
+                pages.append(page)
+                page, y = [], PAGE_HEIGHT - MARGIN
+            y -= step
+            if line:
+                page.append((font, size, MARGIN, round(y, 2), line))
+    pages.append(page)
+    return pages
+
+
+def build_pdf(text):
+    """A PDF 1.4 file with the text laid out on A4 pages"""
+    pages = layout(text)
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # the page tree, once the page object numbers are known
+    ]
+    font_refs = []
+    for name, base_font in FONTS.items():
+        objects.append(f'<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>'.encode())
+        font_refs.append(f'/{name} {len(objects)} 0 R')
+    resources = f'<< /Font << {" ".join(font_refs)} >> >>'
+
+    kids = []
+    for page in pages:
+        stream = b'\n'.join(
+            b'BT /%s %d Tf %s %s Td %s Tj ET' % (font.encode(), size, str(x).encode(), str(y).encode(), pdf_string(line))
+            for font, size, x, y, line in page
+        )
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources {resources} /Contents {len(objects)} 0 R >>'.encode()
+        )
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'.encode()
+
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+# ==================== STORAGE ====================
+
+def document_path(digest):
+    return os.path.join(get_document_root(), digest[:2], f'{digest}.pdf')
+
+
+def store(content):
+    """Write `content` under its SHA-256 unless it is already there; returns the digest"""
+    digest = hashlib.sha256(content).hexdigest()
+    path = document_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return digest
+
+
+def render(application):
+    """The PDF bytes for an application request; raises DocumentError if its text cannot be shown"""
+    text = render_to_string(DOCUMENT_TEMPLATE, {'application': application})
+    unsupported = unsupported_characters(text)
+    if unsupported:
+        raise DocumentError(
+            'The PDF cannot show these characters: ' + ' '.join(unsupported)
+            + '. Please use the Print Application button instead.'
+        )
+    return build_pdf(text)
+
+
+def generate(application, force=False):
+    """Render and store the request's PDF; returns its digest.
+
+    Without `force`, a request whose stored file still exists is not re-rendered.
+    """
+    digest = application.document_digest
+    if force or not digest or not os.path.exists(document_path(digest)):
+        digest = store(render(application))
+        if digest != application.document_digest:
+            # update(): no post_save, which would queue another generation
+            ApplicationRequest.objects.filter(pk=application.pk).update(document_digest=digest)
+            application.document_digest = digest
+    return digest
+
+
+def generate_many(applications, force=False):
+    """generate() each request; returns (Counter(rendered, unchanged, skipped, failed), {id: DocumentError message})"""
+    counts = Counter(rendered=0, unchanged=0, skipped=0, failed=0)
+    errors = {}
+    for application in applications:
+        previous = application.document_digest
+        if not force and previous and os.path.exists(document_path(previous)):
+            counts['skipped'] += 1
+            continue
+        try:
+            digest = generate(application, force=True)
+        except DocumentError as e:
+            counts['failed'] += 1
+            errors[application.pk] = str(e)
+        else:
+            counts['unchanged' if digest == previous else 'rendered'] += 1
+    return counts, errors
+
+
+def approved(ids=None, day=None):
+    """Approved requests, optionally only these ids or those reviewed on `day` (local time)"""
+    applications = ApplicationRequest.objects.filter(status='approved').select_related('reviewed_by')
+    if ids is not None:
+        applications = applications.filter(pk__in=ids)
+    if day is not None:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        applications = applications.filter(reviewed_at__gte=start, reviewed_at__lt=start + timedelta(days=1))
+    return applications.order_by('pk')
+
+
+# ==================== JOBS ====================
+
+def queue_generation(ids, force=True, created_by=None):
+    """Queue a generate_documents job for these request ids; returns the job"""
+    return jobs.enqueue(GENERATE_DOCUMENTS, {'ids': list(ids), 'force': force}, created_by=created_by)
+
+
+def generate_documents(job):
+    """Job handler: render the approved requests among payload['ids']"""
+    counts, errors = generate_many(approved(ids=job.payload['ids']).iterator(chunk_size=200),
+                                   force=job.payload.get('force', True))
+    # JSON object keys are strings
+    return {**counts, 'errors': {str(pk): message for pk, message in errors.items()}}
+
+
+# ==================== SERVING ====================
+
+def _job_key(application):
+    return f'document_job:{application.pk}'
+
+
+def pending(application):
+    """Response for a request whose PDF is not stored: 202 while a job renders it, 422 if it cannot be rendered"""
+    job_id = cache.get(_job_key(application))
+    job = BackgroundJob.objects.filter(pk=job_id).first() if job_id else None
+    if job is not None and job.status == BackgroundJob.SUCCEEDED:
+        error = (job.result or {}).get('errors', {}).get(str(application.pk))
+        if error:
+            response = JsonResponse({'success': False, 'message': error}, status=422)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+    if job is None or job.status not in (BackgroundJob.QUEUED, BackgroundJob.RUNNING):
+        job = queue_generation([application.pk], force=False)
+        cache.set(_job_key(application), job.pk, timeout=24 * 60 * 60)
+
+    response = JsonResponse({
+        'success': False,
+        'message': 'The document is being generated; please try again in a few seconds.',
+        'job_id': job.pk,
+    }, status=202)
+    response['Retry-After'] = str(RETRY_AFTER)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def serve(request, application, as_attachment=False):
+    """The request's PDF with a strong ETag; see pending() for one that is not stored yet"""
+    digest = application.document_digest
+    if not digest or not os.path.exists(document_path(digest)):
+        return pending(application)
+    etag = f'"{digest}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        path = document_path(digest)
+        filename = f'application_{application.pk}.pdf'
+        header = get_sendfile_header()
+        if header:
+            # The web server sends the file; Django only names it
+            response = HttpResponse(content_type='application/pdf')
+            prefix = get_sendfile_prefix()
+            response[header] = (
+                prefix.rstrip('/') + '/' + os.path.relpath(path, get_document_root()).replace(os.sep, '/')
+                if prefix else path
+            )
+            response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type='application/pdf',
+                                    as_attachment=as_attachment, filename=filename)
+
+    response['ETag'] = etag
+    # Students' own documents: browsers may keep them, shared caches may not
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
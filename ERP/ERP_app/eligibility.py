@@ -0,0 +1,183 @@
+"""
+Placement eligibility.
+
+A drive's free-text branches_allowed is parsed when the drive is saved into
+PlacementUpdate.branches, an indexed many-to-many to Department, plus the
+all_branches flag for "All branches" drives. Eligibility is then answered
+in SQL rather than by splitting strings per student:
+
+- eligible_students_page(): the students of a drive's departments at or
+  above its CGPA cut-off, a page at a time from one query over UserProfile.
+  The count and each page are cached per drive under a version that the
+  signals bump when drives, departments or the relevant profile fields
+  change.
+- eligible_drives(): the open, approved drives a student qualifies for, in
+  one query joined through the branch index.
+
+Branch names are resolved with the same OrgMatcher that links profiles
+(see org_matching.py), and students are matched to departments by
+UserProfile.department_ref, the Department their department text resolves
+to.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import org_matching
+from .cache_versions import bump_version, get_version
+from .models import PlacementUpdate, UserProfile
+
+VERSION_KEY = 'placement_eligibility:version'
+
+# branches_allowed values that open a drive to every department
+ALL_BRANCHES = {'all', 'all branches', 'all departments', 'any', 'any branch', 'open to all'}
+
+# Profile fields that decide eligibility; edits to other fields keep the cache
+PROFILE_FIELDS = ('role', 'department_ref_id', 'cgpa')
+
+BRANCH_SEPARATORS = re.compile(r'[,;/|\n]+')
+
+
+def get_cache_timeout():
+    return getattr(settings, 'PLACEMENT_ELIGIBILITY_CACHE_TIMEOUT', 60 * 60)
+
+
+def split_branches(text):
+    """Normalized, de-duplicated tokens of a branches_allowed value"""
+    tokens = []
+    for part in BRANCH_SEPARATORS.split(text or ''):
+        token = org_matching.normalize_name(part)
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def parse_branches(text, matcher):
+    """(department ids, all_branches, unmatched tokens) for a branches_allowed value
+
+    `matcher` is an org_matching.OrgMatcher; a branch named in several schools
+    opens the drive to each of them.
+    """
+    dept_ids, unmatched = set(), []
+    all_branches = False
+    for token in split_branches(text):
+        if token in ALL_BRANCHES:
+            all_branches = True
+            continue
+        ids = matcher.department_ids(token)
+        if ids:
+            dept_ids.update(ids)
+        else:
+            unmatched.append(token)
+    return dept_ids, all_branches, unmatched
+
+
+def rebuild_branch_index():
+    """Re-parse every drive, e.g. after departments were added; returns (drives, Counter of unmatched tokens)"""
+    matcher = org_matching.OrgMatcher.from_database()
+    through = PlacementUpdate.branches.through
+    rows, open_to_all, unmatched = [], [], Counter()
+    drives = PlacementUpdate.objects.values_list('id', 'branches_allowed')
+    for drive_id, branches_allowed in drives:
+        dept_ids, all_branches, missing = parse_branches(branches_allowed, matcher)
+        rows.extend(through(placementupdate_id=drive_id, department_id=dept_id) for dept_id in dept_ids)
+        if all_branches:
+            open_to_all.append(drive_id)
+        unmatched.update(missing)
+
+    with transaction.atomic():
+        through.objects.all().delete()
+        through.objects.bulk_create(rows, batch_size=1000)
+        PlacementUpdate.objects.update(all_branches=False)
+        for start in range(0, len(open_to_all), 500):
+            PlacementUpdate.objects.filter(id__in=open_to_all[start:start + 500]).update(all_branches=True)
+    invalidate()
+    return len(drives), unmatched
+
+
+# ==================== STUDENTS OF A DRIVE ====================
+
+def eligible_students_queryset(drive):
+    """Student profiles eligible for `drive`, as one query
+
+    Without a CGPA on record a student only qualifies for drives without a cut-off.
+    """
+    students = UserProfile.objects.filter(role='student')
+    if drive.eligibility_cgpa is not None:
+        students = students.filter(cgpa__gte=drive.eligibility_cgpa)
+    if not drive.all_branches:
+        branches = PlacementUpdate.branches.through.objects.filter(placementupdate_id=drive.pk)
+        students = students.filter(department_ref_id__in=branches.values('department_id'))
+    return students
+
+
+def student_row(row):
+    return {
+        'user_id': row['user_id'],
+        'enrollment_no': row['enrollment_no'],
+        'name': f"{row['user__first_name']} {row['user__last_name']}".strip() or row['user__username'],
+        'department': row['department'],
+        'cgpa': str(row['cgpa']) if row['cgpa'] is not None else None,
+    }
+
+
+def eligible_students_page(drive, page_number, per_page=100):
+    """One page of the students eligible for `drive`, by enrollment number
+
+    The count and each page are cached separately, so a request only loads
+    the rows it returns. Out-of-range page numbers give the last page, as
+    Paginator.get_page does.
+    """
+    prefix = f'placement_eligible:{get_version(VERSION_KEY)}:{drive.pk}'
+    count = cache.get(f'{prefix}:count')
+    if count is None:
+        count = eligible_students_queryset(drive).count()
+        cache.set(f'{prefix}:count', count, timeout=get_cache_timeout())
+
+    # Paginating the row offsets validates the page number without touching the database
+    page = Paginator(range(count), per_page).get_page(page_number)
+    offsets = page.object_list
+    key = f'{prefix}:page:{per_page}:{page.number}'
+    students = cache.get(key)
+    if students is None:
+        rows = eligible_students_queryset(drive).order_by('enrollment_no', 'id').values(
+            'user_id', 'enrollment_no', 'department', 'cgpa',
+            'user__first_name', 'user__last_name', 'user__username',
+        )[offsets.start:offsets.stop]
+        students = [student_row(row) for row in rows]
+        cache.set(key, students, timeout=get_cache_timeout())
+
+    return {
+        'count': count,
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+        'students': students,
+    }
+
+
+def invalidate():
+    bump_version(VERSION_KEY)
+
+
+# ==================== DRIVES OF A STUDENT ====================
+
+def eligible_drives(profile, today=None):
+    """Approved drives still open on `today` that `profile` qualifies for, as one query"""
+    today = today or timezone.localdate()
+    drives = PlacementUpdate.objects.filter(status='approved', last_date__gte=today)
+
+    if profile.cgpa is None:
+        drives = drives.filter(eligibility_cgpa__isnull=True)
+    else:
+        drives = drives.filter(Q(eligibility_cgpa__isnull=True) | Q(eligibility_cgpa__lte=profile.cgpa))
+
+    if profile.department_ref_id is None:
+        return drives.filter(all_branches=True)
+    indexed = PlacementUpdate.branches.through.objects.filter(department_id=profile.department_ref_id)
+    return drives.filter(Q(all_branches=True) | Q(id__in=indexed.values('placementupdate_id')))
@@ -0,0 +1,206 @@
+"""
+Bulk attendance ingestion.
+
+Validates a whole batch of attendance rows up front, resolves students and
+faculty with set-based queries and writes through bulk_create() in batches
+inside a single transaction. Used by the bulk marking endpoint and the
+import_attendance management command.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import org_matching, rollups
+from .models import AttendanceRecord, CourseSection, UserProfile
+
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+
+class AttendanceImportError(ValueError):
+    """Raised when a batch fails validation; `errors` lists every problem found"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f'{len(errors)} invalid attendance row(s)')
+
+
+def get_batch_size(value=None):
+    if value:
+        return int(value)
+    return int(getattr(settings, 'ATTENDANCE_IMPORT_BATCH_SIZE', 1000))
+
+
+def _chunks(values, size=LOOKUP_CHUNK_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _parse_date(value, cache):
+    if isinstance(value, date):
+        return value
+    parsed = cache.get(value)
+    if parsed is None:
+        parsed = cache[value] = date.fromisoformat(str(value).strip())
+    return parsed
+
+
+def resolve_students(enrollment_nos):
+    """enrollment_no -> UserProfile (with user), one query per LOOKUP_CHUNK_SIZE numbers"""
+    profiles = {}
+    for chunk in _chunks(set(enrollment_nos)):
+        for profile in UserProfile.objects.select_related('user').filter(enrollment_no__in=chunk):
+            profiles[profile.enrollment_no] = profile
+    return profiles
+
+
+def resolve_faculty(usernames):
+    users = {}
+    for chunk in _chunks(set(usernames)):
+        users.update({user.username: user for user in User.objects.filter(username__in=chunk)})
+    return users
+
+
+def resolve_course_sections(keys):
+    """(school, department, year, section, course) -> CourseSection, creating missing ones"""
+    keys = set(keys)
+    found = {}
+    for chunk in _chunks({key[4] for key in keys}):
+        for course_section in CourseSection.objects.filter(course__in=chunk):
+            found[_course_section_key(course_section)] = course_section
+
+    missing = keys - set(found)
+    if missing:
+        matcher = org_matching.get_matcher()
+        new_sections = []
+        for school_name, department_name, year, section, course in missing:
+            department_id, school_id = matcher.link(department_name, school_name)
+            new_sections.append(CourseSection(
+                school_id=school_id,
+                department_id=department_id,
+                school_name=school_name,
+                department_name=department_name,
+                year=year,
+                section=section,
+                course=course,
+            ))
+        CourseSection.objects.bulk_create(new_sections, ignore_conflicts=True)
+        for chunk in _chunks({key[4] for key in missing}):
+            for course_section in CourseSection.objects.filter(course__in=chunk):
+                found[_course_section_key(course_section)] = course_section
+    return found
+
+
+def _course_section_key(course_section):
+    return (course_section.school_name, course_section.department_name, course_section.year,
+            course_section.section, course_section.course)
+
+
+def build_records(rows, default_faculty=None):
+    """Validate rows and turn them into unsaved AttendanceRecord objects.
+
+    Each row is a dict with enrollment_no, date, course, status and optionally
+    faculty (username). Raises AttendanceImportError listing every bad row.
+    """
+    rows = list(rows)
+    errors = [
+        {'row': line, 'enrollment_no': '', 'error': 'Row must be an object'}
+        for line, row in enumerate(rows, start=1) if not isinstance(row, dict)
+    ]
+    if errors:
+        raise AttendanceImportError(errors)
+    profiles = resolve_students(str(row.get('enrollment_no', '')).strip() for row in rows)
+    faculty_users = resolve_faculty(row['faculty'] for row in rows if isinstance(row.get('faculty'), str) and row['faculty'])
+
+    pending = []
+    seen = set()
+    parsed_dates = {}
+    for line, row in enumerate(rows, start=1):
+        enrollment_no = str(row.get('enrollment_no', '')).strip()
+        status = str(row.get('status', '')).strip().lower()
+        course = str(row.get('course', '')).strip()
+
+        profile = profiles.get(enrollment_no)
+        if profile is None:
+            errors.append({'row': line, 'enrollment_no': enrollment_no, 'error': 'Unknown enrollment number'})
+            continue
+        if status not in AttendanceRecord.STATUS_CODES:
+            errors.append({'row': line, 'enrollment_no': enrollment_no, 'error': f'Invalid status "{status}"'})
+            continue
+        if not course:
+            errors.append({'row': line, 'enrollment_no': enrollment_no, 'error': 'Course is required'})
+            continue
+        try:
+            record_date = _parse_date(row.get('date'), parsed_dates)
+        except (TypeError, ValueError):
+            errors.append({'row': line, 'enrollment_no': enrollment_no, 'error': 'Date must be YYYY-MM-DD'})
+            continue
+
+        faculty = default_faculty
+        if row.get('faculty'):
+            faculty = faculty_users.get(row['faculty']) if isinstance(row['faculty'], str) else None
+            if faculty is None:
+                errors.append({'row': line, 'enrollment_no': enrollment_no, 'error': f'Unknown faculty "{row["faculty"]}"'})
+                continue
+
+        key = (profile.user_id, record_date, course)
+        if key in seen:
+            errors.append({'row': line, 'enrollment_no': enrollment_no, 'error': 'Duplicate row in batch'})
+            continue
+        seen.add(key)
+
+        section_key = (profile.school or '', profile.department or '', profile.year or 0, profile.section or '', course)
+        pending.append((profile.user_id, section_key, faculty, record_date, status))
+
+    if errors:
+        raise AttendanceImportError(errors)
+
+    course_sections = resolve_course_sections(section_key for _, section_key, _, _, _ in pending)
+    records = []
+    for student_id, section_key, faculty, record_date, status in pending:
+        # Assign raw ids: going through the FK descriptors dominates the cost at 100k rows
+        records.append(AttendanceRecord(
+            student_id=student_id,
+            course_section_id=course_sections[section_key].pk,
+            faculty_id=faculty.pk if faculty else None,
+            date=record_date,
+            status=AttendanceRecord.STATUS_CODES[status],
+        ))
+    return records
+
+
+def existing_keys(records):
+    """(student_id, date, course_section_id) of the given records that are already stored"""
+    keys = set()
+    dates = {record.date for record in records}
+    course_sections = {record.course_section_id for record in records}
+    for chunk in _chunks({record.student_id for record in records}):
+        keys.update(AttendanceRecord.objects.filter(
+            student_id__in=chunk, date__in=dates, course_section_id__in=course_sections,
+        ).values_list('student_id', 'date', 'course_section_id'))
+    return keys
+
+
+def ingest_attendance(rows, default_faculty=None, batch_size=None, dry_run=False):
+    """Validate and insert a batch of attendance rows atomically.
+
+    Rows already recorded for the same student, date and course are skipped.
+    Returns a dict with created and skipped counts.
+    """
+    with transaction.atomic():
+        # Inside the transaction: resolving course sections may create them
+        records = build_records(rows, default_faculty=default_faculty)
+        already_marked = existing_keys(records)
+        new_records = [r for r in records if (r.student_id, r.date, r.course_section_id) not in already_marked]
+        if dry_run:
+            transaction.set_rollback(True)
+        elif new_records:
+            AttendanceRecord.objects.bulk_create(new_records, batch_size=get_batch_size(batch_size))
+            # bulk_create() sends no post_save signals, so feed the rollups directly
+            rollups.apply_records(new_records)
+
+    return {'created': len(new_records), 'skipped': len(records) - len(new_records)}
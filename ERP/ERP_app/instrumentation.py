@@ -0,0 +1,284 @@
+"""
+Opt-in per-request instrumentation.
+
+RequestMetricsMiddleware is listed in MIDDLEWARE but stays out of the request
+path unless REQUEST_METRICS_ENABLED is set. When on, a REQUEST_METRICS_SAMPLE_RATE
+share of requests is measured:
+
+- queries and DB time, through connection.execute_wrapper (no DEBUG needed);
+- template render time, by timing the Django template backend's render();
+- total time and response size.
+
+A sampled response carries a Server-Timing header (visible in the browser's
+network panel). SQL statements repeated REQUEST_METRICS_N_PLUS_ONE_THRESHOLD
+or more times in one request are logged as a likely N+1. Samples go into a
+per-view rolling window of REQUEST_METRICS_WINDOW entries in process memory;
+snapshot() summarizes it for the admin-only request-metrics endpoint. Each
+process keeps its own window.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the request duration histogram buckets
+DURATION_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Distinct N+1 statement shapes remembered per view
+MAX_SHAPES_PER_VIEW = 10
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'\bIN \((?:(?:\?|%s), )*(?:\?|%s)\)')
+
+
+def is_enabled():
+    return getattr(settings, 'REQUEST_METRICS_ENABLED', False)
+
+
+def get_sample_rate():
+    return getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.1)
+
+
+def get_n_plus_one_threshold():
+    return getattr(settings, 'REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 5)
+
+
+def get_window():
+    return getattr(settings, 'REQUEST_METRICS_WINDOW', 1000)
+
+
+# ==================== SQL SHAPES ====================
+
+@lru_cache(maxsize=1024)
+def sql_shape(sql):
+    """The statement with its literals and IN lists collapsed, so per-row repeats compare equal"""
+    return IN_LISTS.sub('IN (...)', LITERALS.sub('?', sql))
+
+
+def repeated_shapes(statements, minimum=2):
+    """[(count, shape)] of statements run at least `minimum` times, most frequent first"""
+    return repeated_counts(Counter(sql_shape(sql) for sql in statements), minimum)
+
+
+def repeated_counts(shapes, minimum=2):
+    """repeated_shapes() of a Counter of shapes that was filled as statements ran"""
+    return [(count, shape) for shape, count in shapes.most_common() if count >= minimum]
+
+
+# ==================== MEASUREMENT ====================
+
+class RequestRecorder:
+    """Counters for one sampled request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        # Statement shape -> executions; the SQL itself is not kept
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[sql_shape(sql)] += 1
+
+
+current_recorder = ContextVar('request_metrics_recorder', default=None)
+
+_template_timer_installed = False
+
+
+def install_template_timer():
+    """Wrap the Django template backend's render() to add its time to the current recorder.
+
+    Only the outermost template is timed; included templates render inside it.
+    """
+    global _template_timer_installed
+    if _template_timer_installed:
+        return
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def render(self, context=None, request=None):
+        recorder = current_recorder.get()
+        if recorder is None:
+            return original_render(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            recorder.template_time += time.perf_counter() - started
+
+    Template.render = render
+    _template_timer_installed = True
+
+
+# ==================== ROLLING WINDOW ====================
+
+class MetricsStore:
+    """Per-view rolling window of samples, shared by the threads of one process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = defaultdict(lambda: deque(maxlen=get_window()))
+            self.requests = Counter()
+            self.n_plus_one = defaultdict(Counter)
+            self.started_at = time.time()
+
+    def count_request(self, view):
+        with self.lock:
+            self.requests[view] += 1
+
+    def add(self, view, sample, repeated):
+        with self.lock:
+            self.samples[view].append(sample)
+            shapes = self.n_plus_one[view]
+            for count, shape in repeated:
+                if shape in shapes or len(shapes) < MAX_SHAPES_PER_VIEW:
+                    shapes[shape] = max(shapes[shape], count)
+
+    def snapshot(self):
+        with self.lock:
+            views = {view: list(samples) for view, samples in self.samples.items()}
+            requests = dict(self.requests)
+            n_plus_one = {view: shapes.most_common() for view, shapes in self.n_plus_one.items()}
+        return {
+            'since': self.started_at,
+            'sample_rate': get_sample_rate(),
+            'views': sorted((
+                summarize(view, samples, requests.get(view, 0), n_plus_one.get(view, []))
+                for view, samples in views.items()
+            ), key=lambda row: row['duration_ms']['p95'], reverse=True),
+        }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def describe(values):
+    return {
+        'mean': round(sum(values) / len(values), 2),
+        'p50': round(percentile(values, 0.50), 2),
+        'p95': round(percentile(values, 0.95), 2),
+        'p99': round(percentile(values, 0.99), 2),
+        'max': round(max(values), 2),
+    }
+
+
+def histogram(values):
+    counts = Counter()
+    for value in values:
+        bucket = next((f'<={bound}' for bound in DURATION_BUCKETS if value <= bound), f'>{DURATION_BUCKETS[-1]}')
+        counts[bucket] += 1
+    labels = [f'<={bound}' for bound in DURATION_BUCKETS] + [f'>{DURATION_BUCKETS[-1]}']
+    return {label: counts[label] for label in labels}
+
+
+def summarize(view, samples, requests, n_plus_one):
+    durations = [sample['duration_ms'] for sample in samples]
+    return {
+        'view': view,
+        'requests': requests,
+        'samples': len(samples),
+        'duration_ms': describe(durations),
+        'duration_histogram_ms': histogram(durations),
+        'queries': describe([sample['queries'] for sample in samples]),
+        'db_ms': describe([sample['db_ms'] for sample in samples]),
+        'template_ms': describe([sample['template_ms'] for sample in samples]),
+        'response_bytes': describe([sample['response_bytes'] for sample in samples]),
+        'n_plus_one': [{'count': count, 'sql': shape} for shape, count in n_plus_one],
+    }
+
+
+store = MetricsStore()
+
+
+def snapshot():
+    return store.snapshot()
+
+
+def reset():
+    store.reset()
+
+
+# ==================== MIDDLEWARE ====================
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unnamed'
+
+
+def server_timing(total, recorder):
+    return ', '.join([
+        f'db;dur={recorder.db_time * 1000:.1f};desc="{recorder.queries} queries"',
+        f'tpl;dur={recorder.template_time * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed('REQUEST_METRICS_ENABLED is off')
+        self.get_response = get_response
+        install_template_timer()
+
+    def __call__(self, request):
+        if random.random() >= get_sample_rate():
+            response = self.get_response(request)
+            store.count_request(view_name(request))
+            return response
+
+        recorder = RequestRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        total = time.perf_counter() - started
+
+        view = view_name(request)
+        repeated = repeated_counts(recorder.shapes, get_n_plus_one_threshold())
+        if repeated:
+            count, shape = repeated[0]
+            logger.warning('Possible N+1 in %s: %d x %s', view, count, shape)
+
+        store.count_request(view)
+        store.add(view, {
+            'duration_ms': total * 1000,
+            'queries': recorder.queries,
+            'db_ms': recorder.db_time * 1000,
+            'template_ms': recorder.template_time * 1000,
+            'response_bytes': 0 if response.streaming else len(response.content),
+        }, repeated)
+        response['Server-Timing'] = server_timing(total, recorder)
+        return response
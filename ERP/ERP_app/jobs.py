@@ -0,0 +1,121 @@
+"""
+Database-backed background job queue.
+
+enqueue() stores a BackgroundJob naming a handler by dotted path; the run_jobs
+management command claims queued jobs one at a time and runs them outside
+the request/response cycle. No broker is needed: claiming is a conditional
+UPDATE (status still 'queued'), which is safe with several workers on both
+SQLite and PostgreSQL. Failed jobs are retried with a growing delay until
+max_attempts is reached; jobs whose worker died are re-queued after
+JOB_LOCK_TIMEOUT seconds.
+"""
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (bad input, rejected file)"""
+
+
+def get_lock_timeout():
+    return getattr(settings, 'JOB_LOCK_TIMEOUT', 15 * 60)
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt: 10s, 40s, 90s, ..."""
+    return 10 * attempts * attempts
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def enqueue(task, payload=None, created_by=None, max_attempts=3):
+    """Queue `task` (dotted path of a callable taking the job) and return the BackgroundJob"""
+    import_string(task)  # fail in the request, not in the worker, on a typo
+    return BackgroundJob.objects.create(
+        task=task,
+        payload=payload or {},
+        created_by=created_by,
+        max_attempts=max_attempts,
+    )
+
+
+def requeue_stale(now=None):
+    """Give jobs locked by a worker that stopped responding back to the queue"""
+    now = now or timezone.now()
+    return BackgroundJob.objects.filter(
+        status=BackgroundJob.RUNNING,
+        locked_at__lt=now - timedelta(seconds=get_lock_timeout()),
+    ).update(status=BackgroundJob.QUEUED, locked_by='', locked_at=None)
+
+
+def claim_next(worker_id):
+    """Atomically take the oldest runnable job, or return None if there is none"""
+    now = timezone.now()
+    candidates = BackgroundJob.objects.filter(
+        status=BackgroundJob.QUEUED, run_after__lte=now,
+    ).order_by('run_after', 'id').values_list('id', flat=True)[:10]
+
+    for job_id in candidates:
+        claimed = BackgroundJob.objects.filter(id=job_id, status=BackgroundJob.QUEUED).update(
+            status=BackgroundJob.RUNNING, locked_by=worker_id, locked_at=now,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome"""
+    job.attempts += 1
+    try:
+        with transaction.atomic():
+            result = import_string(job.task)(job)
+    except Exception as e:
+        permanent = isinstance(e, PermanentJobError)
+        # Permanent errors are written for the user; anything else keeps its type for debugging
+        job.error = str(e) if permanent else ''.join(traceback.format_exception_only(type(e), e)).strip()
+        if permanent or job.attempts >= job.max_attempts:
+            job.status = BackgroundJob.FAILED
+            job.finished_at = timezone.now()
+            on_failure = getattr(import_string(job.task), 'on_failure', None)
+            if on_failure is not None:
+                on_failure(job)
+        else:
+            job.status = BackgroundJob.QUEUED
+            job.run_after = timezone.now() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = BackgroundJob.SUCCEEDED
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+
+    job.locked_by = ''
+    job.locked_at = None
+    job.save(update_fields=[
+        'status', 'result', 'error', 'attempts', 'run_after', 'locked_by', 'locked_at', 'finished_at',
+    ])
+    return job
+
+
+def job_status(job):
+    """Public view of a job for status polling"""
+    return {
+        'id': job.id,
+        'status': job.status,
+        'attempts': job.attempts,
+        'error': job.error if job.status == BackgroundJob.FAILED else '',
+        'result': job.result,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
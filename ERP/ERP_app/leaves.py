@@ -0,0 +1,134 @@
+"""
+Leave calendar: leave applications expanded to one row per student and day.
+
+A leave ApplicationRequest holds a from_date/to_date range. LeaveDay keeps
+one row per day of every pending, in-process or approved leave, indexed on
+(student, date, approved), so both questions asked of leaves are index seeks:
+
+- does a new leave overlap one the student already has? find_overlap() reads
+  the first row with student = s AND date BETWEEN from AND to: one range
+  seek, O(log n) in the number of leave days, however many leaves the
+  student has;
+- was the student on approved leave on an attendance record's day? on_leave()
+  is an EXISTS on (student, date, approved = true), one seek per record. The
+  shortage report leaves those records out of the percentage (and counts them
+  as leave_classes); the dean/HOD dashboards count them per breakdown as
+  total_on_leave.
+
+sync() rewrites the rows of some applications from their current state. The
+signals call it when an application is saved, reviews.review() after its
+bulk status update, and rebuild() recreates the table after bulk imports
+(rebuild_leave_index). A leave longer than LEAVE_MAX_DAYS is refused on
+submit, and only its first LEAVE_MAX_DAYS days are indexed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils.dateparse import parse_date
+
+from .models import ApplicationRequest, LeaveDay
+
+# Statuses whose days are indexed; rejected leaves free their days
+ACTIVE_STATUSES = ('pending', 'in_process', 'approved')
+
+
+class LeaveError(ValueError):
+    pass
+
+
+def get_max_days():
+    return getattr(settings, 'LEAVE_MAX_DAYS', 60)
+
+
+def leave_dates(from_date, to_date):
+    """The days a leave covers: none for a missing or inverted range, at most get_max_days()"""
+    if not from_date or not to_date or to_date < from_date:
+        return []
+    days = min((to_date - from_date).days + 1, get_max_days())
+    return [from_date + timedelta(days=n) for n in range(days)]
+
+
+def _rows(applications):
+    """LeaveDay rows for (pk, student_id, from_date, to_date, status) tuples"""
+    for pk, student_id, from_date, to_date, status in applications:
+        for day in leave_dates(from_date, to_date):
+            yield LeaveDay(student_id=student_id, date=day, application_id=pk, approved=status == 'approved')
+
+
+def _indexed(applications):
+    return applications.filter(application_type='leave', status__in=ACTIVE_STATUSES).values_list(
+        'pk', 'student_id', 'from_date', 'to_date', 'status',
+    )
+
+
+# ==================== MAINTENANCE ====================
+
+def sync(application_ids):
+    """Rewrite the LeaveDay rows of these applications from their current state"""
+    application_ids = list(application_ids)
+    with transaction.atomic():
+        LeaveDay.objects.filter(application_id__in=application_ids).delete()
+        LeaveDay.objects.bulk_create(_rows(_indexed(ApplicationRequest.objects.filter(pk__in=application_ids))))
+
+
+def rebuild(batch_size=1000):
+    """Recreate every LeaveDay from the leave applications. Returns the number of rows"""
+    applications = _indexed(ApplicationRequest.objects.order_by('pk'))
+    with transaction.atomic():
+        LeaveDay.objects.all().delete()
+        rows = LeaveDay.objects.bulk_create(_rows(applications.iterator(chunk_size=batch_size)), batch_size=batch_size)
+    return len(rows)
+
+
+# ==================== QUERYING ====================
+
+def find_overlap(student_id, from_date, to_date, exclude_id=None):
+    """The student's pending or approved leave application covering a day in the range, or None"""
+    days = LeaveDay.objects.filter(student_id=student_id, date__gte=from_date, date__lte=to_date)
+    if exclude_id is not None:
+        days = days.exclude(application_id=exclude_id)
+    day = days.select_related('application').order_by('date').first()
+    return day.application if day else None
+
+
+def check_new_leave(student_id, from_date, to_date):
+    """Validate a leave about to be submitted; returns its (from, to) dates or raises LeaveError
+
+    Call it inside the transaction.atomic() block that creates the application:
+    it locks the student's User row until that commits, so two concurrent
+    submissions cannot both pass the overlap check. (SQLite has no row locks,
+    but it only lets one transaction write at a time.)
+    """
+    try:
+        from_date = parse_date(from_date) if isinstance(from_date, str) else from_date
+        to_date = parse_date(to_date) if isinstance(to_date, str) else to_date
+    except ValueError:
+        raise LeaveError('Invalid leave dates')
+    if not from_date or not to_date:
+        raise LeaveError('A leave application needs a from date and a to date')
+    if to_date < from_date:
+        raise LeaveError('The leave ends before it starts')
+    if (to_date - from_date).days + 1 > get_max_days():
+        raise LeaveError(f'A leave can cover at most {get_max_days()} days')
+
+    list(User.objects.select_for_update().filter(pk=student_id).values_list('pk', flat=True))
+    overlap = find_overlap(student_id, from_date, to_date)
+    if overlap is not None:
+        raise LeaveError(
+            f'Overlaps your {overlap.get_status_display().lower()} leave application #{overlap.pk} '
+            f'({overlap.from_date:%d %b %Y} to {overlap.to_date:%d %b %Y})'
+        )
+    return from_date, to_date
+
+
+def on_leave(student='student_id', date='date'):
+    """EXISTS(an approved leave day) for the outer row's student and date"""
+    return Exists(LeaveDay.objects.filter(student_id=OuterRef(student), date=OuterRef(date), approved=True))
+
+
+def annotate_on_leave(records):
+    """AttendanceRecord queryset with an `on_leave` flag, for filtering and conditional counts"""
+    return records.alias(on_leave=on_leave())
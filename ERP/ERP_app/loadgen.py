@@ -0,0 +1,335 @@
+"""
+Synthetic university data for load tests and benchmarks.
+
+generate() bulk-creates a complete, internally consistent data set: schools,
+departments and programs, one faculty member per department, course sections,
+students spread over them, weekday attendance for the last N months,
+placement drives with applications, and ApplicationRequests. Every random
+choice comes from one random.Random(seed), so a seed and a set of sizes
+always produce the same rows (dates are relative to the day it runs).
+
+bulk_create() sends no signals, so the derived state the signals normally
+maintain (attendance rollups, the search index, the placement branch index,
+the structure counters and the cached structure and statistics) is rebuilt
+once at the end.
+
+Generated users are named load-*, which is how existing_load_data() spots an
+earlier run.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import counters, eligibility, leaves, placement_stats, rollups, search, structure
+from .models import (
+    ApplicationRequest, AttendanceRecord, CourseSection, Department, FacultyMember,
+    PlacementApplication, PlacementUpdate, Program, School, UserProfile,
+)
+
+USERNAME_PREFIX = 'load-'
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Rohan', 'Saanvi',
+               'Arjun', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Neha', 'Karan', 'Pooja', 'Siddharth', 'Tanvi']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Singh', 'Mehta', 'Joshi',
+              'Kulkarni', 'Chopra', 'Bose', 'Das', 'Menon', 'Rao', 'Pillai', 'Kapoor', 'Malhotra', 'Bhat']
+SUBJECTS = ['Computer Science', 'Electronics', 'Mechanical', 'Civil', 'Electrical', 'Chemical',
+            'Biotechnology', 'Mathematics', 'Physics', 'Chemistry', 'Commerce', 'Economics',
+            'Business Administration', 'English', 'Psychology', 'Law', 'Design', 'Architecture']
+COURSES = ['Mathematics', 'Programming', 'Data Structures', 'Networks', 'Databases', 'Thermodynamics',
+           'Signals', 'Economics', 'Communication Skills', 'Statistics', 'Ethics', 'Project']
+ROLES = ['Software Engineer', 'Analyst', 'Graduate Engineer Trainee', 'Consultant', 'Data Scientist',
+         'Design Engineer', 'Sales Associate']
+SECTIONS = ['A', 'B']
+YEARS = [1, 2, 3, 4]
+
+# Weighted choices, as (value, weight)
+DRIVE_STATUSES = [('approved', 70), ('pending', 20), ('rejected', 10)]
+APPLICATION_STATUSES = [('applied', 60), ('shortlisted', 20), ('rejected', 15), ('selected', 5)]
+REQUEST_STATUSES = [('pending', 40), ('approved', 35), ('rejected', 15), ('in_process', 10)]
+CUTOFFS = [None, Decimal('6.00'), Decimal('6.50'), Decimal('7.00'), Decimal('7.50'), Decimal('8.00')]
+
+# Default sizes; the command exposes each as an option
+DEFAULTS = {
+    'seed': 42,
+    'schools': 4,
+    'departments_per_school': 5,
+    'students': 2000,
+    'months': 3,
+    'courses': 3,
+    'drives': 100,
+    'applications_per_drive': 100,
+    'requests': 5000,
+    'batch_size': 2000,
+}
+
+
+def existing_load_data():
+    """True if an earlier generate() left its users in the database"""
+    return User.objects.filter(username__startswith=USERNAME_PREFIX).exists()
+
+
+def class_days(months, today=None):
+    """Weekdays of the last `months` months, up to and including today"""
+    today = today or timezone.localdate()
+    start = today - timedelta(days=30 * months)
+    days = (start + timedelta(days=offset) for offset in range(1, (today - start).days + 1))
+    return [day for day in days if day.weekday() < 5]
+
+
+def estimate_attendance_rows(students, months, courses):
+    return students * courses * len(class_days(months))
+
+
+def students_for_rows(rows, months, courses):
+    """Students needed for roughly `rows` attendance records over `months` months"""
+    return max(1, round(rows / (courses * len(class_days(months)))))
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def bulk_create(model, objects, batch_size):
+    """bulk_create() an iterable in batches without materializing it. Returns the row count"""
+    objects = iter(objects)
+    count = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return count
+        model.objects.bulk_create(batch)
+        count += len(batch)
+
+
+def generate(log=None, **options):
+    """Create the data set. `options` override DEFAULTS; None means the default.
+
+    Returns the sizes used, {table: rows created} and a few sample keys for benchmarks.
+    """
+    unknown = set(options) - set(DEFAULTS)
+    if unknown:
+        raise TypeError(f'Unknown load data options: {", ".join(sorted(unknown))}')
+    sizes = dict(DEFAULTS)
+    sizes.update({key: value for key, value in options.items() if value is not None})
+    log = log or (lambda message: None)
+    rng = random.Random(sizes['seed'])
+    batch_size = sizes['batch_size']
+    today = timezone.localdate()
+    counts = {}
+
+    # Staff
+    crc_user = User.objects.create(username=f'{USERNAME_PREFIX}crc', password='!', first_name='Load', last_name='CRC')
+    admin_user = User.objects.create(username=f'{USERNAME_PREFIX}admin', password='!', first_name='Load',
+                                     last_name='Admin', is_staff=True)
+
+    # Structure
+    school_rows = School.objects.bulk_create([
+        School(name=f'Load School {i:02d}', short_name=f'LS{i:02d}')
+        for i in range(1, sizes['schools'] + 1)
+    ])
+    department_rows = Department.objects.bulk_create([
+        Department(
+            school=school,
+            name=f'Load {SUBJECTS[(s * sizes["departments_per_school"] + d) % len(SUBJECTS)]} {s + 1:02d}{d + 1:02d}',
+            short_name=f'LD{s + 1:02d}{d + 1:02d}',
+        )
+        for s, school in enumerate(school_rows)
+        for d in range(sizes['departments_per_school'])
+    ])
+    Program.objects.bulk_create([
+        Program(department=department, name=f'B.Tech {department.name}', degree_type='bachelor')
+        for department in department_rows
+    ])
+    counts.update(schools=len(school_rows), departments=len(department_rows), programs=len(department_rows))
+    log(f'{len(school_rows)} schools, {len(department_rows)} departments')
+
+    faculty_users = User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}fac-{n:04d}', password='!',
+             first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES))
+        for n in range(len(department_rows))
+    ], batch_size=batch_size)
+    UserProfile.objects.bulk_create([
+        UserProfile(user=user, department=department.name, school=department.school.name, role='hod',
+                    department_ref=department, school_ref=department.school)
+        for user, department in zip(faculty_users, department_rows)
+    ], batch_size=batch_size)
+    FacultyMember.objects.bulk_create([
+        FacultyMember(user=user, department=department, rank='hod')
+        for user, department in zip(faculty_users, department_rows)
+    ], batch_size=batch_size)
+    for user, department in zip(faculty_users, department_rows):
+        department.hod = user
+    Department.objects.bulk_update(department_rows, ['hod'], batch_size=batch_size)
+    faculty_of = {department.id: user for user, department in zip(faculty_users, department_rows)}
+    counts['faculty'] = len(faculty_users)
+
+    sections = CourseSection.objects.bulk_create([
+        CourseSection(
+            school=department.school, department=department,
+            school_name=department.school.name, department_name=department.name,
+            year=year, section=section, course=course,
+        )
+        for department in department_rows
+        for year in YEARS
+        for section in SECTIONS
+        for course in rng.sample(COURSES, min(sizes['courses'], len(COURSES)))
+    ], batch_size=batch_size)
+    sections_of = {}
+    for course_section in sections:
+        key = (course_section.department_id, course_section.year, course_section.section)
+        sections_of.setdefault(key, []).append(course_section)
+    counts['course_sections'] = len(sections)
+
+    # Students, each with a steady attendance rate so some fall below the shortage threshold
+    student_users = User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}stu-{n:07d}', password='!',
+             first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+             email=f'load{n:07d}@example.com')
+        for n in range(sizes['students'])
+    ], batch_size=batch_size)
+    profiles = []
+    for n, user in enumerate(student_users):
+        department = rng.choice(department_rows)
+        profiles.append(UserProfile(
+            user=user,
+            enrollment_no=f'LD{today.year - n % 4}{n:07d}',
+            contact_no=f'9{rng.randrange(10 ** 9):09d}',
+            department=department.name,
+            school=department.school.name,
+            department_ref=department,
+            school_ref=department.school,
+            year=rng.choice(YEARS),
+            section=rng.choice(SECTIONS),
+            role='student',
+            # PlacementApplication.cgpa holds at most 9.99
+            cgpa=Decimal(rng.randint(500, 999)) / 100,
+        ))
+    UserProfile.objects.bulk_create(profiles, batch_size=batch_size)
+    department_of = {department.name: department for department in department_rows}
+    counts['students'] = len(student_users)
+    log(f'{len(student_users)} students')
+
+    days = class_days(sizes['months'], today)
+    statuses = [AttendanceRecord.PRESENT, AttendanceRecord.LATE, AttendanceRecord.ABSENT]
+
+    def attendance():
+        for profile in profiles:
+            department = department_of[profile.department]
+            rate = rng.uniform(0.55, 0.98)
+            weights = [rate - 0.05, 0.05, 1 - rate]
+            for course_section in sections_of[(department.id, profile.year, profile.section)]:
+                for day, status in zip(days, rng.choices(statuses, weights, k=len(days))):
+                    yield AttendanceRecord(
+                        student_id=profile.user_id, course_section=course_section,
+                        faculty=faculty_of[department.id], date=day, status=status,
+                    )
+
+    counts['attendance_records'] = bulk_create(AttendanceRecord, attendance(), batch_size)
+    log(f'{counts["attendance_records"]} attendance records over {len(days)} class days')
+
+    # Placement drives and applications
+    drive_rows = []
+    for n in range(sizes['drives']):
+        if rng.random() < 0.1:
+            branches_allowed = 'All Branches'
+        else:
+            picked = rng.sample(department_rows, min(rng.randint(1, 4), len(department_rows)))
+            branches_allowed = ', '.join(department.short_name for department in picked)
+        last_date = today + timedelta(days=rng.randint(-30, 60))
+        drive_rows.append(PlacementUpdate(
+            company_name=f'Load Company {n:04d}',
+            role=rng.choice(ROLES),
+            package=Decimal(rng.randint(300, 4500)) / 100,
+            eligibility_cgpa=rng.choice(CUTOFFS),
+            branches_allowed=branches_allowed,
+            last_date=last_date,
+            drive_date=last_date + timedelta(days=7),
+            job_location=rng.choice(['Bengaluru', 'Pune', 'Hyderabad', 'Chennai', 'Remote']),
+            mode=rng.choice(['on-campus', 'off-campus']),
+            description='Synthetic placement drive',
+            status=weighted(rng, DRIVE_STATUSES),
+            created_by=crc_user,
+        ))
+    drive_rows = PlacementUpdate.objects.bulk_create(drive_rows, batch_size=batch_size)
+    counts['placement_drives'] = len(drive_rows)
+
+    def applications():
+        per_drive = min(sizes['applications_per_drive'], len(profiles))
+        for drive in drive_rows:
+            for profile in rng.sample(profiles, per_drive):
+                yield PlacementApplication(
+                    placement=drive,
+                    student_id=profile.user_id,
+                    enrollment_no=profile.enrollment_no,
+                    student_name=f'{profile.user.first_name} {profile.user.last_name}',
+                    department=profile.department,
+                    cgpa=profile.cgpa,
+                    status=weighted(rng, APPLICATION_STATUSES),
+                )
+
+    counts['placement_applications'] = bulk_create(PlacementApplication, applications(), batch_size)
+    log(f'{len(drive_rows)} drives, {counts["placement_applications"]} applications')
+
+    # Student applications
+    types = [value for value, _ in ApplicationRequest.APPLICATION_TYPES]
+
+    def application_requests():
+        now = timezone.now()
+        for _ in range(sizes['requests']):
+            profile = rng.choice(profiles)
+            application_type = rng.choice(types)
+            status = weighted(rng, REQUEST_STATUSES)
+            from_date = to_date = None
+            if application_type == 'leave':
+                from_date = today + timedelta(days=rng.randint(-90, 30))
+                to_date = from_date + timedelta(days=rng.randint(0, 5))
+            reviewed = status in ('approved', 'rejected')
+            yield ApplicationRequest(
+                student_id=profile.user_id,
+                application_type=application_type,
+                student_name=f'{profile.user.first_name} {profile.user.last_name}',
+                enrollment_no=profile.enrollment_no,
+                department=profile.department,
+                semester=str(profile.year * 2),
+                mobile=profile.contact_no,
+                email=profile.user.email,
+                reason='Synthetic request',
+                from_date=from_date,
+                to_date=to_date,
+                status=status,
+                reviewed_by=admin_user if reviewed else None,
+                reviewed_at=now if reviewed else None,
+            )
+
+    counts['application_requests'] = bulk_create(ApplicationRequest, application_requests(), batch_size)
+    log(f'{counts["application_requests"]} application requests')
+
+    # Derived state the signals would have maintained
+    counts['attendance_rollups'], counts['attendance_roster'] = rollups.rebuild(batch_size)
+    counts['search_entries'] = search.rebuild(batch_size)
+    counts['leave_days'] = leaves.rebuild(batch_size)
+    eligibility.rebuild_branch_index()
+    counters.reconcile()
+    structure.invalidate()
+    placement_stats.invalidate()
+    log('Rebuilt rollups, search index, leave calendar, branch index and counters')
+
+    sample_department = department_rows[0]
+    busiest_drive = drive_rows[0] if drive_rows else None
+    return {
+        'sizes': sizes,
+        'counts': counts,
+        'samples': {
+            'school': sample_department.school.name,
+            'department': sample_department.name,
+            'course': sections[0].course if sections else None,
+            'drive_id': busiest_drive.id if busiest_drive else None,
+            'student_name': f'{student_users[0].first_name} {student_users[0].last_name}' if student_users else None,
+            'enrollment_no': profiles[0].enrollment_no if profiles else None,
+        },
+    }
@@ -0,0 +1,74 @@
+"""
+Management command to report table and index sizes of the attendance tables
+Run: python manage.py attendance_storage_report
+
+Run it before and after `migrate ERP_app 0004` to measure what the compact
+AttendanceRecord schema saves.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+TABLE_PREFIX = 'ERP_app_att'
+
+
+class Command(BaseCommand):
+    help = 'Show on-disk size of the attendance tables and their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vacuum', action='store_true',
+                            help='VACUUM first so freed pages are not counted (SQLite only)')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            sizes = self._sqlite_sizes(options['vacuum'])
+        elif connection.vendor == 'postgresql':
+            sizes = self._postgresql_sizes()
+        else:
+            raise CommandError(f'Unsupported database backend: {connection.vendor}')
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM "ERP_app_attendancerecord"')
+            row_count = cursor.fetchone()[0]
+
+        self.stdout.write(f'AttendanceRecord rows: {row_count}')
+        self.stdout.write(f"{'table':40} {'data KiB':>12} {'indexes KiB':>12} {'bytes/row':>10}")
+        for table, (data, indexes) in sorted(sizes.items()):
+            per_row = (data + indexes) / row_count if row_count and table.endswith('attendancerecord') else 0
+            self.stdout.write(f'{table:40} {data / 1024:12.0f} {indexes / 1024:12.0f} {per_row:10.1f}')
+        total = sum(data + indexes for data, indexes in sizes.values())
+        self.stdout.write(self.style.SUCCESS(f'Total: {total / 1024 / 1024:.2f} MiB'))
+
+    def _sqlite_sizes(self, vacuum):
+        with connection.cursor() as cursor:
+            if vacuum:
+                cursor.execute('VACUUM')
+            cursor.execute(
+                "SELECT m.tbl_name, m.type, SUM(s.pgsize) FROM dbstat s "
+                "JOIN sqlite_master m ON m.name = s.name "
+                "WHERE m.tbl_name LIKE %s GROUP BY m.tbl_name, m.type",
+                [f'{TABLE_PREFIX}%'],
+            )
+            return self._collect(cursor.fetchall())
+
+    def _postgresql_sizes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, 'table', pg_table_size(c.oid) FROM pg_class c "
+                "WHERE c.relkind = 'r' AND c.relname LIKE %s "
+                "UNION ALL "
+                "SELECT c.relname, 'index', pg_indexes_size(c.oid) FROM pg_class c "
+                "WHERE c.relkind = 'r' AND c.relname LIKE %s",
+                [f'{TABLE_PREFIX}%', f'{TABLE_PREFIX}%'],
+            )
+            return self._collect(cursor.fetchall())
+
+    def _collect(self, rows):
+        sizes = {}
+        for table, kind, size in rows:
+            data, indexes = sizes.get(table, (0, 0))
+            if kind == 'index':
+                indexes += size or 0
+            else:
+                data += size or 0
+            sizes[table] = (data, indexes)
+        return sizes
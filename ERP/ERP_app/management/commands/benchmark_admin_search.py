@@ -0,0 +1,140 @@
+"""
+Management command to benchmark the admin search index against the old icontains scans
+Run: python manage.py benchmark_admin_search --profiles 100000
+
+Synthetic users and profiles are generated inside a transaction that is rolled
+back at the end (unless --keep), so it can be pointed at a development database.
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from ERP_app import search
+from ERP_app.models import UserProfile
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Rohan', 'Saanvi',
+               'Arjun', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Neha', 'Karan', 'Pooja', 'Siddharth', 'Tanvi']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Singh', 'Mehta', 'Joshi',
+              'Kulkarni', 'Chopra', 'Bose', 'Das', 'Menon', 'Rao', 'Pillai', 'Kapoor', 'Malhotra', 'Bhat']
+DEPARTMENTS = [
+    ('Computer Science and Engineering', 'School of Engineering'),
+    ('Electronics and Communication', 'School of Engineering'),
+    ('Mechanical Engineering', 'School of Engineering'),
+    ('Civil Engineering', 'School of Engineering'),
+    ('Business Administration', 'School of Management'),
+    ('Commerce', 'School of Management'),
+    ('Physics', 'School of Sciences'),
+    ('Chemistry', 'School of Sciences'),
+    ('Mathematics', 'School of Sciences'),
+    ('English', 'School of Humanities'),
+]
+COLLEGES = ['Central Campus', 'North Campus', 'City College of Engineering', 'Institute of Management']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time admin search through the search index and through the legacy icontains queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=100000,
+                            help='Synthetic profiles to generate (default: 100000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Runs per query; the median is reported (default: 5)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true',
+                            help='Commit the generated profiles instead of rolling them back')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write('Generated data rolled back')
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        count = options['profiles']
+
+        self.stdout.write(f'Generating {count} profiles...')
+        started = time.monotonic()
+        users = User.objects.bulk_create([
+            User(username=f'bench{i:07d}', password='!',
+                 first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES))
+            for i in range(count)
+        ], batch_size=1000)
+        profiles = []
+        for i, user in enumerate(users):
+            department, school = rng.choice(DEPARTMENTS)
+            profiles.append(UserProfile(
+                user=user,
+                enrollment_no=f'BN{2020 + i % 5}{i:07d}',
+                contact_no=f'9{rng.randrange(10 ** 9):09d}',
+                department=department,
+                school=school,
+                year=i % 4 + 1,
+                role='hod' if i % 1000 == 0 else 'student',
+                college_name=rng.choice(COLLEGES),
+            ))
+        UserProfile.objects.bulk_create(profiles, batch_size=1000)
+        self.stdout.write(f'  generated in {time.monotonic() - started:.2f}s')
+
+        started = time.monotonic()
+        entries = search.rebuild()
+        self.stdout.write(f'  indexed {entries} entries in {time.monotonic() - started:.2f}s '
+                          f'({search.get_backend()} backend)')
+
+        sample = next(p for p in profiles[count // 2:] if p.role == 'student')
+        queries = [
+            ('exact enrollment', sample.enrollment_no),
+            ('enrollment prefix', sample.enrollment_no[:8]),
+            ('full name', f'{sample.user.first_name} {sample.user.last_name}'),
+            ('name typo', 'Kulkrani'),
+            ('name typo', 'Siddarth Malhtra'),
+            ('department', 'mechanical'),
+            ('college', 'campus'),
+            ('short', 'ra'),
+        ]
+
+        self.stdout.write(f"{'query':20} {'text':24} {'legacy ms':>10} {'index ms':>10} {'hits':>6}")
+        for label, text in queries:
+            legacy_ms = self._time(lambda: legacy_search(text), options['repeat'])
+            index_ms = self._time(lambda: search.search_all(text), options['repeat'])
+            hits = sum(len(rows) for rows in search.search_all(text).values())
+            self.stdout.write(f'{label:20} {text[:24]:24} {legacy_ms:10.1f} {index_ms:10.1f} {hits:6}')
+
+    def _time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+
+def legacy_search(query):
+    """The four icontains queries admin_search used to run"""
+    students = UserProfile.objects.select_related('user').filter(
+        Q(enrollment_no__icontains=query) |
+        Q(user__first_name__icontains=query) |
+        Q(user__last_name__icontains=query) |
+        Q(contact_no__icontains=query)
+    ).filter(role='student')[:10]
+    departments = UserProfile.objects.filter(department__icontains=query).values('department', 'school').distinct()[:10]
+    hods = UserProfile.objects.select_related('user').filter(
+        Q(role='hod') &
+        (Q(user__first_name__icontains=query) |
+         Q(user__last_name__icontains=query) |
+         Q(department__icontains=query))
+    )[:10]
+    colleges = UserProfile.objects.filter(college_name__icontains=query).values('college_name').distinct()[:10]
+    return [list(students), list(departments), list(hods), list(colleges)]
@@ -0,0 +1,245 @@
+"""
+Management command to time the dashboard and API views against synthetic data sets
+Run: python manage.py benchmark_views --scales 10k 100k --output bench.json
+
+For each scale (attendance rows) generate_load_data's generator fills the
+database inside a transaction that is rolled back afterwards, then every view
+in BENCHMARK_VIEWS is requested once with cold caches and --repeat times warm
+through the test client. The JSON report records the commit, the data set
+sizes and, per view, the cold and warm timings and query counts; --compare
+prints the change against an earlier report so regressions show up between
+commits.
+"""
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ERP_app import loadgen
+
+from .generate_load_data import SCALES
+
+# (label, url name, url kwargs, query string); '{sample}' values come from loadgen's samples
+BENCHMARK_VIEWS = [
+    ('admin-attendance-dashboard', 'admin-attendance-dashboard', {}, {}),
+    ('admin-attendance-dashboard?search', 'admin-attendance-dashboard', {}, {'search': '{department}'}),
+    ('dean-attendance-dashboard', 'dean-attendance-dashboard', {}, {'school': '{school}'}),
+    ('hod-attendance-dashboard', 'hod-attendance-dashboard', {}, {'department': '{department}'}),
+    ('attendance-shortage-api', 'attendance-shortage-api', {}, {}),
+    ('attendance-shortage-api?school', 'attendance-shortage-api', {}, {'school': '{school}'}),
+    ('admin-search', 'admin-search', {}, {'q': '{student_name}'}),
+    ('admin-search?enrollment', 'admin-search', {}, {'q': '{enrollment_no}'}),
+    ('crc-portal', 'crc-portal', {}, {}),
+    ('crc-placement-stats', 'crc-placement-stats', {}, {}),
+    ('crc-view-applications', 'crc-view-applications', {'company_id': '{drive_id}'}, {}),
+    ('crc-export-applications', 'crc-export-applications', {'company_id': '{drive_id}'}, {'format': 'csv'}),
+    ('crc-eligible-students', 'crc-eligible-students', {'company_id': '{drive_id}'}, {}),
+    ('admin-placement-approval', 'admin-placement-approval', {}, {}),
+    ('placement', 'placement', {}, {}),
+    ('student-eligible-drives', 'student-eligible-drives', {}, {}),
+    ('application-status', 'application-status', {}, {}),
+    ('student-application-history', 'student-application-history', {}, {}),
+    ('reviewer-application-queue', 'reviewer-application-queue', {}, {}),
+    ('reviewer-application-queue?department', 'reviewer-application-queue', {}, {'department': '{department}'}),
+    ('university-structure-api', 'university-structure-api', {}, {}),
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+def fill(values, samples):
+    return {key: value.format(**samples) if isinstance(value, str) else value for key, value in values.items()}
+
+
+def git_revision():
+    """(commit, dirty) of the working tree, or (None, None) outside a git checkout"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+class Command(BaseCommand):
+    help = 'Time every dashboard and API view at several data sizes and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', nargs='+', choices=sorted(SCALES), default=['10k', '100k', '1m'],
+                            help='Attendance-row scales to run (default: 10k 100k 1m)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Warm requests per view; median and p95 are reported (default: 5)')
+        parser.add_argument('--seed', type=int, default=loadgen.DEFAULTS['seed'])
+        parser.add_argument('--months', type=int, default=loadgen.DEFAULTS['months'],
+                            help=f'Months of attendance per data set (default: {loadgen.DEFAULTS["months"]})')
+        parser.add_argument('--views', nargs='+', metavar='LABEL',
+                            help='Only run these views (labels as printed)')
+        parser.add_argument('--output', default='benchmark-report.json',
+                            help='Where to write the JSON report (default: benchmark-report.json)')
+        parser.add_argument('--compare', metavar='REPORT',
+                            help='Earlier report to compare warm medians against')
+        parser.add_argument('--threshold', type=float, default=25.0,
+                            help='Percent slowdown flagged as a regression by --compare (default: 25)')
+
+    def handle(self, *args, **options):
+        if loadgen.existing_load_data():
+            raise CommandError('Load data already exists (users named load-*); use a database without it')
+        views = BENCHMARK_VIEWS
+        if options['views']:
+            views = [view for view in BENCHMARK_VIEWS if view[0] in options['views']]
+            if not views:
+                raise CommandError(f'No such views; choose from: {", ".join(view[0] for view in BENCHMARK_VIEWS)}')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as report_file:
+                baseline = json.load(report_file)
+
+        commit, dirty = git_revision()
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': commit,
+            'dirty': dirty,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': f'{connection.vendor} {connection.Database.sqlite_version}'
+                        if connection.vendor == 'sqlite' else connection.vendor,
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'scales': [],
+        }
+
+        # Failing views are reported in the results; keep their tracebacks off the console
+        request_logger = logging.getLogger('django.request')
+        request_logger.disabled = True
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                for scale in options['scales']:
+                    report['scales'].append(self._run_scale(scale, views, options))
+        finally:
+            request_logger.disabled = False
+
+        with open(options['output'], 'w') as report_file:
+            json.dump(report, report_file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {options["output"]}'))
+
+        if baseline:
+            self._compare(baseline, report, options['threshold'])
+
+    def _run_scale(self, scale, views, options):
+        rows = SCALES[scale]
+        sizes = {
+            'seed': options['seed'],
+            'months': options['months'],
+            'students': loadgen.students_for_rows(rows, options['months'], loadgen.DEFAULTS['courses']),
+            'drives': max(20, rows // 5000),
+            'requests': max(1000, rows // 20),
+        }
+        self.stdout.write(f'Scale {scale}: generating...')
+        result = {'scale': scale}
+        try:
+            with transaction.atomic():
+                started = time.monotonic()
+                data = loadgen.generate(**sizes)
+                result.update(sizes=data['sizes'], counts=data['counts'],
+                              generate_seconds=round(time.monotonic() - started, 2))
+                self.stdout.write(f'  {sum(data["counts"].values())} rows in {result["generate_seconds"]}s')
+                result['views'] = [self._time_view(view, data['samples'], options['repeat']) for view in views]
+                raise Rollback
+        except Rollback:
+            pass
+        cache.clear()
+        return result
+
+    def _time_view(self, view, samples, repeat):
+        label, url_name, kwargs, params = view
+        url = reverse(url_name, kwargs=fill(kwargs, samples))
+        params = fill(params, samples)
+        client = Client()
+
+        # Cold: nothing cached from the data set or from a previous view
+        cache.clear()
+        try:
+            cold_ms, cold_queries, response = self._request(client, url, params)
+        except Exception as exc:
+            self.stdout.write(self.style.ERROR(f'  {label:36} failed: {exc!r}'))
+            return {'view': label, 'url': url, 'error': repr(exc)}
+        timings, queries = [], []
+        for _ in range(repeat):
+            elapsed, count, response = self._request(client, url, params)
+            timings.append(elapsed)
+            queries.append(count)
+
+        size = sum(len(chunk) for chunk in response.streaming_content) if response.streaming else len(response.content)
+        ordered = sorted(timings)
+        row = {
+            'view': label,
+            'url': url,
+            'status': response.status_code,
+            'cold_ms': round(cold_ms, 2),
+            'cold_queries': cold_queries,
+            'median_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+            'min_ms': round(ordered[0], 2),
+            'queries': max(queries),
+            'response_bytes': size,
+        }
+        self.stdout.write(f'  {label:36} {row["status"]:>4} cold {row["cold_ms"]:9.1f}ms {cold_queries:>3}q   '
+                          f'warm {row["median_ms"]:9.1f}ms {row["queries"]:>3}q')
+        return row
+
+    def _request(self, client, url, params):
+        """(ms, queries, response); streaming responses are consumed inside the timing"""
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url, params)
+            if response.streaming:
+                response.streaming_content = list(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, len(captured), response
+
+    def _compare(self, baseline, report, threshold):
+        self.stdout.write(f'Compared with {baseline.get("commit") or "baseline"} (warm medians):')
+        previous = {
+            (scale['scale'], row['view']): row
+            for scale in baseline.get('scales', []) for row in scale.get('views', [])
+        }
+        regressions = 0
+        for scale in report['scales']:
+            for row in scale['views']:
+                before = previous.get((scale['scale'], row['view']))
+                if 'error' in row:
+                    line = f'  {scale["scale"]:>5} {row["view"]:36} {row["error"]}'
+                    if before and 'error' in before:
+                        self.stdout.write(line)
+                    else:
+                        regressions += 1
+                        self.stdout.write(self.style.WARNING(line))
+                    continue
+                if not before or not before.get('median_ms'):
+                    continue
+                change = (row['median_ms'] - before['median_ms']) / before['median_ms'] * 100
+                line = (f'  {scale["scale"]:>5} {row["view"]:36} {before["median_ms"]:9.1f} -> '
+                        f'{row["median_ms"]:9.1f}ms ({change:+.0f}%)  queries {before["queries"]} -> {row["queries"]}')
+                if change > threshold or row['queries'] > before['queries']:
+                    regressions += 1
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f'{regressions} possible regression(s)'))
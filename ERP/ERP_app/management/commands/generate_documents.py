@@ -0,0 +1,63 @@
+"""
+Management command that renders the PDFs of a day's approved application requests
+Run: python manage.py generate_documents [--date 2026-01-31 | --all] [--force] [--queue]
+
+Requests approved through the site already have a job queued each; this
+catches up on the rest (bulk imports, a worker that was down) in one batch.
+Requests whose PDF is stored are skipped unless --force is given.
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ERP_app import documents
+
+# Request ids per queued job with --queue
+JOB_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Render and store the PDFs of the application requests approved on a day (default: today)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', default=None,
+                            help='Review day as YYYY-MM-DD, in TIME_ZONE (default: today)')
+        parser.add_argument('--all', action='store_true',
+                            help='Every approved request, whatever its review day')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render requests whose PDF is already stored')
+        parser.add_argument('--queue', action='store_true',
+                            help='Queue generate_documents jobs for run_jobs instead of rendering here')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            day = None
+        elif options['date']:
+            try:
+                day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f'Invalid --date "{options["date"]}"; use YYYY-MM-DD')
+        else:
+            day = timezone.localdate()
+        applications = documents.approved(day=day)
+        label = 'all approved requests' if day is None else f'requests approved on {day}'
+
+        if options['queue']:
+            ids = list(applications.values_list('pk', flat=True))
+            for start in range(0, len(ids), JOB_CHUNK_SIZE):
+                documents.queue_generation(ids[start:start + JOB_CHUNK_SIZE], force=options['force'])
+            jobs_queued = -(-len(ids) // JOB_CHUNK_SIZE)
+            self.stdout.write(self.style.SUCCESS(f'Queued {jobs_queued} job(s) for {len(ids)} {label}'))
+            return
+
+        started = time.monotonic()
+        counts, errors = documents.generate_many(applications.iterator(chunk_size=200), force=options['force'])
+        elapsed = time.monotonic() - started
+        for pk, message in errors.items():
+            self.stderr.write(f'Request {pk}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{label.capitalize()}: {counts["rendered"]} rendered, {counts["unchanged"]} unchanged, '
+            f'{counts["skipped"]} already stored, {counts["failed"]} failed, in {elapsed:.2f}s'
+        ))
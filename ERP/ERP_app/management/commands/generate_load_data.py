@@ -0,0 +1,65 @@
+"""
+Management command to fill a database with synthetic university data for load testing
+Run: python manage.py generate_load_data --students 5000 --months 6
+
+Sizes can also come from a --scale preset (10k, 100k or 1m attendance rows).
+The same --seed and sizes always generate the same data. Point it at a
+scratch database; generated users are named load-* and a second run refuses
+to start while they exist.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ERP_app import loadgen
+
+# Attendance rows per preset; students are derived from the months and courses
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create schools, departments, students, attendance, placement drives and applications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES),
+                            help='Size students for about this many attendance records (overrides --students)')
+        parser.add_argument('--seed', type=int, help=f'Random seed (default: {loadgen.DEFAULTS["seed"]})')
+        parser.add_argument('--schools', type=int, help=f'Schools (default: {loadgen.DEFAULTS["schools"]})')
+        parser.add_argument('--departments-per-school', type=int,
+                            help=f'Departments per school (default: {loadgen.DEFAULTS["departments_per_school"]})')
+        parser.add_argument('--students', type=int, help=f'Students (default: {loadgen.DEFAULTS["students"]})')
+        parser.add_argument('--months', type=int,
+                            help=f'Months of weekday attendance up to today (default: {loadgen.DEFAULTS["months"]})')
+        parser.add_argument('--courses', type=int,
+                            help=f'Courses per year and section (default: {loadgen.DEFAULTS["courses"]})')
+        parser.add_argument('--drives', type=int, help=f'Placement drives (default: {loadgen.DEFAULTS["drives"]})')
+        parser.add_argument('--applications-per-drive', type=int,
+                            help=f'Applications per drive (default: {loadgen.DEFAULTS["applications_per_drive"]})')
+        parser.add_argument('--requests', type=int,
+                            help=f'Application requests (default: {loadgen.DEFAULTS["requests"]})')
+        parser.add_argument('--batch-size', type=int,
+                            help=f'Rows per INSERT batch (default: {loadgen.DEFAULTS["batch_size"]})')
+
+    def handle(self, *args, **options):
+        if loadgen.existing_load_data():
+            raise CommandError('Load data already exists (users named load-*); use a fresh database')
+
+        sizes = {key: options[key] for key in loadgen.DEFAULTS}
+        if options['scale']:
+            sizes['students'] = loadgen.students_for_rows(
+                SCALES[options['scale']],
+                sizes['months'] or loadgen.DEFAULTS['months'],
+                sizes['courses'] or loadgen.DEFAULTS['courses'],
+            )
+
+        started = time.monotonic()
+        with transaction.atomic():
+            result = loadgen.generate(log=lambda message: self.stdout.write(f'  {message}'), **sizes)
+
+        for table, count in result['counts'].items():
+            self.stdout.write(f'{table:24} {count:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(result["counts"].values())} rows in {time.monotonic() - started:.1f}s '
+            f'(seed {result["sizes"]["seed"]})'
+        ))
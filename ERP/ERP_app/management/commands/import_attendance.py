@@ -0,0 +1,70 @@
+"""
+Management command to bulk-import attendance from a CSV or JSON file
+Run: python manage.py import_attendance attendance.csv [--faculty <username>] [--batch-size 1000]
+
+CSV files need the columns enrollment_no, date, course, status and optionally
+faculty. JSON files hold a list of objects with the same keys.
+"""
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ERP_app.ingestion import AttendanceImportError, ingest_attendance
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import attendance records from a CSV or JSON file in one transaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file to import')
+        parser.add_argument('--format', choices=['csv', 'json'],
+                            help='File format (default: taken from the file extension)')
+        parser.add_argument('--faculty', help='Username of the faculty for rows without a faculty column')
+        parser.add_argument('--batch-size', type=int, help='Rows per INSERT (default: ATTENDANCE_IMPORT_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File not found: {path}')
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+
+        with path.open(newline='', encoding='utf-8') as f:
+            if file_format == 'csv':
+                rows = list(csv.DictReader(f))
+            elif file_format == 'json':
+                try:
+                    rows = json.load(f)
+                except ValueError as e:
+                    raise CommandError(f'Invalid JSON: {e}')
+                if not isinstance(rows, list):
+                    raise CommandError('A JSON file must hold a list of objects')
+            else:
+                raise CommandError('Unknown format, use --format csv or --format json')
+
+        faculty = None
+        if options['faculty']:
+            faculty = User.objects.filter(username=options['faculty']).first()
+            if faculty is None:
+                raise CommandError(f"Unknown faculty user: {options['faculty']}")
+
+        self.stdout.write(f'Importing {len(rows)} attendance rows from {path}...')
+        started = time.monotonic()
+        try:
+            result = ingest_attendance(
+                rows, default_faculty=faculty, batch_size=options['batch_size'], dry_run=options['dry_run'],
+            )
+        except AttendanceImportError as e:
+            for error in e.errors[:50]:
+                self.stderr.write(f"Row {error['row']} ({error['enrollment_no']}): {error['error']}")
+            raise CommandError(f'{e}, nothing imported')
+        elapsed = time.monotonic() - started
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['created']} records ({result['skipped']} already marked) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,26 @@
+"""
+Management command to re-match profile and course section school/department text to the structure
+Run: python manage.py link_profile_departments
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ERP_app import org_matching
+
+
+class Command(BaseCommand):
+    help = ('Re-match UserProfile and CourseSection school/department names to School and Department rows '
+            '(needed after bulk imports that skip signals)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        matcher = org_matching.OrgMatcher.from_database()
+        profiles, unmatched = org_matching.link_profiles(matcher=matcher)
+        sections = org_matching.link_course_sections(matcher=matcher)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Re-linked {profiles} profiles and {sections} course sections in {elapsed:.2f}s'
+        ))
+        for name, count in unmatched.most_common():
+            self.stdout.write(self.style.WARNING(f'No department matches "{name}" ({count} profile(s))'))
@@ -0,0 +1,26 @@
+"""
+Management command to rebuild the attendance rollup tables from AttendanceRecord
+Run: python manage.py rebuild_attendance_rollup
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ERP_app import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild AttendanceDailyRollup and AttendanceRosterEntry from the raw attendance records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk insert (default: 1000)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding attendance rollups...')
+        started = time.monotonic()
+        rollup_count, roster_count = rollups.rebuild(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rollup_count} rollup rows and {roster_count} roster entries in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,21 @@
+"""
+Management command to re-parse every drive's branches_allowed into the branch index
+Run: python manage.py rebuild_placement_branches
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ERP_app import eligibility
+
+
+class Command(BaseCommand):
+    help = 'Re-parse PlacementUpdate.branches_allowed into the department index (needed after adding departments)'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count, unmatched = eligibility.rebuild_branch_index()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Parsed {count} drives in {elapsed:.2f}s'))
+        for token, drives in unmatched.most_common():
+            self.stdout.write(self.style.WARNING(f'No department matches "{token}" ({drives} drive(s))'))
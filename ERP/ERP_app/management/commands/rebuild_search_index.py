@@ -0,0 +1,24 @@
+"""
+Management command to rebuild the admin search index from UserProfile
+Run: python manage.py rebuild_search_index
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ERP_app import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SearchEntry index used by the admin search (needed after bulk profile imports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per bulk insert (default: 1000)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Rebuilding admin search index ({search.get_backend()} backend)...')
+        started = time.monotonic()
+        count = search.rebuild(batch_size=options['batch_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} entries in {elapsed:.2f}s'))
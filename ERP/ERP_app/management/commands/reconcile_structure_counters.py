@@ -0,0 +1,33 @@
+"""
+Management command to recount the School and Department counter columns and repair drift
+Run: python manage.py reconcile_structure_counters [--dry-run]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ERP_app import counters
+
+
+class Command(BaseCommand):
+    help = 'Recount School/Department department, program, faculty and student counters and fix any that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        report = counters.reconcile(dry_run=options['dry_run'])
+        elapsed = time.monotonic() - started
+
+        drifted = 0
+        for model, rows in report.items():
+            for pk, field, stored, live in rows:
+                self.stdout.write(self.style.WARNING(f'{model} {pk}: {field} was {stored}, counted {live}'))
+            drifted += len(rows)
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(f'All counters correct ({elapsed:.2f}s)'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{drifted} counter(s) drifted; nothing fixed (dry run)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {drifted} counter(s) in {elapsed:.2f}s'))
@@ -0,0 +1,59 @@
+"""
+Management command that runs queued background jobs (placement uploads, ...)
+Run: python manage.py run_jobs [--once] [--sleep 2]
+
+Start one or more of these next to the web workers. With --once it drains
+the queue and exits, which suits a cron entry.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ERP_app import jobs
+from ERP_app.models import BackgroundJob
+
+
+class Command(BaseCommand):
+    help = 'Claim and run queued BackgroundJob rows until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait between polls of an empty queue (default: 2)')
+        parser.add_argument('--max-jobs', type=int, default=0,
+                            help='Exit after this many jobs (default: no limit)')
+        parser.add_argument('--worker-id', default=None,
+                            help='Name recorded on claimed jobs (default: host:pid)')
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or jobs.default_worker_id()
+        self.stdout.write(f'Worker {worker_id} started')
+        processed = 0
+
+        try:
+            while not options['max_jobs'] or processed < options['max_jobs']:
+                requeued = jobs.requeue_stale()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Re-queued {requeued} stale job(s)'))
+
+                job = jobs.claim_next(worker_id)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                started = time.monotonic()
+                job = jobs.run_job(job)
+                elapsed = time.monotonic() - started
+                processed += 1
+                line = f'{job} attempt {job.attempts} in {elapsed:.2f}s'
+                if job.status == BackgroundJob.SUCCEEDED:
+                    self.stdout.write(self.style.SUCCESS(line))
+                else:
+                    self.stdout.write(self.style.ERROR(f'{line}: {job.error}'))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(f'Worker {worker_id} stopped after {processed} job(s)')
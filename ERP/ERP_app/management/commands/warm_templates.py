@@ -0,0 +1,33 @@
+"""
+Management command to precompile the portal templates and report how long it took
+Run: python manage.py warm_templates
+"""
+from django.core.management.base import BaseCommand
+
+from ERP_app import template_warmup
+
+
+class Command(BaseCommand):
+    help = 'Compile every template in AVAILABLE_TEMPLATES and report per-template timings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('templates', nargs='*',
+                            help='Pages or template names to compile (default: all portal pages)')
+        parser.add_argument('--top', type=int, default=10,
+                            help='How many of the slowest templates to list (default: 10)')
+
+    def handle(self, *args, **options):
+        names = [name if name.endswith('.html') else f'{name}.html' for name in options['templates']]
+        timings, total = template_warmup.warm_up(names or None)
+
+        for name, seconds, error in timings:
+            if error:
+                self.stdout.write(self.style.WARNING(f'{name}: {error}'))
+
+        self.stdout.write(f"{'template':45} {'ms':>8}")
+        for name, seconds, error in sorted(timings, key=lambda t: -t[1])[:options['top']]:
+            if not error:
+                self.stdout.write(f'{name:45} {seconds * 1000:8.1f}')
+
+        compiled = sum(1 for _, _, error in timings if not error)
+        self.stdout.write(self.style.SUCCESS(f'Compiled {compiled} templates in {total * 1000:.1f} ms'))
@@ -0,0 +1,58 @@
+# The attendance rollup tables. Kept out of 0001_initial so that 0001 matches
+# the baseline schema exactly and `migrate --fake-initial` can fake it on an
+# existing database.
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ERP_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRosterEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('school', models.CharField(max_length=100)),
+                ('department', models.CharField(max_length=100)),
+                ('year', models.IntegerField()),
+                ('section', models.CharField(max_length=10)),
+                ('course', models.CharField(max_length=100)),
+                ('faculty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_roster_faculty', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_roster_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Attendance roster entries',
+                'unique_together': {('school', 'department', 'year', 'section', 'course', 'faculty', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('school', models.CharField(max_length=100)),
+                ('department', models.CharField(max_length=100)),
+                ('year', models.IntegerField()),
+                ('section', models.CharField(max_length=10)),
+                ('course', models.CharField(max_length=100)),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('faculty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['school', 'date'], name='ERP_app_att_school_813d6e_idx'), models.Index(fields=['department', 'date'], name='ERP_app_att_departm_64abe0_idx')],
+                'unique_together': {('date', 'school', 'department', 'year', 'section', 'course', 'faculty')},
+            },
+        ),
+    ]
@@ -0,0 +1,255 @@
+# The baseline schema, which had no migrations. Existing databases take it
+# with `migrate --fake-initial`; the attendance rollup tables come in 0001_attendance_rollups.
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoverningBody',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('body_type', models.CharField(choices=[('chancellor', 'Chancellor'), ('vice_chancellor', 'Vice-Chancellor'), ('registrar', 'Registrar'), ('dean', 'Dean')], max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('designation', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('icon', models.CharField(default='bi-person-badge', max_length=50)),
+                ('color', models.CharField(default='primary', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Governing Bodies',
+                'ordering': ['body_type', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollment_no', models.CharField(blank=True, max_length=50, null=True, unique=True)),
+                ('contact_no', models.CharField(blank=True, max_length=15, null=True)),
+                ('department', models.CharField(blank=True, max_length=100, null=True)),
+                ('school', models.CharField(blank=True, max_length=100, null=True)),
+                ('year', models.IntegerField(blank=True, null=True)),
+                ('section', models.CharField(blank=True, max_length=10, null=True)),
+                ('role', models.CharField(choices=[('admin', 'Admin'), ('dean', 'Dean'), ('hod', 'HOD'), ('faculty', 'Faculty'), ('crc', 'CRC'), ('student', 'Student')], default='student', max_length=50)),
+                ('college_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SupportCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_type', models.CharField(choices=[('alumni', 'Alumni Relations'), ('anti_ragging', 'Anti-Ragging'), ('cultural', 'Cultural Committee'), ('disciplinary', 'Disciplinary Committee'), ('iqac', 'IQAC'), ('nss_ncc', 'NSS/NCC'), ('sports', 'Sports Committee'), ('womens', "Women's Cell")], max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('coordinator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cells_as_coordinator', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['cell_type', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='School',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('short_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('icon', models.CharField(default='bi-building', max_length=50)),
+                ('color', models.CharField(default='primary', max_length=20)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dean', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='schools_as_dean', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlacementUpdate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('company_name', models.CharField(max_length=200)),
+                ('role', models.CharField(max_length=200)),
+                ('package', models.DecimalField(decimal_places=2, help_text='CTC in LPA', max_digits=10)),
+                ('eligibility_cgpa', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)])),
+                ('branches_allowed', models.CharField(help_text='Comma-separated list of branches', max_length=500)),
+                ('last_date', models.DateField()),
+                ('drive_date', models.DateField()),
+                ('job_location', models.CharField(max_length=200)),
+                ('mode', models.CharField(choices=[('on-campus', 'On-campus'), ('off-campus', 'Off-campus')], default='on-campus', max_length=20)),
+                ('description', models.TextField()),
+                ('job_description_file', models.FileField(blank=True, null=True, upload_to='placement_jds/')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('approved_at', models.DateTimeField(blank=True, null=True)),
+                ('approved_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='placement_updates_approved', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='placement_updates_created', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('short_name', models.CharField(blank=True, max_length=50, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hod', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='departments_as_hod', to=settings.AUTH_USER_MODEL)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='departments', to='ERP_app.school')),
+            ],
+            options={
+                'ordering': ['school', 'name'],
+                'unique_together': {('school', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AcademicSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section_type', models.CharField(choices=[('examination', 'Examination Cell'), ('admission', 'Admission Cell'), ('placement', 'Training & Placement Cell'), ('library', 'Library'), ('research', 'Research & Development Cell'), ('sports', 'Sports & Cultural Cell'), ('hostel', 'Hostel Management'), ('finance', 'Finance & Accounts'), ('hr', 'Human Resource Department (HR)')], max_length=50)),
+                ('name', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('incharge', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sections_as_incharge', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['section_type', 'name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Program',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('degree_type', models.CharField(choices=[('bachelor', 'Bachelor'), ('master', 'Master'), ('phd', 'PhD'), ('diploma', 'Diploma'), ('certificate', 'Certificate')], max_length=50)),
+                ('duration_years', models.IntegerField(default=4)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='programs', to='ERP_app.department')),
+            ],
+            options={
+                'ordering': ['department', 'degree_type', 'name'],
+                'unique_together': {('department', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PlacementApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollment_no', models.CharField(max_length=50)),
+                ('student_name', models.CharField(max_length=100)),
+                ('department', models.CharField(max_length=100)),
+                ('cgpa', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('resume', models.FileField(blank=True, null=True, upload_to='placement_resumes/')),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('shortlisted', 'Shortlisted'), ('rejected', 'Rejected'), ('selected', 'Selected')], default='applied', max_length=20)),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('placement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='applications', to='ERP_app.placementupdate')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='placement_applications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-applied_at'],
+                'unique_together': {('placement', 'student')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FacultyMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.CharField(choices=[('hod', 'HOD (Head of Department)'), ('professor', 'Professor'), ('associate_professor', 'Associate Professor'), ('assistant_professor', 'Assistant Professor'), ('lecturer', 'Lecturer'), ('lab_incharge', 'Senior Lab Incharge'), ('curriculum_incharge', 'Faculty Incharge of Curriculum/Exams'), ('teaching_assistant', 'Teaching Assistant/Mentor'), ('lab_assistant', 'Lab Assistant/Tech Staff')], max_length=50)),
+                ('specialization', models.CharField(blank=True, max_length=200, null=True)),
+                ('qualification', models.CharField(blank=True, max_length=200, null=True)),
+                ('experience_years', models.IntegerField(default=0)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('phone', models.CharField(blank=True, max_length=15, null=True)),
+                ('office_room', models.CharField(blank=True, max_length=50, null=True)),
+                ('bio', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('joined_date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='faculty_members', to='ERP_app.department')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='faculty_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['department', 'rank', 'user__last_name'],
+                'unique_together': {('user', 'department')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollment_no', models.CharField(max_length=50)),
+                ('student_name', models.CharField(max_length=100)),
+                ('department', models.CharField(max_length=100)),
+                ('school', models.CharField(max_length=100)),
+                ('year', models.IntegerField()),
+                ('section', models.CharField(max_length=10)),
+                ('course', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late')], default='absent', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('faculty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='faculty_attendance', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', 'student_name'],
+                'indexes': [models.Index(fields=['enrollment_no', 'date'], name='ERP_app_att_enrollm_69a42b_idx'), models.Index(fields=['department', 'date'], name='ERP_app_att_departm_1683d4_idx'), models.Index(fields=['school', 'date'], name='ERP_app_att_school_b14370_idx'), models.Index(fields=['year', 'section'], name='ERP_app_att_year_b2fa7e_idx'), models.Index(fields=['course', 'date'], name='ERP_app_att_course_4ac408_idx'), models.Index(fields=['faculty', 'date'], name='ERP_app_att_faculty_c3be3a_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ApplicationRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('application_type', models.CharField(choices=[('leave', 'Leave Application'), ('bonafide', 'Bonafide Certificate Request'), ('character', 'HR / Character Certificate Request'), ('attendance_report', 'Attendance Report Request'), ('marksheet', 'Marksheet / Transcript Request'), ('event_permission', 'Event Participation Permission'), ('internship_letter', 'Internship Letter Request'), ('fee_receipt', 'Fee Receipt/Scholarship Application'), ('bus_hostel', 'Bus/Hostel Application'), ('id_card', 'IT/ID Card Reissue Request')], max_length=50)),
+                ('student_name', models.CharField(max_length=100)),
+                ('enrollment_no', models.CharField(max_length=50)),
+                ('department', models.CharField(max_length=100)),
+                ('course', models.CharField(blank=True, max_length=100, null=True)),
+                ('semester', models.CharField(blank=True, max_length=20, null=True)),
+                ('mobile', models.CharField(max_length=15)),
+                ('email', models.EmailField(max_length=254)),
+                ('reason', models.CharField(max_length=200)),
+                ('custom_reason', models.TextField(blank=True, null=True)),
+                ('from_date', models.DateField(blank=True, null=True)),
+                ('to_date', models.DateField(blank=True, null=True)),
+                ('extra_note', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('in_process', 'In Process')], default='pending', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('admin_notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_applications', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['student', 'application_type'], name='ERP_app_app_student_b13878_idx'), models.Index(fields=['status', 'created_at'], name='ERP_app_app_status_ee9f81_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Adds the compact attendance columns next to the old denormalized ones;
+# 0003 backfills them and 0004 drops the old columns.
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0001_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('school_name', models.CharField(max_length=100)),
+                ('department_name', models.CharField(max_length=100)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('section', models.CharField(max_length=10)),
+                ('course', models.CharField(max_length=100)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='course_sections', to='ERP_app.department')),
+                ('program', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='course_sections', to='ERP_app.program')),
+                ('school', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='course_sections', to='ERP_app.school')),
+            ],
+            options={
+                'ordering': ['school_name', 'department_name', 'year', 'section', 'course'],
+                'indexes': [models.Index(fields=['department_name', 'year', 'section'], name='ERP_app_cou_departm_e7dfe3_idx'), models.Index(fields=['course'], name='ERP_app_cou_course_aac41e_idx')],
+                'unique_together': {('school_name', 'department_name', 'year', 'section', 'course')},
+            },
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='course_section',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attendance_records', to='ERP_app.coursesection'),
+        ),
+        migrations.AddField(
+            model_name='attendancerecord',
+            name='status_code',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Present'), (2, 'Absent'), (3, 'Late')], default=2),
+        ),
+    ]
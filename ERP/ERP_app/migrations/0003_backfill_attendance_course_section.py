@@ -0,0 +1,115 @@
+# Data migration: moves the denormalized AttendanceRecord columns into
+# CourseSection / UserProfile / User and the small-integer status code.
+
+from django.db import migrations
+
+STATUS_CODES = {'present': 1, 'absent': 2, 'late': 3}
+
+DIMENSION_FIELDS = ('school', 'department', 'year', 'section', 'course')
+
+
+def backfill(apps, schema_editor):
+    AttendanceRecord = apps.get_model('ERP_app', 'AttendanceRecord')
+    CourseSection = apps.get_model('ERP_app', 'CourseSection')
+    School = apps.get_model('ERP_app', 'School')
+    Department = apps.get_model('ERP_app', 'Department')
+    UserProfile = apps.get_model('ERP_app', 'UserProfile')
+    User = apps.get_model('auth', 'User')
+
+    # 1. One CourseSection per distinct school/department/year/section/course
+    schools = {school.name.lower(): school.id for school in School.objects.all()}
+    departments = {}
+    for dept in Department.objects.order_by('id'):
+        departments.setdefault((dept.school_id, dept.name.lower()), dept.id)
+        departments.setdefault((None, dept.name.lower()), dept.id)
+
+    dimensions = AttendanceRecord.objects.order_by().values_list(*DIMENSION_FIELDS).distinct()
+    for school_name, department_name, year, section, course in dimensions:
+        school_id = schools.get(school_name.lower())
+        department_id = departments.get((school_id, department_name.lower()), departments.get((None, department_name.lower())))
+        course_section, _ = CourseSection.objects.get_or_create(
+            school_name=school_name,
+            department_name=department_name,
+            year=year,
+            section=section,
+            course=course,
+            defaults={'school_id': school_id, 'department_id': department_id},
+        )
+        AttendanceRecord.objects.filter(
+            school=school_name, department=department_name, year=year, section=section, course=course,
+        ).update(course_section=course_section)
+
+    # 2. Status names -> codes
+    for name, code in STATUS_CODES.items():
+        AttendanceRecord.objects.filter(status=name).update(status_code=code)
+
+    # 3. Keep each student's enrollment number and name, now read from UserProfile / User
+    seen = set()
+    students = AttendanceRecord.objects.order_by('student_id', '-date').values_list(
+        'student_id', 'enrollment_no', 'student_name', 'department', 'school', 'year', 'section',
+    )
+    for student_id, enrollment_no, student_name, department, school, year, section in students.iterator():
+        if student_id in seen:
+            continue
+        seen.add(student_id)
+
+        profile = UserProfile.objects.filter(user_id=student_id).first()
+        enrollment_taken = UserProfile.objects.filter(enrollment_no=enrollment_no).exclude(user_id=student_id).exists()
+        if profile is None:
+            UserProfile.objects.create(
+                user_id=student_id,
+                enrollment_no=None if enrollment_taken else enrollment_no,
+                department=department,
+                school=school,
+                year=year,
+                section=section,
+                role='student',
+            )
+        elif not profile.enrollment_no and not enrollment_taken:
+            profile.enrollment_no = enrollment_no
+            profile.save(update_fields=['enrollment_no'])
+
+        user = User.objects.get(pk=student_id)
+        if not user.first_name and not user.last_name and student_name:
+            first_name, _, last_name = student_name.partition(' ')
+            user.first_name = first_name[:150]
+            user.last_name = last_name[:150]
+            user.save(update_fields=['first_name', 'last_name'])
+
+
+def restore(apps, schema_editor):
+    AttendanceRecord = apps.get_model('ERP_app', 'AttendanceRecord')
+    CourseSection = apps.get_model('ERP_app', 'CourseSection')
+    UserProfile = apps.get_model('ERP_app', 'UserProfile')
+    User = apps.get_model('auth', 'User')
+
+    for course_section in CourseSection.objects.all():
+        AttendanceRecord.objects.filter(course_section=course_section).update(
+            school=course_section.school_name,
+            department=course_section.department_name,
+            year=course_section.year,
+            section=course_section.section,
+            course=course_section.course,
+        )
+
+    for name, code in STATUS_CODES.items():
+        AttendanceRecord.objects.filter(status_code=code).update(status=name)
+
+    student_ids = AttendanceRecord.objects.order_by().values_list('student_id', flat=True).distinct()
+    for user in User.objects.filter(pk__in=student_ids):
+        profile = UserProfile.objects.filter(user_id=user.pk).first()
+        AttendanceRecord.objects.filter(student_id=user.pk).update(
+            enrollment_no=(profile.enrollment_no if profile else None) or '',
+            student_name=f'{user.first_name} {user.last_name}'.strip() or user.username,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0002_coursesection_attendance_compact_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore),
+    ]
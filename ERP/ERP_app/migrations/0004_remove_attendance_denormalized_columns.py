@@ -0,0 +1,102 @@
+# Drops the denormalized AttendanceRecord columns backfilled by 0003 and
+# re-keys the rollup tables on CourseSection (rebuilt by 0005).
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ERP_app', '0003_backfill_attendance_course_section'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(model_name='attendancerecord', name='ERP_app_att_enrollm_69a42b_idx'),
+        migrations.RemoveIndex(model_name='attendancerecord', name='ERP_app_att_departm_1683d4_idx'),
+        migrations.RemoveIndex(model_name='attendancerecord', name='ERP_app_att_school_b14370_idx'),
+        migrations.RemoveIndex(model_name='attendancerecord', name='ERP_app_att_year_b2fa7e_idx'),
+        migrations.RemoveIndex(model_name='attendancerecord', name='ERP_app_att_course_4ac408_idx'),
+        migrations.AlterModelOptions(
+            name='attendancerecord',
+            options={'ordering': ['-date']},
+        ),
+        # Defaults only so that unapplying can re-add the columns before 0003 refills them
+        migrations.AlterField(model_name='attendancerecord', name='enrollment_no', field=models.CharField(default='', max_length=50)),
+        migrations.AlterField(model_name='attendancerecord', name='student_name', field=models.CharField(default='', max_length=100)),
+        migrations.AlterField(model_name='attendancerecord', name='department', field=models.CharField(default='', max_length=100)),
+        migrations.AlterField(model_name='attendancerecord', name='school', field=models.CharField(default='', max_length=100)),
+        migrations.AlterField(model_name='attendancerecord', name='year', field=models.IntegerField(default=0)),
+        migrations.AlterField(model_name='attendancerecord', name='section', field=models.CharField(default='', max_length=10)),
+        migrations.AlterField(model_name='attendancerecord', name='course', field=models.CharField(default='', max_length=100)),
+        migrations.RemoveField(model_name='attendancerecord', name='enrollment_no'),
+        migrations.RemoveField(model_name='attendancerecord', name='student_name'),
+        migrations.RemoveField(model_name='attendancerecord', name='department'),
+        migrations.RemoveField(model_name='attendancerecord', name='school'),
+        migrations.RemoveField(model_name='attendancerecord', name='year'),
+        migrations.RemoveField(model_name='attendancerecord', name='section'),
+        migrations.RemoveField(model_name='attendancerecord', name='course'),
+        migrations.RemoveField(model_name='attendancerecord', name='status'),
+        migrations.RenameField(model_name='attendancerecord', old_name='status_code', new_name='status'),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='course_section',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='attendance_records', to='ERP_app.coursesection'),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='student',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='faculty',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='faculty_attendance', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', 'date'], name='ERP_app_att_student_eb8951_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['course_section', 'date'], name='ERP_app_att_course__86a67c_idx'),
+        ),
+
+        # Rollups are derived data: recreate them keyed on CourseSection
+        migrations.DeleteModel(name='AttendanceDailyRollup'),
+        migrations.DeleteModel(name='AttendanceRosterEntry'),
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('absent_count', models.PositiveIntegerField(default=0)),
+                ('late_count', models.PositiveIntegerField(default=0)),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='ERP_app.coursesection')),
+                ('faculty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['course_section', 'date'], name='ERP_app_att_course__35dcde_idx')],
+                'unique_together': {('date', 'course_section', 'faculty')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceRosterEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roster_entries', to='ERP_app.coursesection')),
+                ('faculty', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendance_roster_faculty', to=settings.AUTH_USER_MODEL)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_roster_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Attendance roster entries',
+                'unique_together': {('course_section', 'faculty', 'student')},
+            },
+        ),
+    ]
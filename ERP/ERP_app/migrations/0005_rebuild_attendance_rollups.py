@@ -0,0 +1,36 @@
+# Refills the rollup tables recreated by 0004 from the compact attendance rows.
+
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+def rebuild_rollups(apps, schema_editor):
+    AttendanceRecord = apps.get_model('ERP_app', 'AttendanceRecord')
+    AttendanceDailyRollup = apps.get_model('ERP_app', 'AttendanceDailyRollup')
+    AttendanceRosterEntry = apps.get_model('ERP_app', 'AttendanceRosterEntry')
+
+    groups = AttendanceRecord.objects.order_by().values('date', 'course_section_id', 'faculty_id').annotate(
+        present_count=Count('id', filter=Q(status=1)),
+        absent_count=Count('id', filter=Q(status=2)),
+        late_count=Count('id', filter=Q(status=3)),
+        total_count=Count('id'),
+    )
+    AttendanceDailyRollup.objects.bulk_create(
+        (AttendanceDailyRollup(**row) for row in groups.iterator()), batch_size=1000,
+    )
+
+    entries = AttendanceRecord.objects.order_by().values('course_section_id', 'faculty_id', 'student_id').distinct()
+    AttendanceRosterEntry.objects.bulk_create(
+        (AttendanceRosterEntry(**row) for row in entries.iterator()), batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0004_remove_attendance_denormalized_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+    ]
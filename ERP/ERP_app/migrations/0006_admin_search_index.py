@@ -0,0 +1,161 @@
+# Admin search index: SearchEntry plus the backend-specific full-text
+# structure (SQLite FTS5 trigram table kept in sync by triggers, or a
+# PostgreSQL pg_trgm GIN index), filled from the existing profiles.
+
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of ERP_app.search as of this migration, so later changes to
+# the live index code do not change what this migration creates
+FTS_TABLE = 'ERP_app_searchentry_fts'
+ENTRY_TABLE = 'ERP_app_searchentry'
+
+MATCH_FIELDS = {
+    'student': ['enrollment_no', 'name', 'contact'],
+    'hod': ['name', 'department'],
+}
+
+
+def normalize(value):
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return ' '.join(value.lower().split())
+
+
+def build_entries(profile):
+    """SearchEntry field dicts for a UserProfile row plus first_name and last_name"""
+    entries = []
+    name = f"{profile.get('first_name') or ''} {profile.get('last_name') or ''}"
+    role = profile.get('role')
+
+    if role == 'student':
+        payload = {
+            'enrollment_no': profile.get('enrollment_no'),
+            'name': name,
+            'contact': profile.get('contact_no'),
+            'department': profile.get('department'),
+        }
+    elif role == 'hod':
+        payload = {
+            'name': name,
+            'department': profile.get('department'),
+            'contact': profile.get('contact_no'),
+        }
+    else:
+        payload = None
+    if payload is not None:
+        entries.append({
+            'kind': role,
+            'key': str(profile['id']),
+            'profile_id': profile['id'],
+            'code': normalize(profile.get('enrollment_no')) if role == 'student' else '',
+            'document': normalize(' '.join(str(payload[f] or '') for f in MATCH_FIELDS[role])),
+            'payload': payload,
+        })
+
+    if profile.get('department'):
+        entries.append({
+            'kind': 'department',
+            'key': f"{profile['department']}\x1f{profile.get('school') or ''}",
+            'profile_id': None,
+            'code': '',
+            'document': normalize(profile['department']),
+            'payload': {'department': profile['department'], 'school': profile.get('school')},
+        })
+    if profile.get('college_name'):
+        entries.append({
+            'kind': 'college',
+            'key': profile['college_name'],
+            'profile_id': None,
+            'code': '',
+            'document': normalize(profile['college_name']),
+            'payload': {'college_name': profile['college_name']},
+        })
+    return entries
+
+SQLITE_FORWARD = [
+    f"CREATE VIRTUAL TABLE \"{FTS_TABLE}\" USING fts5("
+    f"document, content='{ENTRY_TABLE}', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER \"{FTS_TABLE}_ai\" AFTER INSERT ON \"{ENTRY_TABLE}\" BEGIN "
+    f"INSERT INTO \"{FTS_TABLE}\"(rowid, document) VALUES (new.id, new.document); END",
+    f"CREATE TRIGGER \"{FTS_TABLE}_ad\" AFTER DELETE ON \"{ENTRY_TABLE}\" BEGIN "
+    f"INSERT INTO \"{FTS_TABLE}\"(\"{FTS_TABLE}\", rowid, document) VALUES ('delete', old.id, old.document); END",
+    f"CREATE TRIGGER \"{FTS_TABLE}_au\" AFTER UPDATE ON \"{ENTRY_TABLE}\" BEGIN "
+    f"INSERT INTO \"{FTS_TABLE}\"(\"{FTS_TABLE}\", rowid, document) VALUES ('delete', old.id, old.document); "
+    f"INSERT INTO \"{FTS_TABLE}\"(rowid, document) VALUES (new.id, new.document); END",
+]
+
+SQLITE_BACKWARD = [
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_au"',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+]
+
+POSTGRESQL_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX "searchentry_document_trgm" ON "{ENTRY_TABLE}" USING gin (document gin_trgm_ops)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS "searchentry_document_trgm"',
+]
+
+
+def _run(schema_editor, statements_by_vendor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_backend(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD})
+
+
+def drop_search_backend(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD})
+
+
+def populate_search_entries(apps, schema_editor):
+    UserProfile = apps.get_model('ERP_app', 'UserProfile')
+    SearchEntry = apps.get_model('ERP_app', 'SearchEntry')
+
+    entries = {}
+    rows = UserProfile.objects.order_by('pk').values(
+        'id', 'enrollment_no', 'contact_no', 'department', 'school', 'role', 'college_name',
+        first_name=models.F('user__first_name'), last_name=models.F('user__last_name'),
+    )
+    for row in rows.iterator():
+        for entry in build_entries(row):
+            entries.setdefault((entry['kind'], entry['key']), entry)
+    SearchEntry.objects.bulk_create((SearchEntry(**entry) for entry in entries.values()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0005_rebuild_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('student', 'Student'), ('hod', 'HOD'), ('department', 'Department'), ('college', 'College')], max_length=20)),
+                ('key', models.CharField(max_length=255)),
+                ('code', models.CharField(blank=True, default='', max_length=50)),
+                ('document', models.TextField()),
+                ('payload', models.JSONField(default=dict)),
+                ('profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='ERP_app.userprofile')),
+            ],
+            options={
+                'verbose_name_plural': 'Search entries',
+                'unique_together': {('kind', 'key')},
+                'indexes': [models.Index(fields=['code'], name='ERP_app_sea_code_e7ece3_idx')],
+            },
+        ),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+        migrations.RunPython(populate_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Placement eligibility: the parsed branch index on PlacementUpdate and a
+# CGPA on UserProfile. Existing drives are parsed here; students start with
+# the CGPA of their latest placement application, where they have one.
+
+import re
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Frozen copy of the branch parser in ERP_app.eligibility as of this
+# migration; later changes to branch parsing come in their own migrations
+ALL_BRANCHES = {'all', 'all branches', 'all departments', 'any', 'any branch', 'open to all'}
+BRANCH_SEPARATORS = re.compile(r'[,;/|\n]+')
+
+
+def normalize_branch(value):
+    return ' '.join((value or '').lower().replace('.', '').split())
+
+
+def parse_branches(text, lookup):
+    """(department ids, all_branches) for a branches_allowed value"""
+    dept_ids, all_branches = set(), False
+    for part in BRANCH_SEPARATORS.split(text or ''):
+        token = normalize_branch(part)
+        if token in ALL_BRANCHES:
+            all_branches = True
+        elif token in lookup:
+            dept_ids.add(lookup[token])
+    return dept_ids, all_branches
+
+
+def backfill_branches(apps, schema_editor):
+    Department = apps.get_model('ERP_app', 'Department')
+    PlacementUpdate = apps.get_model('ERP_app', 'PlacementUpdate')
+    Through = PlacementUpdate.branches.through
+
+    # Normalized department name and short name -> Department id
+    lookup = {}
+    for dept_id, name, short_name in Department.objects.values_list('id', 'name', 'short_name'):
+        for key in (normalize_branch(name), normalize_branch(short_name)):
+            if key:
+                lookup.setdefault(key, dept_id)
+
+    rows = []
+    for drive in PlacementUpdate.objects.only('id', 'branches_allowed'):
+        dept_ids, all_branches = parse_branches(drive.branches_allowed, lookup)
+        if all_branches:
+            PlacementUpdate.objects.filter(pk=drive.pk).update(all_branches=True)
+        rows.extend(Through(placementupdate_id=drive.pk, department_id=dept_id) for dept_id in dept_ids)
+    Through.objects.bulk_create(rows, batch_size=1000)
+
+
+def backfill_cgpa(apps, schema_editor):
+    UserProfile = apps.get_model('ERP_app', 'UserProfile')
+    PlacementApplication = apps.get_model('ERP_app', 'PlacementApplication')
+    latest = PlacementApplication.objects.filter(
+        student_id=OuterRef('user_id'), cgpa__isnull=False,
+    ).order_by('-applied_at').values('cgpa')[:1]
+    UserProfile.objects.filter(
+        cgpa__isnull=True, user__placement_applications__cgpa__isnull=False,
+    ).update(cgpa=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0007_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='placementupdate',
+            name='all_branches',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='placementupdate',
+            name='branches',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='placement_drives', to='ERP_app.department'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='cgpa',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)]),
+        ),
+        migrations.AddIndex(
+            model_name='placementupdate',
+            index=models.Index(fields=['status', 'last_date'], name='ERP_app_pla_status_045314_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role', 'cgpa'], name='ERP_app_use_role_877acc_idx'),
+        ),
+        migrations.RunPython(backfill_branches, migrations.RunPython.noop),
+        migrations.RunPython(backfill_cgpa, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Composite indexes behind the keyset pagination of the CRC company list
+# and of a drive's applications (see ERP_app/pagination.py).
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0008_placement_eligibility'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='placementapplication',
+            index=models.Index(fields=['placement', 'applied_at', 'id'], name='ERP_app_pla_placeme_3dd058_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='placementupdate',
+            index=models.Index(fields=['created_at', 'id'], name='ERP_app_pla_created_da7582_idx'),
+        ),
+    ]
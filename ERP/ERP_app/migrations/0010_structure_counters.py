@@ -0,0 +1,71 @@
+# Denormalized School and Department counters (see ERP_app/counters.py),
+# filled in from the existing rows, plus an index on UserProfile.department
+# for recounting students by department name.
+
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def subquery_count(queryset):
+    """COUNT(*) of a correlated queryset of historical models; 0 when empty"""
+    counted = queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    return Coalesce(Subquery(counted, output_field=models.IntegerField()), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    School = apps.get_model('ERP_app', 'School')
+    Department = apps.get_model('ERP_app', 'Department')
+    Program = apps.get_model('ERP_app', 'Program')
+    FacultyMember = apps.get_model('ERP_app', 'FacultyMember')
+    UserProfile = apps.get_model('ERP_app', 'UserProfile')
+
+    School.objects.update(
+        department_count=subquery_count(Department.objects.filter(school=OuterRef('pk'))),
+        program_count=subquery_count(Program.objects.filter(department__school=OuterRef('pk'))),
+    )
+    Department.objects.update(
+        program_count=subquery_count(Program.objects.filter(department=OuterRef('pk'))),
+        faculty_count=subquery_count(FacultyMember.objects.filter(department=OuterRef('pk'))),
+        student_count=subquery_count(UserProfile.objects.filter(department=OuterRef('name'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0009_placement_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='faculty_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='program_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='student_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='department_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='school',
+            name='program_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['department'], name='ERP_app_use_departm_e4edd5_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
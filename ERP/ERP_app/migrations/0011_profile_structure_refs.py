@@ -0,0 +1,153 @@
+# UserProfile.school_ref / department_ref / program_ref, filled in by fuzzy
+# matching the existing school and department text (see ERP_app/org_matching.py);
+# course sections the exact-name backfill in 0003 left unlinked are matched the
+# same way. Department.student_count is recounted by the new key, which replaces
+# the department-name index. Profiles carry no program text, so program_ref
+# starts empty.
+
+import difflib
+import re
+
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# Frozen copy of the matching rules in ERP_app.org_matching as of this
+# migration, so later changes to the live matcher do not change this backfill
+FUZZY_CUTOFF = 0.85
+
+PARENTHESIZED = re.compile(r'\s*\(([^)]*)\)\s*$')
+PREFIXES = ('department of ', 'school of ', 'faculty of ')
+PUNCTUATION = re.compile(r'[^\w\s]')
+ABBREVIATIONS = {'dept': 'department', 'engg': 'engineering', 'mgmt': 'management'}
+
+
+def normalize_name(value):
+    words = PUNCTUATION.sub(' ', (value or '').lower().replace('.', '')).split()
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words if word != 'and')
+
+
+def strip_prefix(key):
+    for prefix in PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):]
+    return key
+
+
+def name_keys(name, short_name=None):
+    variants = [name, short_name]
+    match = PARENTHESIZED.search(name or '')
+    if match:
+        variants += [name[:match.start()], match.group(1)]
+    keys = []
+    for variant in variants:
+        key = normalize_name(variant)
+        for candidate in (key, strip_prefix(key)):
+            if candidate and candidate not in keys:
+                keys.append(candidate)
+    return keys
+
+
+class OrgMatcher:
+    """Text -> School / Department ids; see ERP_app.org_matching.OrgMatcher"""
+
+    def __init__(self, schools, departments):
+        self.schools = {}
+        for school_id, name, short_name in sorted(schools):
+            for key in name_keys(name, short_name):
+                self.schools.setdefault(key, [school_id])
+        self.departments = {}
+        self.school_of = {}
+        for dept_id, school_id, name, short_name in sorted(departments):
+            self.school_of[dept_id] = school_id
+            for key in name_keys(name, short_name):
+                self.departments.setdefault(key, []).append(dept_id)
+
+    def lookup(self, index, text):
+        key = normalize_name(text)
+        if not key:
+            return []
+        for candidate in (key, strip_prefix(key)):
+            if candidate in index:
+                return index[candidate]
+        close = difflib.get_close_matches(key, index.keys(), n=1, cutoff=FUZZY_CUTOFF)
+        return index[close[0]] if close else []
+
+    def link(self, department, school):
+        """(department id, school id) for a department and school typed as text"""
+        school_ids = self.lookup(self.schools, school)
+        school_id = school_ids[0] if school_ids else None
+        dept_ids = self.lookup(self.departments, department)
+        dept_id = next((pk for pk in dept_ids if self.school_of[pk] == school_id), dept_ids[0]) if dept_ids else None
+        if school_id is None and dept_id is not None:
+            school_id = self.school_of[dept_id]
+        return dept_id, school_id
+
+
+def subquery_count(queryset):
+    """COUNT(*) of a correlated queryset of historical models; 0 when empty"""
+    counted = queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    return Coalesce(Subquery(counted, output_field=models.IntegerField()), 0)
+
+
+def link_to_structure(apps, schema_editor):
+    School = apps.get_model('ERP_app', 'School')
+    Department = apps.get_model('ERP_app', 'Department')
+    UserProfile = apps.get_model('ERP_app', 'UserProfile')
+    CourseSection = apps.get_model('ERP_app', 'CourseSection')
+
+    matcher = OrgMatcher(
+        School.objects.values_list('id', 'name', 'short_name'),
+        Department.objects.values_list('id', 'school_id', 'name', 'short_name'),
+    )
+    profiles = []
+    for pk, department, school in UserProfile.objects.exclude(department=None, school=None).values_list(
+        'pk', 'department', 'school',
+    ).iterator(chunk_size=1000):
+        department_id, school_id = matcher.link(department, school)
+        if department_id or school_id:
+            profiles.append(UserProfile(pk=pk, department_ref_id=department_id, school_ref_id=school_id))
+    UserProfile.objects.bulk_update(profiles, ['department_ref', 'school_ref'], batch_size=1000)
+
+    sections = []
+    for course_section in CourseSection.objects.filter(models.Q(school=None) | models.Q(department=None)):
+        department_id, school_id = matcher.link(course_section.department_name, course_section.school_name)
+        course_section.department_id = course_section.department_id or department_id
+        course_section.school_id = course_section.school_id or school_id
+        sections.append(course_section)
+    CourseSection.objects.bulk_update(sections, ['department', 'school'], batch_size=1000)
+
+    Department.objects.update(
+        student_count=subquery_count(UserProfile.objects.filter(department_ref=OuterRef('pk'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0010_structure_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='userprofile',
+            name='ERP_app_use_departm_e4edd5_idx',
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='department_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='ERP_app.department'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='program_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='ERP_app.program'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='school_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='ERP_app.school'),
+        ),
+        migrations.RunPython(link_to_structure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Composite indexes behind the keyset-paginated student application history
+# (newest first) and reviewer work queue (oldest first, by type or department).
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0011_profile_structure_refs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['student', 'created_at'], name='ERP_app_app_student_c0e8ea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['status', 'application_type', 'created_at'], name='ERP_app_app_status_b0cc58_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['status', 'department', 'created_at'], name='ERP_app_app_status_38d2cb_idx'),
+        ),
+    ]
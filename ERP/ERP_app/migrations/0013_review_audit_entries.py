@@ -0,0 +1,34 @@
+# Audit trail written by the bulk review workflow (see ERP_app/reviews.py).
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ERP_app', '0012_application_request_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewAuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('application_request', 'Application Request'), ('placement_update', 'Placement Drive')], max_length=30)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('action', models.CharField(max_length=20)),
+                ('previous_status', models.CharField(max_length=20)),
+                ('new_status', models.CharField(max_length=20)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='review_audit_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['target_type', 'target_id', 'created_at'], name='ERP_app_rev_target__8617ef_idx')],
+            },
+        ),
+    ]
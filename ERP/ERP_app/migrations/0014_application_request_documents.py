@@ -0,0 +1,22 @@
+# Digest of the server-generated PDF, and an index for batch generation by review day (see ERP_app/documents.py).
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0013_review_audit_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationrequest',
+            name='document_digest',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['status', 'reviewed_at'], name='ERP_app_app_status_b099f7_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Leave calendar: one row per day of each pending or approved leave application (see ERP_app/leaves.py).
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# LEAVE_MAX_DAYS when this migration was written
+MAX_DAYS = 60
+
+
+def index_leaves(apps, schema_editor):
+    ApplicationRequest = apps.get_model('ERP_app', 'ApplicationRequest')
+    LeaveDay = apps.get_model('ERP_app', 'LeaveDay')
+    applications = ApplicationRequest.objects.filter(
+        application_type='leave', status__in=('pending', 'in_process', 'approved'),
+    ).exclude(from_date=None).exclude(to_date=None).values_list('pk', 'student_id', 'from_date', 'to_date', 'status')
+    LeaveDay.objects.bulk_create((
+        LeaveDay(student_id=student_id, date=from_date + timedelta(days=n), application_id=pk, approved=status == 'approved')
+        for pk, student_id, from_date, to_date, status in applications.iterator(chunk_size=1000)
+        for n in range(min((to_date - from_date).days + 1, MAX_DAYS))
+    ), batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('ERP_app', '0014_application_request_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('approved', models.BooleanField(default=False)),
+                ('application', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='leave_days', to='ERP_app.applicationrequest')),
+                ('student', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='leave_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'date', 'approved'], name='ERP_app_lea_student_8b92e3_idx')],
+                'unique_together': {('application', 'date')},
+            },
+        ),
+        migrations.RunPython(index_leaves, migrations.RunPython.noop),
+    ]
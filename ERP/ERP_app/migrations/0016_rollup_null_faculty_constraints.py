@@ -0,0 +1,47 @@
+# Unique faculty-less rollup buckets and roster entries; duplicates an earlier
+# race created are merged first.
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+COUNT_FIELDS = ('present_count', 'absent_count', 'late_count', 'total_count')
+
+
+def merge_duplicates(apps, schema_editor):
+    AttendanceDailyRollup = apps.get_model('ERP_app', 'AttendanceDailyRollup')
+    AttendanceRosterEntry = apps.get_model('ERP_app', 'AttendanceRosterEntry')
+
+    duplicates = AttendanceDailyRollup.objects.filter(faculty=None).order_by().values('date', 'course_section').annotate(
+        rows=Count('id'), keep=Min('id'), **{f'sum_{field}': Sum(field) for field in COUNT_FIELDS},
+    ).filter(rows__gt=1)
+    for group in duplicates:
+        bucket = AttendanceDailyRollup.objects.filter(faculty=None, date=group['date'], course_section=group['course_section'])
+        bucket.exclude(pk=group['keep']).delete()
+        bucket.update(**{field: group[f'sum_{field}'] for field in COUNT_FIELDS})
+
+    duplicates = AttendanceRosterEntry.objects.filter(faculty=None).order_by().values('course_section', 'student').annotate(
+        rows=Count('id'), keep=Min('id'),
+    ).filter(rows__gt=1)
+    for group in duplicates:
+        AttendanceRosterEntry.objects.filter(
+            faculty=None, course_section=group['course_section'], student=group['student'],
+        ).exclude(pk=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0015_leave_calendar'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendancedailyrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('faculty', None)), fields=('date', 'course_section'), name='unique_rollup_bucket_without_faculty'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancerosterentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('faculty', None)), fields=('course_section', 'student'), name='unique_roster_entry_without_faculty'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Expression indexes on the lowercased course section names, for the attendance search.
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0016_rollup_null_faculty_constraints'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursesection',
+            index=models.Index(django.db.models.functions.text.Lower('department_name'), name='coursesection_dept_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursesection',
+            index=models.Index(django.db.models.functions.text.Lower('school_name'), name='coursesection_school_lower_idx'),
+        ),
+    ]
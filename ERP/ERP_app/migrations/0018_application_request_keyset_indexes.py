@@ -0,0 +1,37 @@
+# id as the last column of the ApplicationRequest history and reviewer-queue indexes, for keyset pagination.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0017_course_section_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='applicationrequest',
+            name='ERP_app_app_student_c0e8ea_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='applicationrequest',
+            name='ERP_app_app_status_b0cc58_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='applicationrequest',
+            name='ERP_app_app_status_38d2cb_idx',
+        ),
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['student', 'created_at', 'id'], name='ERP_app_app_student_54ab96_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['status', 'application_type', 'created_at', 'id'], name='ERP_app_app_status_0c0cff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationrequest',
+            index=models.Index(fields=['status', 'department', 'created_at', 'id'], name='ERP_app_app_status_2a594d_idx'),
+        ),
+    ]
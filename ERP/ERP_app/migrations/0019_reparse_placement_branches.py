@@ -0,0 +1,105 @@
+# Re-parses every drive's branches_allowed with the org matcher rules that
+# replaced eligibility's own name normalizer: "Dept. of Physics" and
+# parenthesized short names now match, near misses match by difflib ratio,
+# and a branch name shared by several schools opens the drive to each.
+
+import difflib
+import re
+
+from django.db import migrations
+
+# Frozen copies of ERP_app.eligibility and ERP_app.org_matching as of this migration
+ALL_BRANCHES = {'all', 'all branches', 'all departments', 'any', 'any branch', 'open to all'}
+BRANCH_SEPARATORS = re.compile(r'[,;/|\n]+')
+
+FUZZY_CUTOFF = 0.85
+
+PARENTHESIZED = re.compile(r'\s*\(([^)]*)\)\s*$')
+PREFIXES = ('department of ', 'school of ', 'faculty of ')
+PUNCTUATION = re.compile(r'[^\w\s]')
+ABBREVIATIONS = {'dept': 'department', 'engg': 'engineering', 'mgmt': 'management'}
+
+
+def normalize_name(value):
+    words = PUNCTUATION.sub(' ', (value or '').lower().replace('.', '')).split()
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words if word != 'and')
+
+
+def strip_prefix(key):
+    for prefix in PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):]
+    return key
+
+
+def name_keys(name, short_name=None):
+    variants = [name, short_name]
+    match = PARENTHESIZED.search(name or '')
+    if match:
+        variants += [name[:match.start()], match.group(1)]
+    keys = []
+    for variant in variants:
+        key = normalize_name(variant)
+        for candidate in (key, strip_prefix(key)):
+            if candidate and candidate not in keys:
+                keys.append(candidate)
+    return keys
+
+
+def department_ids(index, text):
+    """Every department known by this name, falling back to the closest name"""
+    key = normalize_name(text)
+    if not key:
+        return []
+    for candidate in (key, strip_prefix(key)):
+        if candidate in index:
+            return index[candidate]
+    close = difflib.get_close_matches(key, index.keys(), n=1, cutoff=FUZZY_CUTOFF)
+    return index[close[0]] if close else []
+
+
+def parse_branches(text, index):
+    """(department ids, all_branches) for a branches_allowed value"""
+    dept_ids, all_branches = set(), False
+    for part in BRANCH_SEPARATORS.split(text or ''):
+        token = normalize_name(part)
+        if token in ALL_BRANCHES:
+            all_branches = True
+        elif token:
+            dept_ids.update(department_ids(index, token))
+    return dept_ids, all_branches
+
+
+def reparse_branches(apps, schema_editor):
+    Department = apps.get_model('ERP_app', 'Department')
+    PlacementUpdate = apps.get_model('ERP_app', 'PlacementUpdate')
+    Through = PlacementUpdate.branches.through
+
+    index = {}
+    for dept_id, name, short_name in Department.objects.order_by('pk').values_list('id', 'name', 'short_name'):
+        for key in name_keys(name, short_name):
+            index.setdefault(key, []).append(dept_id)
+
+    rows, open_to_all = [], []
+    for drive_id, branches_allowed in PlacementUpdate.objects.values_list('id', 'branches_allowed'):
+        dept_ids, all_branches = parse_branches(branches_allowed, index)
+        rows.extend(Through(placementupdate_id=drive_id, department_id=dept_id) for dept_id in dept_ids)
+        if all_branches:
+            open_to_all.append(drive_id)
+
+    Through.objects.all().delete()
+    Through.objects.bulk_create(rows, batch_size=1000)
+    PlacementUpdate.objects.update(all_branches=False)
+    for start in range(0, len(open_to_all), 500):
+        PlacementUpdate.objects.filter(id__in=open_to_all[start:start + 500]).update(all_branches=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ERP_app', '0018_application_request_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(reparse_branches, migrations.RunPython.noop),
+    ]
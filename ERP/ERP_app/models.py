@@ -1,6 +1,29 @@
 from django.db import models
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Lower, NullIf, Trim
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+
+class SelectRelatedManager(models.Manager):
+    """Default manager that joins the relations __str__ and list pages read, so rendering
+    a list costs one query instead of one per row. Call select_related(None) on the
+    queryset to opt out, e.g. before only()."""
+    
+    def __init__(self, *related):
+        super().__init__()
+        self.related = related
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related(*self.related)
+
+
+def subquery_count(queryset):
+    """COUNT(*) of a correlated queryset (filtered on OuterRef) as an expression; 0 when empty"""
+    counted = queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    return Coalesce(Subquery(counted, output_field=models.IntegerField()), 0)
+
 
 # User Profile Extensions
 class UserProfile(models.Model):
@@ -20,42 +43,255 @@ class UserProfile(models.Model):
         ('student', 'Student'),
     ], default='student')
     college_name = models.CharField(max_length=200, null=True, blank=True)
+    cgpa = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True,
+                               validators=[MinValueValidator(0), MaxValueValidator(10)])
+    # The structure rows the department/school text resolves to (see org_matching.py);
+    # the signals re-match them when the text changes
+    school_ref = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='profiles')
+    department_ref = models.ForeignKey('Department', on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='profiles')
+    program_ref = models.ForeignKey('Program', on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='profiles')
+    
+    class Meta:
+        indexes = [
+            # Placement eligibility: students at or above a drive's CGPA cut-off
+            models.Index(fields=['role', 'cgpa']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
+class SearchEntry(models.Model):
+    """Admin search index: one normalized document per student, HOD, department or college.
+
+    Maintained by signals (see search.py); on SQLite the documents are mirrored
+    into an FTS5 trigram table, on PostgreSQL they carry a pg_trgm index.
+    """
+    KIND_CHOICES = [
+        ('student', 'Student'),
+        ('hod', 'HOD'),
+        ('department', 'Department'),
+        ('college', 'College'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    key = models.CharField(max_length=255)
+    profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, null=True, blank=True, related_name='search_entries')
+    # Normalized enrollment number, for exact/prefix lookups
+    code = models.CharField(max_length=50, blank=True, default='')
+    document = models.TextField()
+    # The search result as returned by the admin search API
+    payload = models.JSONField(default=dict)
+
+    class Meta:
+        unique_together = ['kind', 'key']
+        indexes = [
+            models.Index(fields=['code']),
+        ]
+        verbose_name_plural = 'Search entries'
+
+    def __str__(self):
+        return f"{self.kind}: {self.key}"
+
 # Attendance Models
-class AttendanceRecord(models.Model):
-    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_records')
-    enrollment_no = models.CharField(max_length=50)
-    student_name = models.CharField(max_length=100)
-    department = models.CharField(max_length=100)
-    school = models.CharField(max_length=100)
-    year = models.IntegerField()
+class CourseSection(models.Model):
+    """Attendance dimension: one course taught to one year/section of a department"""
+    school = models.ForeignKey('School', on_delete=models.SET_NULL, null=True, blank=True, related_name='course_sections')
+    department = models.ForeignKey('Department', on_delete=models.SET_NULL, null=True, blank=True, related_name='course_sections')
+    program = models.ForeignKey('Program', on_delete=models.SET_NULL, null=True, blank=True, related_name='course_sections')
+    # Names as recorded, kept for rows whose school/department has no matching model row
+    school_name = models.CharField(max_length=100)
+    department_name = models.CharField(max_length=100)
+    year = models.PositiveSmallIntegerField()
     section = models.CharField(max_length=10)
     course = models.CharField(max_length=100)
-    faculty = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='faculty_attendance')
+    
+    class Meta:
+        ordering = ['school_name', 'department_name', 'year', 'section', 'course']
+        unique_together = ['school_name', 'department_name', 'year', 'section', 'course']
+        indexes = [
+            models.Index(fields=['department_name', 'year', 'section']),
+            models.Index(fields=['course']),
+            # Case-insensitive name prefix search (search.attendance_search_targets)
+            models.Index(Lower('department_name'), name='coursesection_dept_lower_idx'),
+            models.Index(Lower('school_name'), name='coursesection_school_lower_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.course} - {self.department_name} {self.year}{self.section}"
+
+
+# Old denormalized AttendanceRecord columns -> where the value lives now
+ATTENDANCE_LEGACY_FIELDS = {
+    'school': 'course_section__school_name',
+    'department': 'course_section__department_name',
+    'year': 'course_section__year',
+    'section': 'course_section__section',
+    'course': 'course_section__course',
+}
+
+# Marker for the one legacy column that is an expression rather than a path
+STUDENT_NAME = 'student_name'
+
+
+def legacy_expression(path):
+    if path == STUDENT_NAME:
+        return Coalesce(
+            NullIf(Trim(Concat('student__first_name', Value(' '), 'student__last_name')), Value('')),
+            'student__username',
+        )
+    return F(path)
+
+
+def translate_legacy_lookups(lookups, legacy_fields):
+    translated = {}
+    for lookup, value in lookups.items():
+        field, _, suffix = lookup.partition('__')
+        if field in legacy_fields and legacy_fields[field] != STUDENT_NAME:
+            lookup = legacy_fields[field] + (f'__{suffix}' if suffix else '')
+        translated[lookup] = value
+    return translated
+
+
+class AttendanceQuerySet(models.QuerySet):
+    """Compatibility layer for code written against the old denormalized columns"""
+    
+    def legacy_filter(self, **lookups):
+        """filter() that also accepts the old column names, e.g. school='...' or course__in=[...]"""
+        return self.filter(**translate_legacy_lookups(lookups, self.model.LEGACY_FIELDS))
+    
+    def legacy_values(self, *fields):
+        """values() that also accepts the old column names (enrollment_no, student_name, ...)"""
+        plain = [f for f in fields if f not in self.model.LEGACY_FIELDS]
+        legacy = {f: legacy_expression(self.model.LEGACY_FIELDS[f]) for f in fields if f in self.model.LEGACY_FIELDS}
+        return self.values(*plain, **legacy)
+
+
+class AttendanceRecord(models.Model):
+    PRESENT = 1
+    ABSENT = 2
+    LATE = 3
+    STATUS_CHOICES = [
+        (PRESENT, 'Present'),
+        (ABSENT, 'Absent'),
+        (LATE, 'Late'),
+    ]
+    # Status names used by the API, imports and the old CharField
+    STATUS_CODES = {'present': PRESENT, 'absent': ABSENT, 'late': LATE}
+    
+    LEGACY_FIELDS = {
+        **ATTENDANCE_LEGACY_FIELDS,
+        'enrollment_no': 'student__userprofile__enrollment_no',
+        'student_name': STUDENT_NAME,
+    }
+    
+    # No single-column FK indexes: the composite (..., date) indexes below lead with them
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_records', db_index=False)
+    course_section = models.ForeignKey(CourseSection, on_delete=models.PROTECT, related_name='attendance_records', db_index=False)
+    faculty = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='faculty_attendance', db_index=False)
     date = models.DateField()
-    status = models.CharField(max_length=10, choices=[
-        ('present', 'Present'),
-        ('absent', 'Absent'),
-        ('late', 'Late'),
-    ], default='absent')
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=ABSENT)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = AttendanceQuerySet.as_manager()
+    
     class Meta:
-        ordering = ['-date', 'student_name']
+        ordering = ['-date']
         indexes = [
-            models.Index(fields=['enrollment_no', 'date']),
-            models.Index(fields=['department', 'date']),
-            models.Index(fields=['school', 'date']),
-            models.Index(fields=['year', 'section']),
-            models.Index(fields=['course', 'date']),
+            models.Index(fields=['student', 'date']),
+            models.Index(fields=['course_section', 'date']),
             models.Index(fields=['faculty', 'date']),
         ]
     
     def __str__(self):
-        return f"{self.student_name} - {self.date} - {self.status}"
+        return f"{self.student_name} - {self.date} - {self.get_status_display()}"
+    
+    # Read-only access to the values that used to be stored on every row
+    @property
+    def status_name(self):
+        return {code: name for name, code in self.STATUS_CODES.items()}.get(self.status)
+    
+    @property
+    def enrollment_no(self):
+        profile = getattr(self.student, 'userprofile', None)
+        return profile.enrollment_no if profile else None
+    
+    @property
+    def student_name(self):
+        return self.student.get_full_name() or self.student.username
+    
+    @property
+    def school(self):
+        return self.course_section.school_name
+    
+    @property
+    def department(self):
+        return self.course_section.department_name
+    
+    @property
+    def year(self):
+        return self.course_section.year
+    
+    @property
+    def section(self):
+        return self.course_section.section
+    
+    @property
+    def course(self):
+        return self.course_section.course
+
+# Attendance Rollups (pre-aggregated for the dashboards, see ERP_app/rollups.py)
+class AttendanceDailyRollup(models.Model):
+    LEGACY_FIELDS = ATTENDANCE_LEGACY_FIELDS
+    
+    date = models.DateField()
+    course_section = models.ForeignKey(CourseSection, on_delete=models.CASCADE, related_name='attendance_rollups')
+    faculty = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='attendance_rollups')
+    present_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    total_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = AttendanceQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['-date']
+        unique_together = ['date', 'course_section', 'faculty']
+        constraints = [
+            # NULLs never conflict, so unique_together alone lets two writers create the same faculty-less bucket
+            models.UniqueConstraint(fields=['date', 'course_section'], condition=models.Q(faculty=None),
+                                    name='unique_rollup_bucket_without_faculty'),
+        ]
+        indexes = [
+            models.Index(fields=['course_section', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} - {self.course_section} ({self.present_count}/{self.total_count})"
+
+class AttendanceRosterEntry(models.Model):
+    """Distinct students seen per rollup bucket, used for the total_students columns"""
+    LEGACY_FIELDS = ATTENDANCE_LEGACY_FIELDS
+    
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_roster_entries')
+    course_section = models.ForeignKey(CourseSection, on_delete=models.CASCADE, related_name='roster_entries')
+    faculty = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='attendance_roster_faculty')
+    
+    objects = AttendanceQuerySet.as_manager()
+    
+    class Meta:
+        unique_together = ['course_section', 'faculty', 'student']
+        constraints = [
+            models.UniqueConstraint(fields=['course_section', 'student'], condition=models.Q(faculty=None),
+                                    name='unique_roster_entry_without_faculty'),
+        ]
+        verbose_name_plural = 'Attendance roster entries'
+    
+    def __str__(self):
+        return f"{self.student_id} - {self.course_section}"
 
 # Placement Models
 class PlacementUpdate(models.Model):
@@ -65,6 +301,9 @@ class PlacementUpdate(models.Model):
     eligibility_cgpa = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True, 
                                           validators=[MinValueValidator(0), MaxValueValidator(10)])
     branches_allowed = models.CharField(max_length=500, help_text="Comma-separated list of branches")
+    # Parsed from branches_allowed on save (see eligibility.py)
+    branches = models.ManyToManyField('Department', blank=True, editable=False, related_name='placement_drives')
+    all_branches = models.BooleanField(default=False, editable=False)
     last_date = models.DateField()
     drive_date = models.DateField()
     job_location = models.CharField(max_length=200)
@@ -86,6 +325,12 @@ class PlacementUpdate(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Open drives for the student eligibility lookup
+            models.Index(fields=['status', 'last_date']),
+            # Keyset pagination of the CRC company list
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.company_name} - {self.role}"
@@ -107,13 +352,58 @@ class PlacementApplication(models.Model):
     applied_at = models.DateTimeField(auto_now_add=True)
     notes = models.TextField(null=True, blank=True)
     
+    objects = SelectRelatedManager('placement')
+    
     class Meta:
         ordering = ['-applied_at']
         unique_together = ['placement', 'student']
+        indexes = [
+            # Keyset pagination of a drive's applicants, newest first (see pagination.py)
+            models.Index(fields=['placement', 'applied_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.student_name} - {self.placement.company_name}"
 
+# Background Jobs
+class BackgroundJob(models.Model):
+    """Unit of deferred work, run by the run_jobs worker (see jobs.py)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+    
+    # Dotted path of the handler, e.g. 'ERP_app.uploads.process_upload'
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's claim query: oldest runnable job first
+            models.Index(fields=['status', 'run_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
 # Student Application Models
 class ApplicationRequest(models.Model):
     APPLICATION_TYPES = [
@@ -161,6 +451,9 @@ class ApplicationRequest(models.Model):
     reviewed_at = models.DateTimeField(null=True, blank=True)
     admin_notes = models.TextField(null=True, blank=True)
     
+    # SHA-256 of the generated PDF, which is stored under that name (see documents.py)
+    document_digest = models.CharField(max_length=64, blank=True, default='', editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -170,11 +463,64 @@ class ApplicationRequest(models.Model):
         indexes = [
             models.Index(fields=['student', 'application_type']),
             models.Index(fields=['status', 'created_at']),
+            # Student history, newest first; id breaks created_at ties for keyset pagination
+            models.Index(fields=['student', 'created_at', 'id']),
+            # Reviewer queue, oldest first, by type or by department
+            models.Index(fields=['status', 'application_type', 'created_at', 'id']),
+            models.Index(fields=['status', 'department', 'created_at', 'id']),
+            # A day's approvals, for batch document generation
+            models.Index(fields=['status', 'reviewed_at']),
         ]
     
     def __str__(self):
         return f"{self.get_application_type_display()} - {self.student_name} ({self.enrollment_no})"
 
+# Review Audit Trail
+class ReviewAuditEntry(models.Model):
+    """One status change made by a reviewer (see reviews.py)"""
+    TARGET_CHOICES = [
+        ('application_request', 'Application Request'),
+        ('placement_update', 'Placement Drive'),
+    ]
+    
+    target_type = models.CharField(max_length=30, choices=TARGET_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=20)
+    previous_status = models.CharField(max_length=20)
+    new_status = models.CharField(max_length=20)
+    reviewer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='review_audit_entries')
+    notes = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # History of one request or drive
+            models.Index(fields=['target_type', 'target_id', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_target_type_display()} #{self.target_id}: {self.previous_status} -> {self.new_status}"
+
+# Leave Calendar
+class LeaveDay(models.Model):
+    """One day covered by a pending or approved leave application (see leaves.py)"""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leave_days', db_index=False)
+    date = models.DateField()
+    application = models.ForeignKey(ApplicationRequest, on_delete=models.CASCADE, related_name='leave_days', db_index=False)
+    # Only approved days excuse attendance; pending ones still block overlapping applications
+    approved = models.BooleanField(default=False)
+    
+    class Meta:
+        unique_together = ['application', 'date']
+        indexes = [
+            # Overlap check and the attendance join: (student, date) seeks
+            models.Index(fields=['student', 'date', 'approved']),
+        ]
+    
+    def __str__(self):
+        return f"{self.student_id} on leave {self.date}"
+
 # ==================== UNIVERSITY STRUCTURE MODELS ====================
 
 # Governing Bodies
@@ -202,6 +548,15 @@ class GoverningBody(models.Model):
     def __str__(self):
         return f"{self.get_body_type_display()} - {self.name}"
 
+class SchoolQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate live_department_count and live_program_count, counted in the same query.
+
+        The stored counters are read straight from the row; this recounts them, e.g. to check for drift.
+        """
+        return self.annotate(**{f'live_{field}': count for field, count in School.count_expressions().items()})
+
+
 # Schools/Faculties
 class School(models.Model):
     name = models.CharField(max_length=200, unique=True)
@@ -214,17 +569,37 @@ class School(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Maintained by the signals (see counters.py); reconcile_structure_counters repairs drift
+    department_count = models.PositiveIntegerField(default=0, editable=False)
+    program_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = SchoolQuerySet.as_manager()
+    
     class Meta:
         ordering = ['name']
     
     def __str__(self):
         return self.name
     
+    @staticmethod
+    def count_expressions():
+        """Live values of the counter columns as correlated subqueries, by field name"""
+        return {
+            'department_count': subquery_count(Department.objects.filter(school=OuterRef('pk'))),
+            'program_count': subquery_count(Program.objects.filter(department__school=OuterRef('pk'))),
+        }
+    
     def get_department_count(self):
-        return self.departments.count()
+        return self.department_count
     
     def get_program_count(self):
-        return Program.objects.filter(department__school=self).count()
+        return self.program_count
+
+
+class DepartmentQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate live_program_count, live_faculty_count and live_student_count in the same query"""
+        return self.annotate(**{f'live_{field}': count for field, count in Department.count_expressions().items()})
 
 # Departments
 class Department(models.Model):
@@ -237,6 +612,13 @@ class Department(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Maintained by the signals (see counters.py); reconcile_structure_counters repairs drift
+    program_count = models.PositiveIntegerField(default=0, editable=False)
+    faculty_count = models.PositiveIntegerField(default=0, editable=False)
+    student_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = SelectRelatedManager.from_queryset(DepartmentQuerySet)('school')
+    
     class Meta:
         ordering = ['school', 'name']
         unique_together = ['school', 'name']
@@ -244,11 +626,20 @@ class Department(models.Model):
     def __str__(self):
         return f"{self.school.name} - {self.name}"
     
+    @staticmethod
+    def count_expressions():
+        """Live values of the counter columns as correlated subqueries, by field name"""
+        return {
+            'program_count': subquery_count(Program.objects.filter(department=OuterRef('pk'))),
+            'faculty_count': subquery_count(FacultyMember.objects.filter(department=OuterRef('pk'))),
+            'student_count': subquery_count(UserProfile.objects.filter(department_ref=OuterRef('pk'))),
+        }
+    
     def get_faculty_count(self):
-        return self.faculty_members.count()
+        return self.faculty_count
     
     def get_student_count(self):
-        return UserProfile.objects.filter(department=self.name).count()
+        return self.student_count
 
 # Programs (Degrees/Courses)
 class Program(models.Model):
@@ -266,6 +657,8 @@ class Program(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = SelectRelatedManager('department')
+    
     class Meta:
         ordering = ['department', 'degree_type', 'name']
         unique_together = ['department', 'name']
@@ -301,6 +694,8 @@ class FacultyMember(models.Model):
     joined_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = SelectRelatedManager('user', 'department')
+    
     class Meta:
         ordering = ['department', 'rank', 'user__last_name']
         unique_together = ['user', 'department']
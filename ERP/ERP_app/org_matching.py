@@ -0,0 +1,204 @@
+"""
+Matching free-text school and department names to School / Department rows.
+
+Profiles, course sections and attendance imports carry the school and
+department as typed text ("Computer Science Engineering", "CSE", "Dept. of
+Physics"), while the structure has rows like "Computer Science Engineering
+(CSE)". OrgMatcher resolves such text to row ids, trying in turn:
+
+1. the normalized name or short name (case, dots, punctuation, "&"/"and"
+   and a leading "Department of" / "School of" are ignored, and "Dept",
+   "Engg" and "Mgmt" are spelled out);
+2. the name without a trailing "(...)" and the abbreviation inside it;
+3. the closest known name by difflib ratio, if at least FUZZY_CUTOFF.
+
+A department name that exists in several schools resolves to the one in
+the given school, otherwise to the oldest row.
+
+UserProfile.school_ref / department_ref and CourseSection.school /
+department hold the result, so views join on indexed integer keys. The
+signals re-match a profile when its text changes; link_profiles() and
+link_course_sections() re-match in bulk after structure changes.
+"""
+import difflib
+import re
+from collections import Counter
+
+from django.db import transaction
+
+from . import counters, eligibility, profiles as request_profiles, structure
+from .cache_versions import get_version
+from .models import CourseSection, Department, School, UserProfile
+
+FUZZY_CUTOFF = 0.85
+
+PARENTHESIZED = re.compile(r'\s*\(([^)]*)\)\s*$')
+PREFIXES = ('department of ', 'school of ', 'faculty of ')
+PUNCTUATION = re.compile(r'[^\w\s]')
+ABBREVIATIONS = {'dept': 'department', 'engg': 'engineering', 'mgmt': 'management'}
+
+
+def normalize_name(value):
+    words = PUNCTUATION.sub(' ', (value or '').lower().replace('.', '')).split()
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in words if word != 'and')
+
+
+def name_keys(name, short_name=None):
+    """Every normalized form a school or department is known by"""
+    variants = [name, short_name]
+    match = PARENTHESIZED.search(name or '')
+    if match:
+        variants += [name[:match.start()], match.group(1)]
+    keys = []
+    for variant in variants:
+        key = normalize_name(variant)
+        for candidate in (key, _strip_prefix(key)):
+            if candidate and candidate not in keys:
+                keys.append(candidate)
+    return keys
+
+
+def _strip_prefix(key):
+    for prefix in PREFIXES:
+        if key.startswith(prefix):
+            return key[len(prefix):]
+    return key
+
+
+class OrgMatcher:
+    """Text -> School / Department ids, built from (id, name, short_name) rows"""
+
+    def __init__(self, schools, departments):
+        """`schools`: (id, name, short_name) rows; `departments`: (id, school_id, name, short_name) rows"""
+        self.schools = {}
+        for school_id, name, short_name in sorted(schools):
+            for key in name_keys(name, short_name):
+                self.schools.setdefault(key, [school_id])
+        self.departments = {}
+        self.school_of = {}
+        for dept_id, school_id, name, short_name in sorted(departments):
+            self.school_of[dept_id] = school_id
+            for key in name_keys(name, short_name):
+                self.departments.setdefault(key, []).append(dept_id)
+        self._close = {}
+
+    @classmethod
+    def from_database(cls):
+        return cls(
+            School.objects.values_list('id', 'name', 'short_name'),
+            Department.objects.select_related(None).values_list('id', 'school_id', 'name', 'short_name'),
+        )
+
+    def _lookup(self, index, text):
+        key = normalize_name(text)
+        if not key:
+            return []
+        for candidate in (key, _strip_prefix(key)):
+            if candidate in index:
+                return index[candidate]
+        cache_key = (index is self.schools, key)
+        if cache_key not in self._close:
+            close = difflib.get_close_matches(key, index.keys(), n=1, cutoff=FUZZY_CUTOFF)
+            self._close[cache_key] = close[0] if close else None
+        return index[self._close[cache_key]] if self._close[cache_key] else []
+
+    def school_id(self, text):
+        ids = self._lookup(self.schools, text)
+        return ids[0] if ids else None
+
+    def department_ids(self, text):
+        """Every department known by this name, e.g. "Biochemistry" in two schools"""
+        return list(self._lookup(self.departments, text))
+
+    def department_id(self, text, school_id=None):
+        ids = self._lookup(self.departments, text)
+        if not ids:
+            return None
+        return next((dept_id for dept_id in ids if self.school_of[dept_id] == school_id), ids[0])
+
+    def link(self, department, school):
+        """(department id, school id) for a department and school typed as text"""
+        school_id = self.school_id(school)
+        dept_id = self.department_id(department, school_id)
+        if school_id is None and dept_id is not None:
+            school_id = self.school_of[dept_id]
+        return dept_id, school_id
+
+
+_matcher = None
+
+
+def get_matcher():
+    """The matcher for the current structure, rebuilt when the structure cache version moves"""
+    global _matcher
+    version = get_version(structure.VERSION_KEY)
+    if _matcher is None or version is None or _matcher[0] != version:
+        _matcher = (version, OrgMatcher.from_database())
+    return _matcher[1]
+
+
+# ==================== BULK RE-MATCHING ====================
+
+def link_profiles(profiles=None, matcher=None, batch_size=1000):
+    """Re-match profiles (all by default) without sending signals.
+
+    Returns (profiles changed, Counter of department texts nothing matched).
+    """
+    matcher = matcher or get_matcher()
+    profiles = UserProfile.objects.all() if profiles is None else profiles
+    rows = profiles.order_by('pk').values_list('pk', 'department', 'school', 'department_ref_id', 'school_ref_id')
+    changed, touched, unmatched = [], set(), Counter()
+    for pk, department, school, old_dept_id, old_school_id in rows.iterator(chunk_size=batch_size):
+        dept_id, school_id = matcher.link(department, school)
+        if department and dept_id is None:
+            unmatched[department.strip()] += 1
+        if (dept_id, school_id) != (old_dept_id, old_school_id):
+            changed.append(UserProfile(pk=pk, department_ref_id=dept_id, school_ref_id=school_id))
+            touched.update((old_dept_id, dept_id))
+
+    if changed:
+        with transaction.atomic():
+            UserProfile.objects.bulk_update(changed, ['department_ref', 'school_ref'], batch_size=batch_size)
+            counters.recount_students(touched - {None})
+        eligibility.invalidate()
+        request_profiles.invalidate_all()
+    return len(changed), unmatched
+
+
+def link_course_sections(sections=None, matcher=None, batch_size=1000):
+    """Re-match course sections (all by default); returns the number changed"""
+    matcher = matcher or get_matcher()
+    sections = CourseSection.objects.all() if sections is None else sections
+    changed = []
+    for pk, department, school, old_dept_id, old_school_id in sections.values_list(
+        'pk', 'department_name', 'school_name', 'department_id', 'school_id',
+    ).iterator(chunk_size=batch_size):
+        dept_id, school_id = matcher.link(department, school)
+        if (dept_id, school_id) != (old_dept_id, old_school_id):
+            changed.append(CourseSection(pk=pk, department_id=dept_id, school_id=school_id))
+    CourseSection.objects.bulk_update(changed, ['department', 'school'], batch_size=batch_size)
+    return len(changed)
+
+
+# ==================== QUERYING ====================
+
+def filter_attendance(records, school=None, department=None):
+    """AttendanceRecord queryset narrowed to a school and/or department given as text.
+
+    Resolved names filter on the course sections' indexed school/department ids;
+    text that matches no row falls back to the stored names.
+    """
+    matcher = get_matcher()
+    if school:
+        school_id = matcher.school_id(school)
+        if school_id is None:
+            records = records.legacy_filter(school=school)
+        else:
+            records = records.filter(course_section__school_id=school_id)
+    if department:
+        dept_ids = matcher.department_ids(department)
+        if not dept_ids:
+            records = records.legacy_filter(department=department)
+        else:
+            records = records.filter(course_section__department_id__in=dept_ids)
+    return records
@@ -0,0 +1,131 @@
+"""
+Full-page cache for the static portal pages.
+
+Most pages served by page_view and index have no per-request data, so their
+rendered HTML is cached per page name and user role, together with gzip and
+(when the optional `brotli` package is installed) brotli copies, a strong
+ETag and Last-Modified. A repeat navigation is answered from the cache, or
+with a 304, without touching the template engine.
+
+Pages opt in through views.CACHEABLE_PAGES. Entries live in the cache named by
+PAGE_CACHE_ALIAS (in-memory by default, a FileBasedCache works as well) and
+are keyed by the template's modification time, read once per process: like
+the cached template loader, a restart picks up edited templates without
+clearing the cache. The role comes from the lazy request.profile, so a warm
+request runs no queries.
+"""
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template import loader
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import profiles
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+def is_enabled():
+    return getattr(settings, 'PAGE_CACHE_ENABLED', not settings.DEBUG)
+
+
+def get_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def get_role(request):
+    """Cache key role: the profile role, 'user' without a profile, 'anonymous' when logged out"""
+    if not request.user.is_authenticated:
+        return 'anonymous'
+    profile = getattr(request, 'profile', None)
+    if profile is None:
+        profile = profiles.get_profile(request.user.pk)
+    # request.profile falls back to the demo student for users without a profile
+    if profile is None or profile.user_id != request.user.pk:
+        return 'user'
+    return profile.role or 'user'
+
+
+@lru_cache(maxsize=None)
+def template_version(template_name):
+    """The template's modification time when this process first served it"""
+    template = loader.get_template(template_name)
+    return int(os.path.getmtime(template.origin.name)) if os.path.exists(template.origin.name) else 0
+
+
+def cache_key(page_name, role, template_name):
+    return f'page:{page_name}:{role}:{template_version(template_name)}'
+
+
+def build_entry(response):
+    """Cacheable form of a rendered 200 response: every encoding plus validators"""
+    body = response.content
+    digest = hashlib.sha1(body).hexdigest()
+    encodings = {
+        'identity': body,
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        encodings['br'] = brotli.compress(body)
+    return {
+        'content_type': response['Content-Type'],
+        'encodings': encodings,
+        'digest': digest,
+        'last_modified': timezone.now().replace(microsecond=0).timestamp(),
+    }
+
+
+def choose_encoding(request, entry):
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for encoding in ('br', 'gzip'):
+        if encoding in accepted and encoding in entry['encodings']:
+            return encoding
+    return 'identity'
+
+
+def render_page(request, page_name, template_name, context):
+    """render() for a cacheable page: served from the page cache, rendered only on a miss"""
+    if not is_enabled() or request.method not in ('GET', 'HEAD'):
+        return render(request, template_name, context)
+
+    cache = get_cache()
+    key = cache_key(page_name, get_role(request), template_name)
+    entry = cache.get(key)
+    if entry is None:
+        response = render(request, template_name, context)
+        if response.status_code != 200:
+            return response
+        entry = build_entry(response)
+        cache.set(key, entry, timeout=get_timeout())
+
+    encoding = choose_encoding(request, entry)
+    # Strong ETag per representation
+    etag = f'"{entry["digest"]}"' if encoding == 'identity' else f'"{entry["digest"]}-{encoding}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(entry['last_modified']))
+    if response is None:
+        response = HttpResponse(entry['encodings'][encoding], content_type=entry['content_type'])
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    # Keyed by role, so shared caches must not store it
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Accept-Encoding', 'Cookie'])
+    return response
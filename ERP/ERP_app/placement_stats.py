@@ -0,0 +1,81 @@
+"""
+Cached placement statistics for the CRC portal.
+
+One grouped query over PlacementUpdate, annotated with its application
+counts, yields both the per-company numbers and (summed in Python) the
+status counters the dashboard shows. The result is cached under a version
+the signals bump on every PlacementUpdate or PlacementApplication save or
+delete, so the portal can poll it without touching the database.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .cache_versions import bump_version, get_version
+from .models import PlacementApplication, PlacementUpdate
+
+VERSION_KEY = 'placement_stats:version'
+
+COMPANY_STATUSES = [value for value, _ in PlacementUpdate._meta.get_field('status').choices]
+APPLICATION_STATUSES = [value for value, _ in PlacementApplication._meta.get_field('status').choices]
+
+
+def get_cache_timeout():
+    return getattr(settings, 'PLACEMENT_STATS_CACHE_TIMEOUT', 60 * 60)
+
+
+def build_stats():
+    """Status counters and per-company application counts, from a single query"""
+    companies = PlacementUpdate.objects.order_by().annotate(
+        applications_total=Count('applications'),
+        **{
+            f'applications_{status}': Count('applications', filter=Q(applications__status=status))
+            for status in APPLICATION_STATUSES
+        },
+    ).values('id', 'company_name', 'role', 'status', 'applications_total',
+             *[f'applications_{status}' for status in APPLICATION_STATUSES])
+
+    company_counts = dict.fromkeys(COMPANY_STATUSES, 0)
+    application_counts = dict.fromkeys(['total'] + APPLICATION_STATUSES, 0)
+    per_company = []
+    for row in companies:
+        company_counts[row['status']] = company_counts.get(row['status'], 0) + 1
+        counts = {'total': row['applications_total']}
+        counts.update({status: row[f'applications_{status}'] for status in APPLICATION_STATUSES})
+        for key, value in counts.items():
+            application_counts[key] += value
+        per_company.append({
+            'id': row['id'],
+            'company_name': row['company_name'],
+            'role': row['role'],
+            'status': row['status'],
+            'applications': counts,
+        })
+
+    return {
+        'companies': dict(company_counts, total=len(per_company)),
+        'applications': application_counts,
+        'per_company': per_company,
+    }
+
+
+def get_stats():
+    """Cache entry for the current version: the stats plus an ETag and Last-Modified for polling"""
+    version = get_version(VERSION_KEY)
+    key = f'placement_stats:{version}'
+    entry = cache.get(key)
+    if entry is None:
+        entry = {
+            'stats': build_stats(),
+            'etag': f'"{hashlib.sha1(str(version).encode()).hexdigest()}"',
+            'last_modified': timezone.now().replace(microsecond=0),
+        }
+        cache.set(key, entry, timeout=get_cache_timeout())
+    return entry
+
+
+def invalidate():
+    bump_version(VERSION_KEY)
@@ -0,0 +1,128 @@
+"""
+Request-scoped current profile.
+
+CurrentProfileMiddleware gives every request a lazy `request.profile`: the
+UserProfile (with .user loaded) of the signed-in user, or of the demo
+student account the student pages use while there is no student login. It is
+resolved on first access, so requests that never touch it cost nothing.
+
+Profiles come from the cache, one entry per user, so the student pages run no
+profile or user queries once it is warm; the demo accounts (and the demo
+student's profile) are only created (get_or_create) on a miss. The signals
+delete a user's entries when their User or UserProfile is saved or deleted;
+bulk writes that skip signals call invalidate_all(), which moves the version
+the keys carry.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .cache_versions import bump_version, get_version
+from .models import UserProfile
+
+VERSION_KEY = 'request_profile:version'
+
+# The demo student account used while the student pages have no login
+DEMO_USERNAME = 'student_user'
+DEMO_USER_DEFAULTS = {'email': 'student@university.edu'}
+DEMO_PROFILE_DEFAULTS = {
+    'enrollment_no': 'STU001',
+    'department': 'Computer Science',
+    'role': 'student',
+    'contact_no': '1234567890',
+}
+# The demo admin account approvals are recorded against
+DEMO_REVIEWER_USERNAME = 'admin_user'
+DEMO_REVIEWER_DEFAULTS = {'email': 'admin@university.edu'}
+
+
+def get_cache_timeout():
+    return getattr(settings, 'REQUEST_PROFILE_CACHE_TIMEOUT', 15 * 60)
+
+
+def _key(user_key):
+    return f'request_profile:{get_version(VERSION_KEY)}:{user_key}'
+
+
+def get_profile(user_id):
+    """The user's UserProfile with .user loaded, or None if they have none"""
+    key = _key(user_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = UserProfile.objects.select_related('user').filter(user_id=user_id).first()
+        if profile is None:
+            return None
+        cache.set(key, profile, timeout=get_cache_timeout())
+    return profile
+
+
+def get_demo_user_id(username, defaults):
+    """Id of a demo account (get_or_create'd on a cache miss)"""
+    key = _key(f'username:{username}')
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = User.objects.get_or_create(username=username, defaults=defaults)[0].pk
+        cache.set(key, user_id, timeout=get_cache_timeout())
+    return user_id
+
+
+def get_demo_profile():
+    """The demo student's profile, creating the account on first use"""
+    user_id = get_demo_user_id(DEMO_USERNAME, DEMO_USER_DEFAULTS)
+    profile = get_profile(user_id)
+    if profile is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            # Deleted since its id was cached
+            cache.delete(_key(f'username:{DEMO_USERNAME}'))
+            return get_demo_profile()
+        profile, _ = UserProfile.objects.get_or_create(user=user, defaults=DEMO_PROFILE_DEFAULTS)
+        profile.user = user
+        cache.set(_key(user.pk), profile, timeout=get_cache_timeout())
+    return profile
+
+
+def get_reviewer_id(request):
+    """The signed-in user, or the demo admin account the review pages use while they have no login"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return get_demo_user_id(DEMO_REVIEWER_USERNAME, DEMO_REVIEWER_DEFAULTS)
+
+
+def get_student_id(request):
+    """User id of request.profile without loading the demo student's profile"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and get_profile(user.pk) is not None:
+        return user.pk
+    return get_demo_user_id(DEMO_USERNAME, DEMO_USER_DEFAULTS)
+
+
+def resolve(request):
+    """The signed-in user's profile, else the demo student's"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        profile = get_profile(user.pk)
+        if profile is not None:
+            return profile
+    return get_demo_profile()
+
+
+def invalidate(user_id, username=None):
+    cache.delete_many([_key(user_id)] + ([_key(f'username:{username}')] if username else []))
+
+
+def invalidate_all():
+    bump_version(VERSION_KEY)
+
+
+class CurrentProfileMiddleware:
+    """Sets a lazy request.profile; must come after AuthenticationMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: resolve(request))
+        return self.get_response(request)
@@ -0,0 +1,143 @@
+"""
+Bulk review of application requests and placement drives.
+
+review() applies one action (approve, reject, ...) to a list of ids:
+
+1. the rows are locked with SELECT ... FOR UPDATE and their current status
+   read, in one query;
+2. the ids whose status allows the action get one queryset.update() that
+   sets the new status, the reviewer and the review time; the update also
+   filters on the allowed statuses, so a row approved meanwhile is never
+   approved twice;
+3. one ReviewAuditEntry per changed row is written with bulk_create.
+
+All of it runs in one transaction. Every id gets an outcome: 'updated',
+'not_found', or 'skipped' with its current status when the action does not
+apply (e.g. approving an approved request).
+
+queryset.update() sends no signals, so the caches the PlacementUpdate signals
+would have invalidated are invalidated here, the leave calendar is updated,
+and approved application requests get their PDF generation queued (one job
+per call) once the transaction commits.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import documents, eligibility, leaves, placement_stats
+from .models import ApplicationRequest, PlacementUpdate, ReviewAuditEntry
+
+# Most ids accepted by one review() call
+MAX_IDS = 500
+
+Action = namedtuple('Action', 'from_statuses new_status')
+Target = namedtuple('Target', 'model reviewer_field reviewed_at_field notes_field actions')
+
+TARGETS = {
+    'application_request': Target(
+        ApplicationRequest, 'reviewed_by', 'reviewed_at', 'admin_notes', {
+            'approve': Action(('pending', 'in_process'), 'approved'),
+            'reject': Action(('pending', 'in_process'), 'rejected'),
+            'in_process': Action(('pending',), 'in_process'),
+        },
+    ),
+    'placement_update': Target(
+        PlacementUpdate, 'approved_by', 'approved_at', None, {
+            'approve': Action(('pending', 'rejected'), 'approved'),
+            'reject': Action(('pending', 'approved'), 'rejected'),
+        },
+    ),
+}
+
+
+class ReviewError(ValueError):
+    pass
+
+
+def parse_ids(values):
+    """De-duplicated integer ids from a list, in the given order; raises ReviewError"""
+    if not isinstance(values, (list, tuple)):
+        raise ReviewError('ids must be a list')
+    ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ReviewError(f'Invalid id: {value!r}')
+        try:
+            ids.append(int(value))
+        except ValueError:
+            raise ReviewError(f'Invalid id: {value!r}')
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ReviewError('No ids given')
+    if len(ids) > MAX_IDS:
+        raise ReviewError(f'At most {MAX_IDS} ids per request')
+    return ids
+
+
+def review(target_type, ids, action, reviewer_id, notes=None):
+    """Apply `action` to the `target_type` rows with these ids (see module docstring).
+
+    Returns [{'id', 'outcome', 'status'}] in the order of `ids`.
+    """
+    target = TARGETS.get(target_type)
+    if target is None:
+        raise ReviewError(f'Unknown review target "{target_type}"')
+    if not isinstance(action, str) or action not in target.actions:
+        raise ReviewError(f'Unknown action "{action}"; choose from: {", ".join(target.actions)}')
+    from_statuses, new_status = target.actions[action]
+    model = target.model
+
+    now = timezone.now()
+    with transaction.atomic():
+        current = dict(
+            model.objects.select_for_update().filter(pk__in=ids).order_by().values_list('pk', 'status')
+        )
+        to_update = [pk for pk in ids if current.get(pk) in from_statuses]
+        changes = {
+            'status': new_status,
+            f'{target.reviewer_field}_id': reviewer_id,
+            target.reviewed_at_field: now,
+        }
+        if target.notes_field and notes is not None:
+            changes[target.notes_field] = notes
+        if to_update:
+            count = model.objects.filter(pk__in=to_update, status__in=from_statuses).update(**changes)
+            if count != len(to_update):
+                # Lost a race on a backend without row locks (SQLite): audit only the rows this update changed
+                changed = set(model.objects.filter(
+                    pk__in=to_update, status=new_status, **{target.reviewed_at_field: now},
+                ).values_list('pk', flat=True))
+                to_update = [pk for pk in to_update if pk in changed]
+        ReviewAuditEntry.objects.bulk_create([
+            ReviewAuditEntry(
+                target_type=target_type,
+                target_id=pk,
+                action=action,
+                previous_status=current[pk],
+                new_status=new_status,
+                reviewer_id=reviewer_id,
+                notes=notes,
+            )
+            for pk in to_update
+        ])
+        if to_update and model is ApplicationRequest:
+            leaves.sync(to_update)
+        if to_update and model is ApplicationRequest and new_status == 'approved':
+            approved_ids = list(to_update)
+            transaction.on_commit(lambda: documents.queue_generation(approved_ids))
+
+    if to_update and model is PlacementUpdate:
+        eligibility.invalidate()
+        placement_stats.invalidate()
+
+    updated = set(to_update)
+    results = []
+    for pk in ids:
+        if pk in updated:
+            results.append({'id': pk, 'outcome': 'updated', 'status': new_status})
+        elif pk in current:
+            results.append({'id': pk, 'outcome': 'skipped', 'status': current[pk]})
+        else:
+            results.append({'id': pk, 'outcome': 'not_found', 'status': None})
+    return results
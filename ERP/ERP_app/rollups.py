@@ -0,0 +1,151 @@
+"""
+Attendance rollup maintenance.
+
+AttendanceDailyRollup keeps present/absent/late counts per
+date x course section (school, department, year, section, course) x faculty,
+and AttendanceRosterEntry keeps the distinct students of each bucket, so the
+dashboards never have to scan the raw AttendanceRecord table.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import AttendanceDailyRollup, AttendanceRecord, AttendanceRosterEntry
+
+BUCKET_FIELDS = ('course_section_id', 'faculty_id')
+
+STATUS_COUNT_FIELDS = {
+    AttendanceRecord.PRESENT: 'present_count',
+    AttendanceRecord.ABSENT: 'absent_count',
+    AttendanceRecord.LATE: 'late_count',
+}
+
+
+def bucket_of(record):
+    """Rollup key (date + bucket dimensions) for an attendance record"""
+    return (record.date,) + tuple(getattr(record, field) for field in BUCKET_FIELDS)
+
+
+def apply_records(records, sign=1):
+    """Add (sign=1) or remove (sign=-1) attendance records from the rollup tables.
+
+    Used by the AttendanceRecord signals for single rows and called directly by
+    bulk write paths, since bulk_create() does not send signals. Removals must run
+    after the records are gone from AttendanceRecord, so the roster can tell which
+    students no longer have any record in a bucket.
+    """
+    deltas = defaultdict(Counter)
+    roster = set()
+    for record in records:
+        key = bucket_of(record)
+        deltas[key][record.status] += sign
+        deltas[key]['total'] += sign
+        roster.add(key[1:] + (record.student_id,))
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        if sign > 0:
+            # Create missing buckets empty; one a concurrent import created meanwhile is a
+            # conflict on the unique constraints (NULL faculty included) and is left alone
+            AttendanceDailyRollup.objects.bulk_create([
+                AttendanceDailyRollup(**dict(zip(('date',) + BUCKET_FIELDS, key))) for key in deltas
+            ], ignore_conflicts=True)
+
+        candidates = AttendanceDailyRollup.objects.filter(
+            date__in={key[0] for key in deltas},
+            course_section_id__in={key[1] for key in deltas},
+        ).only('date', 'course_section', 'faculty')
+        rollups = [rollup for rollup in candidates if bucket_of(rollup) in deltas]
+
+        # Relative updates (n = MAX(n + delta, 0)), so concurrent writers cannot lose a count
+        now = timezone.now()
+        for rollup in rollups:
+            counts = deltas[bucket_of(rollup)]
+            for status, field in STATUS_COUNT_FIELDS.items():
+                setattr(rollup, field, Greatest(F(field) + counts[status], Value(0)))
+            rollup.total_count = Greatest(F('total_count') + counts['total'], Value(0))
+            rollup.updated_at = now
+        AttendanceDailyRollup.objects.bulk_update(
+            rollups, list(STATUS_COUNT_FIELDS.values()) + ['total_count', 'updated_at']
+        )
+
+        roster_fields = BUCKET_FIELDS + ('student_id',)
+        if sign > 0:
+            known = AttendanceRosterEntry.objects.filter(
+                course_section_id__in={entry[0] for entry in roster},
+            ).values_list(*roster_fields)
+            roster.difference_update(known)
+            AttendanceRosterEntry.objects.bulk_create([
+                AttendanceRosterEntry(**dict(zip(roster_fields, entry))) for entry in roster
+            ], ignore_conflicts=True)
+        else:
+            # A student leaves the roster with their last record in the bucket, on any date
+            remaining = AttendanceRecord.objects.filter(
+                course_section_id__in={entry[0] for entry in roster},
+                student_id__in={entry[2] for entry in roster},
+            ).order_by().values_list(*roster_fields).distinct()
+            roster.difference_update(remaining)
+            if roster:
+                stale = Q()
+                for entry in roster:
+                    stale |= Q(**dict(zip(roster_fields, entry)))
+                AttendanceRosterEntry.objects.filter(stale).delete()
+
+
+def rebuild(batch_size=1000):
+    """Recompute both rollup tables from AttendanceRecord. Returns (rollups, roster entries)"""
+    group_fields = ('date', 'course_section', 'faculty')
+    roster_fields = ('course_section', 'faculty', 'student')
+
+    with transaction.atomic():
+        AttendanceDailyRollup.objects.all().delete()
+        AttendanceRosterEntry.objects.all().delete()
+
+        groups = AttendanceRecord.objects.order_by().values(*group_fields).annotate(
+            present_count=Count('id', filter=Q(status=AttendanceRecord.PRESENT)),
+            absent_count=Count('id', filter=Q(status=AttendanceRecord.ABSENT)),
+            late_count=Count('id', filter=Q(status=AttendanceRecord.LATE)),
+            total_count=Count('id'),
+        )
+        rollup_count = _bulk_insert(
+            AttendanceDailyRollup,
+            (_fk_ids(row, ('course_section', 'faculty')) for row in groups.iterator()),
+            batch_size,
+        )
+
+        entries = AttendanceRecord.objects.order_by().values(*roster_fields).distinct()
+        roster_count = _bulk_insert(
+            AttendanceRosterEntry,
+            (_fk_ids(row, ('course_section', 'faculty', 'student')) for row in entries.iterator()),
+            batch_size,
+        )
+
+    return rollup_count, roster_count
+
+
+def _fk_ids(row, fk_fields):
+    """Rename values() foreign-key columns to their *_id attribute names"""
+    for field in fk_fields:
+        row[f'{field}_id'] = row.pop(field)
+    return row
+
+
+def _bulk_insert(model, rows, batch_size):
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(model(**row))
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
+
@@ -0,0 +1,455 @@
+"""
+Admin search index.
+
+SearchEntry keeps one normalized document per searchable thing (student, HOD,
+department, college) so the admin search box never runs icontains scans over
+UserProfile. search_all() fetches the best candidates of every kind with a
+single ranked query, plus one fuzzy query when nothing matches as typed:
+
+* SQLite: FTS5 table with the trigram tokenizer, kept in sync with
+  SearchEntry by triggers (migration 0006), ranked by bm25.
+* PostgreSQL: pg_trgm GIN index on SearchEntry.document, ranked by
+  word_similarity().
+* Other backends: plain substring match, no fuzzy pass.
+
+Enrollment-number-like queries are first tried as a prefix of the indexed
+SearchEntry.code column, which trigram indexes handle poorly (long runs of
+the same few digits).
+
+Candidates are then re-scored in Python: exact, prefix and substring matches
+come first, then values whose words are prefixed by, one typo away from or
+share most trigrams with the query words.
+"""
+import json
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+
+from . import org_matching
+from .models import CourseSection, SearchEntry, UserProfile
+
+FTS_TABLE = 'ERP_app_searchentry_fts'
+
+# API result key for each entry kind, in response order
+RESULT_KEYS = {
+    'student': 'students',
+    'department': 'departments',
+    'hod': 'hods',
+    'college': 'colleges',
+}
+
+# Payload values each kind is matched and re-scored on
+MATCH_FIELDS = {
+    'student': ['enrollment_no', 'name', 'contact'],
+    'hod': ['name', 'department'],
+    'department': ['department'],
+    'college': ['college_name'],
+}
+
+# Candidates fetched per kind for every result returned
+CANDIDATE_FACTOR = 5
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(value):
+    """Lowercase, accent-free, single-spaced text"""
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return ' '.join(value.lower().split())
+
+
+def trigrams(value):
+    """pg_trgm style trigrams: every word padded with two leading and one trailing space"""
+    grams = set()
+    for word in _WORD_RE.findall(normalize(value)):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def get_min_similarity(value=None):
+    if value not in (None, ''):
+        return float(value)
+    return float(getattr(settings, 'ADMIN_SEARCH_MIN_SIMILARITY', 0.5))
+
+
+def similarity(value, query):
+    """Score in [0, 1]: exact > prefix > substring > every query word found, prefixed or one typo away"""
+    value = normalize(value)
+    if not value or not query:
+        return 0.0
+    if value == query:
+        return 1.0
+    if value.startswith(query):
+        return 0.95
+    if query in value:
+        return 0.85
+    words = value.split()
+    scores = [_word_similarity(word, words) for word in query.split()]
+    return 0.8 * sum(scores) / len(scores)
+
+
+def _word_similarity(word, candidates):
+    best = 0.0
+    grams = trigrams(word)
+    for candidate in candidates:
+        if word in candidate:
+            return 1.0
+        if len(word) >= 4 and _within_one_edit(word, candidate):
+            best = max(best, 0.9)
+        elif grams:
+            best = max(best, len(grams & trigrams(candidate)) / len(grams))
+    return best
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by one insertion, deletion, substitution or adjacent swap"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    return a[i + 1:] == b[i:] if len(a) > len(b) else a[i:] == b[i + 1:]
+
+
+# ==================== INDEX MAINTENANCE ====================
+
+def _department_key(department, school):
+    return f'{department}\x1f{school or ""}'
+
+
+def build_entries(profile):
+    """SearchEntry field dicts for a profile-like row.
+
+    `profile` is a dict with the UserProfile fields plus first_name and
+    last_name, so the same code serves signals and rebuild(). Migration 0006
+    keeps its own frozen copy.
+    """
+    entries = []
+    name = f"{profile.get('first_name') or ''} {profile.get('last_name') or ''}"
+    role = profile.get('role')
+
+    if role == 'student':
+        payload = {
+            'enrollment_no': profile.get('enrollment_no'),
+            'name': name,
+            'contact': profile.get('contact_no'),
+            'department': profile.get('department'),
+        }
+    elif role == 'hod':
+        payload = {
+            'name': name,
+            'department': profile.get('department'),
+            'contact': profile.get('contact_no'),
+        }
+    else:
+        payload = None
+    if payload is not None:
+        entries.append({
+            'kind': role,
+            'key': str(profile['id']),
+            'profile_id': profile['id'],
+            'code': normalize(profile.get('enrollment_no')) if role == 'student' else '',
+            'document': normalize(' '.join(str(payload[f] or '') for f in MATCH_FIELDS[role])),
+            'payload': payload,
+        })
+
+    if profile.get('department'):
+        entries.append({
+            'kind': 'department',
+            'key': _department_key(profile['department'], profile.get('school')),
+            'profile_id': None,
+            'code': '',
+            'document': normalize(profile['department']),
+            'payload': {'department': profile['department'], 'school': profile.get('school')},
+        })
+    if profile.get('college_name'):
+        entries.append({
+            'kind': 'college',
+            'key': profile['college_name'],
+            'profile_id': None,
+            'code': '',
+            'document': normalize(profile['college_name']),
+            'payload': {'college_name': profile['college_name']},
+        })
+    return entries
+
+
+def profile_row(profile):
+    """build_entries() input for a UserProfile instance"""
+    row = {field.attname: getattr(profile, field.attname) for field in UserProfile._meta.concrete_fields}
+    row['first_name'] = profile.user.first_name
+    row['last_name'] = profile.user.last_name
+    return row
+
+
+def index_profile(profile, previous=None):
+    """Upsert the entries of a saved profile; `previous` is its profile_row() before the save"""
+    entries = build_entries(profile_row(profile))
+    with transaction.atomic():
+        SearchEntry.objects.filter(profile=profile).exclude(
+            kind__in=[e['kind'] for e in entries if e['profile_id']],
+        ).delete()
+        for entry in entries:
+            SearchEntry.objects.update_or_create(
+                kind=entry['kind'], key=entry['key'],
+                defaults={k: entry[k] for k in ('profile_id', 'code', 'document', 'payload')},
+            )
+        if previous:
+            prune_shared_entries(previous)
+
+
+def unindex_profile(profile):
+    """Tidy up after a deleted profile; its own entry already went with the FK cascade"""
+    prune_shared_entries(profile_row(profile))
+
+
+def prune_shared_entries(row):
+    """Remove department/college entries no profile refers to any more"""
+    if row.get('department') and not UserProfile.objects.filter(
+            department=row['department'], school=row.get('school')).exists():
+        SearchEntry.objects.filter(
+            kind='department', key=_department_key(row['department'], row.get('school')),
+        ).delete()
+    if row.get('college_name') and not UserProfile.objects.filter(college_name=row['college_name']).exists():
+        SearchEntry.objects.filter(kind='college', key=row['college_name']).delete()
+
+
+def rebuild(batch_size=1000):
+    """Recreate every SearchEntry from UserProfile. Returns the number of entries"""
+    fields = [field.attname for field in UserProfile._meta.concrete_fields]
+    rows = UserProfile.objects.order_by('pk').values(
+        *fields, 'user__first_name', 'user__last_name',
+    )
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        entries = {}
+        for row in rows.iterator(chunk_size=batch_size):
+            row['first_name'] = row.pop('user__first_name')
+            row['last_name'] = row.pop('user__last_name')
+            for entry in build_entries(row):
+                entries.setdefault((entry['kind'], entry['key']), entry)
+        SearchEntry.objects.bulk_create(
+            (SearchEntry(**entry) for entry in entries.values()), batch_size=batch_size,
+        )
+    return len(entries)
+
+
+# ==================== QUERYING ====================
+
+_fts_available = {}
+
+
+def get_backend(using='default'):
+    """'fts5', 'trigram' or 'like' for the given database alias"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return 'trigram'
+    if connection.vendor == 'sqlite':
+        if using not in _fts_available:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_available[using] = cursor.fetchone() is not None
+        if _fts_available[using]:
+            return 'fts5'
+    return 'like'
+
+
+def is_code_like(query):
+    """Single token containing a digit: treated as an enrollment number"""
+    return ' ' not in query and any(c.isdigit() for c in query)
+
+
+def fts_match_expression(query, fuzzy=False):
+    """FTS5 MATCH string for the query's words of 3+ characters, or None if there are none.
+
+    Exact: every word must occur as a substring. Fuzzy: any piece of any word
+    may occur; long words are split around their middle character so one typo
+    leaves a piece intact, short words fall back to their trigrams.
+    """
+    words = [word for word in query.split() if len(word) >= 3]
+    if not words:
+        return None
+    if not fuzzy:
+        return ' AND '.join(_fts_phrase(word) for word in words)
+    pieces = []
+    for word in words:
+        if len(word) >= 7:
+            middle = len(word) // 2
+            pieces.extend([word[:middle], word[middle + 1:]])
+        else:
+            pieces.extend(word[i:i + 3] for i in range(len(word) - 2))
+    return ' OR '.join(_fts_phrase(piece) for piece in dict.fromkeys(pieces))
+
+
+def _fts_phrase(text):
+    return '"{}"'.format(text.replace('"', '""'))
+
+
+def _like(text):
+    return '%{}%'.format(text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+
+
+def _candidates(query, per_kind, fuzzy=False, using='default'):
+    """(kind, payload) rows: the `per_kind` best matches of each kind, from one query"""
+    connection = connections[using]
+    backend = get_backend(using)
+    entry_table = connection.ops.quote_name(SearchEntry._meta.db_table)
+    words = query.split()
+    all_words_like = ' AND '.join(["e.document LIKE %s ESCAPE '\\'"] * len(words))
+    like_params = [_like(word) for word in words]
+
+    if backend == 'fts5':
+        match = fts_match_expression(query, fuzzy)
+        if match:
+            fts_table = connection.ops.quote_name(FTS_TABLE)
+            sql = _ranked_sql(f'{fts_table} f JOIN {entry_table} e ON e.id = f.rowid',
+                              f'{fts_table} MATCH %s', 'f.rank')
+            params = [match, per_kind]
+        elif fuzzy:
+            return []
+        else:
+            # Words too short for trigrams: scan, stopping at per_kind rows of each kind
+            sql, params = _per_kind_sql(entry_table, all_words_like, like_params, per_kind)
+    elif backend == 'trigram':
+        if fuzzy:
+            where, params = '%s <%% e.document', [query]
+        else:
+            where, params = all_words_like, like_params
+        sql = _ranked_sql(f'{entry_table} e', where, 'word_similarity(%s, e.document) DESC')
+        params = [query] + params + [per_kind]
+    elif fuzzy:
+        return []
+    else:
+        sql, params = _per_kind_sql(entry_table, all_words_like, like_params, per_kind)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            (kind, payload if isinstance(payload, dict) else json.loads(payload))
+            for kind, payload in cursor.fetchall()
+        ]
+
+
+def _ranked_sql(source, where, order):
+    return f"""
+        SELECT kind, payload FROM (
+            SELECT e.kind, e.payload, ROW_NUMBER() OVER (PARTITION BY e.kind ORDER BY {order}) AS position
+            FROM {source}
+            WHERE {where}
+        ) ranked WHERE position <= %s
+    """
+
+
+def _per_kind_sql(entry_table, where, params, per_kind):
+    parts = [
+        f'SELECT * FROM (SELECT e.kind, e.payload FROM {entry_table} e WHERE e.kind = %s AND {where} LIMIT %s)'
+        for _ in RESULT_KEYS
+    ]
+    all_params = []
+    for kind in RESULT_KEYS:
+        all_params.extend([kind] + params + [per_kind])
+    return ' UNION ALL '.join(parts), all_params
+
+
+def _code_candidates(query, per_kind, using='default'):
+    """Students whose enrollment number starts with the query, through the `code` index"""
+    entries = SearchEntry.objects.using(using).filter(
+        code__gte=query, code__lt=query + '\uffff',
+    ).order_by('code').values_list('kind', 'payload')[:per_kind]
+    return list(entries)
+
+
+def search_all(query, limit=10, min_similarity=None, using='default'):
+    """Admin search results: {'students': [...], 'departments': [...], 'hods': [...], 'colleges': [...]}"""
+    results = {key: [] for key in RESULT_KEYS.values()}
+    query = normalize(query)
+    if not query:
+        return results
+
+    threshold = get_min_similarity(min_similarity)
+    scored = {kind: [] for kind in RESULT_KEYS}
+    per_kind = limit * CANDIDATE_FACTOR
+    candidates = []
+    if is_code_like(query):
+        # Looks like an enrollment number: exact/prefix through the code index
+        candidates = _code_candidates(query, per_kind, using)
+    # Then substring matches; only a query that matches nothing pays for the fuzzy pass
+    if not candidates:
+        candidates = _candidates(query, per_kind, using=using)
+    if not candidates:
+        candidates = _candidates(query, per_kind, fuzzy=True, using=using)
+
+    for position, (kind, payload) in enumerate(candidates):
+        score = max(similarity(payload.get(field), query) for field in MATCH_FIELDS[kind])
+        if score >= threshold:
+            scored[kind].append((-score, position, payload))
+
+    for kind, key in RESULT_KEYS.items():
+        results[key] = [payload for _, _, payload in sorted(scored[kind], key=lambda s: s[:2])[:limit]]
+    return results
+
+
+# ==================== ATTENDANCE SEARCH ====================
+
+def matching_entries(query, kind, using='default'):
+    """Every SearchEntry of `kind` whose document contains all words of the query.
+
+    Unlike search_all() this is unranked and unbounded, meant to be used as a
+    subquery. Enrollment-number-like queries also match by code prefix.
+    """
+    query = normalize(query)
+    entries = SearchEntry.objects.using(using).filter(kind=kind)
+    if not query:
+        return entries.none()
+
+    match = fts_match_expression(query) if get_backend(using) == 'fts5' else None
+    if match:
+        fts_table = connections[using].ops.quote_name(FTS_TABLE)
+        condition = Q(id__in=RawSQL(f'SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH %s', [match]))
+    else:
+        condition = Q()
+        for word in query.split():
+            condition &= Q(document__contains=word)
+    if is_code_like(query):
+        condition |= Q(code__gte=query, code__lt=query + '\uffff')
+    return entries.filter(condition)
+
+
+def attendance_search_targets(query, using='default'):
+    """Students and course sections a dashboard search term refers to.
+
+    Students are resolved through the search index (enrollment number prefix,
+    name, contact). Course sections are resolved through indexed columns only:
+    the School / Department rows the term names (matched on normalized names
+    and abbreviations by org_matching) select sections by their school and
+    department keys, and the lowercased recorded names, which have expression
+    indexes, are prefix-matched for sections no row was linked to. Attendance
+    rows are then only ever reached through the (student, date) and
+    (course_section, date) indexes. Returns (student user id subquery or None
+    if no student matched, list of course section ids).
+    """
+    students = matching_entries(query, 'student', using).values('profile__user_id')
+
+    matcher = org_matching.get_matcher()
+    condition = Q(department_id__in=matcher.department_ids(query))
+    school_id = matcher.school_id(query)
+    if school_id is not None:
+        condition |= Q(school_id=school_id)
+    prefix = query.strip().lower()
+    if prefix:
+        # A range, not LIKE, so the expression indexes serve it on every backend
+        condition |= Q(department_key__gte=prefix, department_key__lt=prefix + '\U0010ffff')
+        condition |= Q(school_key__gte=prefix, school_key__lt=prefix + '\U0010ffff')
+    course_sections = list(CourseSection.objects.using(using).alias(
+        department_key=Lower('department_name'), school_key=Lower('school_name'),
+    ).filter(condition).order_by().values_list('id', flat=True))
+    return (students if students.exists() else None), course_sections
@@ -0,0 +1,67 @@
+"""
+Set-based attendance shortage detection.
+
+The present/total ratio is computed and compared to the threshold in SQL
+(GROUP BY student ... HAVING), so only the students below the threshold ever
+leave the database. Records on a day the student had approved leave do not
+count towards the percentage; each row reports them as leave_classes.
+"""
+from django.conf import settings
+from django.db.models import Count, F, FloatField, Q, Value
+from django.db.models.functions import Cast, Round
+
+from . import leaves
+from .models import AttendanceRecord
+
+STUDENT_FIELDS = ['student', 'enrollment_no', 'student_name']
+
+
+def get_shortage_threshold(value=None):
+    """Threshold in percent: explicit value, else ATTENDANCE_SHORTAGE_THRESHOLD, else 75"""
+    if value not in (None, ''):
+        return float(value)
+    return float(getattr(settings, 'ATTENDANCE_SHORTAGE_THRESHOLD', 75))
+
+
+def shortage_queryset(records=None, threshold=None, extra_fields=(), course=None,
+                      date_from=None, date_to=None, per_course=False, exclude_leave=True):
+    """Students whose attendance percentage is below the threshold.
+
+    Each row has the student fields, any `extra_fields`, present, total and
+    percentage, lowest percentage first. `course` and `date_from`/`date_to`
+    narrow the records considered; `per_course=True` reports one row per
+    student and course instead of one per student. With `exclude_leave=False`
+    approved-leave days count like any other (leave_classes is then 0).
+    """
+    if records is None:
+        records = AttendanceRecord.objects.all()
+    if course:
+        records = records.legacy_filter(course=course)
+    if date_from:
+        records = records.filter(date__gte=date_from)
+    if date_to:
+        records = records.filter(date__lte=date_to)
+
+    fields = STUDENT_FIELDS + [f for f in extra_fields if f not in STUDENT_FIELDS]
+    if per_course and 'course' not in fields:
+        fields.append('course')
+
+    present = Q(status=AttendanceRecord.PRESENT)
+    if exclude_leave:
+        records = leaves.annotate_on_leave(records)
+        counts = {
+            'total': Count('id', filter=Q(on_leave=False)),
+            'present': Count('id', filter=present & Q(on_leave=False)),
+            'leave_classes': Count('id', filter=Q(on_leave=True)),
+        }
+    else:
+        counts = {'total': Count('id'), 'present': Count('id', filter=present), 'leave_classes': Value(0)}
+
+    return records.order_by().legacy_values(*fields).annotate(**counts).alias(
+        ratio=Cast(F('present'), FloatField()) * 100.0 / F('total'),
+    ).filter(
+        total__gt=0,
+        ratio__lt=get_shortage_threshold(threshold),
+    ).annotate(
+        percentage=Round(F('ratio'), 2),
+    ).order_by('percentage', 'enrollment_no')
@@ -0,0 +1,343 @@
+"""
+Signal receivers for ERP_app, connected in ErpAppConfig.ready().
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, documents, eligibility, leaves, org_matching, placement_stats, profiles, rollups, search, structure
+from .models import (
+    ApplicationRequest, AttendanceRecord, Department, FacultyMember, PlacementApplication, PlacementUpdate, Program, School, UserProfile,
+)
+
+
+# ==================== ATTENDANCE ROLLUPS ====================
+
+@receiver(pre_save, sender=AttendanceRecord)
+def remember_previous_attendance(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of an edited record so its old bucket can be decremented"""
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = AttendanceRecord.objects.filter(pk=instance.pk).first()
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def update_attendance_rollup(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is not None:
+        rollups.apply_records([previous], sign=-1)
+    rollups.apply_records([instance])
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def remove_from_attendance_rollup(sender, instance, **kwargs):
+    rollups.apply_records([instance], sign=-1)
+
+
+# ==================== ADMIN SEARCH INDEX ====================
+
+@receiver(pre_save, sender=UserProfile)
+def remember_previous_profile(sender, instance, raw=False, **kwargs):
+    """Keep the stored department/college so entries nobody uses any more can be pruned"""
+    instance._search_previous = None
+    if instance.pk and not raw:
+        instance._search_previous = UserProfile.objects.filter(pk=instance.pk).values().first()
+
+
+@receiver(post_save, sender=UserProfile)
+def update_profile_search_entries(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_profile(instance, previous=getattr(instance, '_search_previous', None))
+
+
+@receiver(post_delete, sender=UserProfile)
+def remove_profile_search_entries(sender, instance, **kwargs):
+    search.unindex_profile(instance)
+
+
+@receiver(post_save, sender=User)
+def update_user_search_entries(sender, instance, created, raw=False, **kwargs):
+    """Names live on User, so renaming a user re-indexes their profile"""
+    if raw or created:
+        return
+    profile = UserProfile.objects.filter(user=instance).first()
+    if profile is not None:
+        profile.user = instance
+        search.index_profile(profile)
+
+
+# ==================== UNIVERSITY STRUCTURE CACHE ====================
+
+def invalidate_university_structure(sender, **kwargs):
+    structure.invalidate()
+
+
+for model in structure.STRUCTURE_MODELS:
+    post_save.connect(invalidate_university_structure, sender=model, dispatch_uid=f'structure_save_{model.__name__}')
+    post_delete.connect(invalidate_university_structure, sender=model, dispatch_uid=f'structure_delete_{model.__name__}')
+
+
+# ==================== PLACEMENT ELIGIBILITY ====================
+
+@receiver(pre_save, sender=PlacementUpdate)
+def parse_placement_branches(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Resolve branches_allowed to departments; the many-to-many is written after the save"""
+    instance._branch_ids = None
+    if raw or (update_fields is not None and 'branches_allowed' not in update_fields):
+        return
+    dept_ids, instance.all_branches, _ = eligibility.parse_branches(
+        instance.branches_allowed, org_matching.get_matcher(),
+    )
+    instance._branch_ids = dept_ids
+
+
+@receiver(post_save, sender=PlacementUpdate)
+def update_placement_branches(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if getattr(instance, '_branch_ids', None) is not None:
+        if update_fields is not None and 'all_branches' not in update_fields:
+            PlacementUpdate.objects.filter(pk=instance.pk).update(all_branches=instance.all_branches)
+        instance.branches.set(instance._branch_ids)
+    eligibility.invalidate()
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_eligibility_for_profile(sender, instance, created, raw=False, **kwargs):
+    """Only edits to role, department or CGPA change who is eligible"""
+    if raw:
+        return
+    previous = getattr(instance, '_search_previous', None)  # stored by remember_previous_profile
+    if created or previous is None or any(
+        previous[field] != getattr(instance, field) for field in eligibility.PROFILE_FIELDS
+    ):
+        eligibility.invalidate()
+
+
+def invalidate_placement_eligibility(sender, **kwargs):
+    eligibility.invalidate()
+
+
+post_delete.connect(invalidate_placement_eligibility, sender=PlacementUpdate, dispatch_uid='eligibility_drive_delete')
+post_delete.connect(invalidate_placement_eligibility, sender=UserProfile, dispatch_uid='eligibility_profile_delete')
+post_save.connect(invalidate_placement_eligibility, sender=Department, dispatch_uid='eligibility_department_save')
+post_delete.connect(invalidate_placement_eligibility, sender=Department, dispatch_uid='eligibility_department_delete')
+m2m_changed.connect(invalidate_placement_eligibility, sender=PlacementUpdate.branches.through,
+                    dispatch_uid='eligibility_branches_changed')
+
+
+# ==================== PLACEMENT STATISTICS ====================
+
+def invalidate_placement_stats(sender, **kwargs):
+    placement_stats.invalidate()
+
+
+for model in (PlacementUpdate, PlacementApplication):
+    post_save.connect(invalidate_placement_stats, sender=model, dispatch_uid=f'placement_stats_save_{model.__name__}')
+    post_delete.connect(invalidate_placement_stats, sender=model, dispatch_uid=f'placement_stats_delete_{model.__name__}')
+
+
+# ==================== STRUCTURE COUNTERS ====================
+
+@receiver(pre_save, sender=School)
+@receiver(pre_save, sender=Department)
+def keep_stored_counters(sender, instance, raw=False, **kwargs):
+    """save() writes every column, so carry over the stored counters instead of the in-memory
+    (possibly stale) ones; also keep the previous names and, for departments, the previous school"""
+    instance._counter_previous = None
+    if instance.pk is None or raw:
+        return
+    fields = ('name', 'short_name') + (
+        counters.SCHOOL_COUNTERS if sender is School else counters.DEPARTMENT_COUNTERS + ('school_id',)
+    )
+    previous = sender.objects.select_related(None).filter(pk=instance.pk).values(*fields).first()
+    if previous is not None:
+        for field in counters.SCHOOL_COUNTERS if sender is School else counters.DEPARTMENT_COUNTERS:
+            setattr(instance, field, previous[field])
+    instance._counter_previous = previous
+
+
+@receiver(post_save, sender=Department)
+def count_department(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_counter_previous', None)
+    with transaction.atomic():
+        if created:
+            counters.adjust(School.objects.filter(pk=instance.school_id), department_count=1)
+        elif previous is not None and previous['school_id'] != instance.school_id:
+            counters.move(School, previous['school_id'], instance.school_id,
+                          department_count=1, program_count=instance.program_count)
+
+
+@receiver(post_delete, sender=Department)
+def uncount_department(sender, instance, **kwargs):
+    # Its programs were deleted first and took their own counts with them
+    counters.adjust(School.objects.filter(pk=instance.school_id), department_count=-1)
+
+
+@receiver(pre_save, sender=Program)
+@receiver(pre_save, sender=FacultyMember)
+def remember_previous_department(sender, instance, raw=False, **kwargs):
+    instance._counter_department_id = None
+    if instance.pk and not raw:
+        instance._counter_department_id = sender.objects.select_related(None).filter(
+            pk=instance.pk,
+        ).values_list('department_id', flat=True).first()
+
+
+@receiver(post_save, sender=Program)
+def count_program(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_id = getattr(instance, '_counter_department_id', None)
+    with transaction.atomic():
+        if created:
+            counters.adjust(Department.objects.filter(pk=instance.department_id), program_count=1)
+            counters.adjust(counters.schools_of(instance.department_id), program_count=1)
+        elif previous_id is not None and previous_id != instance.department_id:
+            counters.move(Department, previous_id, instance.department_id, program_count=1)
+            counters.adjust(counters.schools_of(previous_id), program_count=-1)
+            counters.adjust(counters.schools_of(instance.department_id), program_count=1)
+
+
+@receiver(post_delete, sender=Program)
+def uncount_program(sender, instance, **kwargs):
+    counters.adjust(Department.objects.filter(pk=instance.department_id), program_count=-1)
+    counters.adjust(counters.schools_of(instance.department_id), program_count=-1)
+
+
+@receiver(post_save, sender=FacultyMember)
+def count_faculty_member(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous_id = getattr(instance, '_counter_department_id', None)
+    if created:
+        counters.adjust(Department.objects.filter(pk=instance.department_id), faculty_count=1)
+    elif previous_id is not None and previous_id != instance.department_id:
+        counters.move(Department, previous_id, instance.department_id, faculty_count=1)
+
+
+@receiver(post_delete, sender=FacultyMember)
+def uncount_faculty_member(sender, instance, **kwargs):
+    counters.adjust(Department.objects.filter(pk=instance.department_id), faculty_count=-1)
+
+
+@receiver(post_save, sender=UserProfile)
+def count_student(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_search_previous', None)  # stored by remember_previous_profile
+    if created:
+        old_id = None
+    elif previous is None or previous['department_ref_id'] == instance.department_ref_id:
+        return
+    else:
+        old_id = previous['department_ref_id']
+    counters.move(Department, old_id, instance.department_ref_id, student_count=1)
+
+
+@receiver(post_delete, sender=UserProfile)
+def uncount_student(sender, instance, **kwargs):
+    counters.adjust(Department.objects.filter(pk=instance.department_ref_id), student_count=-1)
+
+
+# ==================== PROFILE STRUCTURE LINKS ====================
+
+@receiver(pre_save, sender=UserProfile)
+def link_profile_to_structure(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Re-match department_ref/school_ref when the department or school text changes"""
+    instance._structure_link_changed = False
+    if raw or (update_fields is not None and not {'department', 'school'} & set(update_fields)):
+        return
+    previous = getattr(instance, '_search_previous', None)  # stored by remember_previous_profile
+    if previous is not None and (previous['department'], previous['school']) == (instance.department, instance.school):
+        return
+    instance.department_ref_id, instance.school_ref_id = org_matching.get_matcher().link(
+        instance.department, instance.school,
+    )
+    instance._structure_link_changed = True
+
+
+@receiver(post_save, sender=UserProfile)
+def save_profile_structure_link(sender, instance, raw=False, update_fields=None, **kwargs):
+    """A save(update_fields=[...]) naming only the text columns still stores the re-matched refs"""
+    if raw or update_fields is None or not getattr(instance, '_structure_link_changed', False):
+        return
+    if not {'department_ref', 'school_ref'} <= set(update_fields):
+        UserProfile.objects.filter(pk=instance.pk).update(
+            department_ref_id=instance.department_ref_id, school_ref_id=instance.school_ref_id,
+        )
+
+
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Department)
+def relink_profiles(sender, instance, created, raw=False, **kwargs):
+    """A new or renamed school/department may be what unmatched profiles meant"""
+    if raw:
+        return
+    previous = getattr(instance, '_counter_previous', None)  # stored by keep_stored_counters
+    if not created and (previous is None or (previous['name'], previous['short_name']) == (
+        instance.name, instance.short_name,
+    )):
+        return
+    if sender is School:
+        profiles = UserProfile.objects.filter(Q(school_ref=None) | Q(school_ref=instance)).exclude(school=None)
+    else:
+        profiles = UserProfile.objects.filter(Q(department_ref=None) | Q(department_ref=instance)).exclude(
+            department=None,
+        )
+    org_matching.link_profiles(profiles)
+
+
+# ==================== REQUEST PROFILE CACHE ====================
+
+def invalidate_request_profile(sender, instance, **kwargs):
+    if sender is User:
+        profiles.invalidate(instance.pk, instance.username)
+    else:
+        profiles.invalidate(instance.user_id)
+
+
+for model in (User, UserProfile):
+    post_save.connect(invalidate_request_profile, sender=model, dispatch_uid=f'request_profile_save_{model.__name__}')
+    post_delete.connect(invalidate_request_profile, sender=model, dispatch_uid=f'request_profile_delete_{model.__name__}')
+
+
+# ==================== APPLICATION DOCUMENTS ====================
+
+@receiver(pre_save, sender=ApplicationRequest)
+def remember_previous_application(sender, instance, raw=False, **kwargs):
+    """Keep the stored status and type, so the receivers below act only on changes"""
+    instance._application_previous = None
+    if instance.pk and not raw:
+        instance._application_previous = ApplicationRequest.objects.filter(pk=instance.pk).values(
+            'status', 'application_type',
+        ).first()
+
+
+@receiver(post_save, sender=ApplicationRequest)
+def queue_application_document(sender, instance, raw=False, **kwargs):
+    """Render a request's PDF in the worker once it becomes approved"""
+    if raw or instance.status != 'approved':
+        return
+    previous = getattr(instance, '_application_previous', None)
+    if previous is None or previous['status'] != 'approved':
+        transaction.on_commit(lambda: documents.queue_generation([instance.pk]))
+
+
+# ==================== LEAVE CALENDAR ====================
+
+@receiver(post_save, sender=ApplicationRequest)
+def sync_leave_days(sender, instance, raw=False, **kwargs):
+    """Re-expand a leave's days; a request that stopped being a leave drops them"""
+    if raw:
+        return
+    previous = getattr(instance, '_application_previous', None)  # stored by remember_previous_application
+    if instance.application_type == 'leave' or (previous is not None and previous['application_type'] == 'leave'):
+        leaves.sync([instance.pk])
@@ -0,0 +1,93 @@
+"""
+Cached university structure.
+
+The school -> department -> program tree behind /api/university-structure/
+changes only through the admin or populate_university_structure, so it is
+serialized once, gzip-compressed once and kept in the cache under a version
+number. The model signals bump the version (see signals.py), so the next
+request rebuilds it. The stored ETag and Last-Modified let clients
+revalidate with a 304.
+"""
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .cache_versions import bump_version, get_version
+from .models import AcademicSection, Department, GoverningBody, Program, School, SupportCell
+
+VERSION_KEY = 'university_structure:version'
+
+# Changes to any of these invalidate the cached structure
+STRUCTURE_MODELS = (School, Department, Program, GoverningBody, AcademicSection, SupportCell)
+
+
+def get_cache_timeout():
+    return getattr(settings, 'UNIVERSITY_STRUCTURE_CACHE_TIMEOUT', 60 * 60)
+
+
+def build_structure():
+    """The structure as a dict: six queries however many schools and departments there are"""
+    programs = Program.objects.select_related(None).filter(is_active=True).only('id', 'name', 'degree_type', 'department_id')
+    departments = Department.objects.filter(is_active=True).prefetch_related(
+        Prefetch('programs', queryset=programs, to_attr='active_programs'),
+    )
+    schools = School.objects.filter(is_active=True).prefetch_related(
+        Prefetch('departments', queryset=departments, to_attr='active_departments'),
+    )
+
+    return {
+        'governing_bodies': list(GoverningBody.objects.filter(is_active=True).values()),
+        'schools': [{
+            'id': school.id,
+            'name': school.name,
+            'short_name': school.short_name,
+            'icon': school.icon,
+            'color': school.color,
+            'departments': [{
+                'id': dept.id,
+                'name': dept.name,
+                'short_name': dept.short_name,
+                'hod_id': dept.hod_id,
+                'programs': [
+                    {'id': program.id, 'name': program.name, 'degree_type': program.degree_type}
+                    for program in dept.active_programs
+                ],
+            } for dept in school.active_departments],
+        } for school in schools],
+        'academic_sections': list(AcademicSection.objects.filter(is_active=True).values()),
+        'support_cells': list(SupportCell.objects.filter(is_active=True).values()),
+    }
+
+
+def serialize_structure():
+    """Cache entry for the current structure: JSON body, its gzip form, ETag and Last-Modified"""
+    body = json.dumps(build_structure(), cls=DjangoJSONEncoder).encode()
+    digest = hashlib.sha1(body).hexdigest()
+    return {
+        'body': body,
+        'gzip_body': gzip.compress(body, compresslevel=9, mtime=0),
+        'etag': f'"{digest}"',
+        # Distinct strong ETag per representation
+        'gzip_etag': f'"{digest}-gzip"',
+        'last_modified': timezone.now().replace(microsecond=0),
+    }
+
+
+def get_cached_structure():
+    """The serialized structure for the current version, building it on a miss"""
+    key = f'university_structure:{get_version(VERSION_KEY)}'
+    entry = cache.get(key)
+    if entry is None:
+        entry = serialize_structure()
+        cache.set(key, entry, timeout=get_cache_timeout())
+    return entry
+
+
+def invalidate():
+    bump_version(VERSION_KEY)
@@ -0,0 +1,261 @@
+"""
+Bulk sync of the declared university structure.
+
+sync() brings the database in line with a declared structure: governing
+bodies, schools with their departments and programs, academic sections and
+support cells. The declaration comes from populate_university_structure's
+built-in data or from a YAML/JSON file (load_file()). One query per model
+loads the existing rows, the declaration is diffed against them in Python,
+and only the delta is written with bulk_create / bulk_update, all in one
+transaction. A second run with the same input writes nothing. Rows that are
+not declared are left alone.
+
+Rows are matched by their natural keys: body/section/cell type, school name,
+(school, department name) and (school, department, program name). Declared
+fields overwrite the stored ones; fields not declared keep their value.
+
+Bulk writes send no signals, so the cached structure is invalidated here,
+profiles and course sections are re-matched to schools and departments when
+those were added or renamed, the School/Department counters are reconciled
+when rows were added, and the placement branch index is rebuilt when
+departments were added or renamed (their names may now match a drive's
+branches_allowed).
+
+File format (YAML shown; JSON has the same shape):
+
+    governing_bodies:
+      - {body_type: chancellor, name: Chancellor, designation: Ceremonial Head}
+    schools:
+      - name: School of Engineering
+        short_name: Engineering
+        programs: [B.Tech, M.Tech, PhD]      # offered by every department
+        departments:
+          - Computer Science Engineering (CSE)
+          - {name: Data Science, programs: [{name: M.Sc Data Science, degree_type: master}]}
+    academic_sections:
+      - {section_type: examination, name: Examination Cell}
+    support_cells:
+      - {cell_type: iqac, name: IQAC}
+"""
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters, eligibility, org_matching, structure
+from .models import AcademicSection, Department, GoverningBody, Program, School, SupportCell
+
+try:
+    import yaml
+except ImportError:  # optional: JSON files only
+    yaml = None
+
+# Declarable fields per section, besides the key
+GOVERNING_BODY_FIELDS = ('name', 'designation', 'description', 'icon', 'color', 'is_active')
+SCHOOL_FIELDS = ('short_name', 'icon', 'color', 'description', 'is_active')
+DEPARTMENT_FIELDS = ('short_name', 'description', 'is_active')
+PROGRAM_FIELDS = ('degree_type', 'duration_years', 'description', 'is_active')
+SECTION_FIELDS = ('name', 'description', 'is_active')
+
+SECTIONS = ('governing_bodies', 'schools', 'academic_sections', 'support_cells')
+
+
+class StructureError(ValueError):
+    pass
+
+
+def load_file(path):
+    """The declared structure from a .yaml/.yml or .json file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in ('.yaml', '.yml'):
+        if yaml is None:
+            raise StructureError('PyYAML is required to read YAML files (pip install pyyaml)')
+        with path.open(encoding='utf-8') as structure_file:
+            data = yaml.safe_load(structure_file)
+    elif suffix == '.json':
+        with path.open(encoding='utf-8') as structure_file:
+            data = json.load(structure_file)
+    else:
+        raise StructureError(f'Unsupported structure file type "{suffix}"; use .yaml, .yml or .json')
+
+    if not isinstance(data, dict):
+        raise StructureError('The structure file must contain a mapping')
+    unknown = set(data) - set(SECTIONS)
+    if unknown:
+        raise StructureError(f'Unknown sections: {", ".join(sorted(unknown))}')
+    return data
+
+
+def degree_type_for(program_name):
+    """Determine degree type from program name"""
+    if 'B.' in program_name or 'BA' in program_name or 'B.Sc' in program_name or 'B.Com' in program_name or 'BBA' in program_name or 'BCA' in program_name or 'B.Ed' in program_name or 'B.Pharm' in program_name or 'D.Pharm' in program_name or 'LLB' in program_name or 'MBBS' in program_name or 'BPT' in program_name:
+        return 'bachelor'
+    elif 'M.' in program_name or 'MA' in program_name or 'M.Sc' in program_name or 'M.Com' in program_name or 'MBA' in program_name or 'MCA' in program_name or 'M.Ed' in program_name or 'M.Pharm' in program_name or 'LLM' in program_name or 'MD' in program_name or 'MS' in program_name:
+        return 'master'
+    elif 'PhD' in program_name or 'Ph.D' in program_name:
+        return 'phd'
+    elif 'Diploma' in program_name or 'PG Diploma' in program_name:
+        return 'diploma'
+    else:
+        return 'certificate'
+
+
+# ==================== DECLARATION ====================
+
+def _entry(value, where, key='name'):
+    """A declared entry as a dict; plain strings are shorthand for {key: value}"""
+    if isinstance(value, str):
+        value = {key: value}
+    if not isinstance(value, dict) or not value.get(key):
+        raise StructureError(f'{where}: expected a {key} or a mapping with a {key}')
+    return value
+
+
+def _fields(entry, fields):
+    return {field: entry[field] for field in fields if field in entry}
+
+
+def _typed(entries, section, key):
+    """{type: fields} for the governing body / academic section / support cell lists"""
+    declared = {}
+    fields = GOVERNING_BODY_FIELDS if section == 'governing_bodies' else SECTION_FIELDS
+    for n, value in enumerate(entries or []):
+        entry = _entry(value, f'{section}[{n}]', key)
+        declared[entry[key]] = _fields(entry, fields)
+    return declared
+
+
+def _programs(entries, where):
+    declared = {}
+    for n, value in enumerate(entries or []):
+        entry = _entry(value, f'{where}.programs[{n}]')
+        fields = _fields(entry, PROGRAM_FIELDS)
+        fields.setdefault('degree_type', degree_type_for(entry['name']))
+        declared[entry['name']] = fields
+    return declared
+
+
+def flatten(data):
+    """The declaration as {model: {natural key: fields}}"""
+    declared = {
+        GoverningBody: _typed(data.get('governing_bodies'), 'governing_bodies', 'body_type'),
+        AcademicSection: _typed(data.get('academic_sections'), 'academic_sections', 'section_type'),
+        SupportCell: _typed(data.get('support_cells'), 'support_cells', 'cell_type'),
+        School: {},
+        Department: {},
+        Program: {},
+    }
+    for s, value in enumerate(data.get('schools') or []):
+        where = f'schools[{s}]'
+        school = _entry(value, where)
+        declared[School][school['name']] = _fields(school, SCHOOL_FIELDS)
+        school_programs = _programs(school.get('programs'), where)
+        for d, dept_value in enumerate(school.get('departments') or []):
+            dept_where = f'{where}.departments[{d}]'
+            department = _entry(dept_value, dept_where)
+            dept_key = (school['name'], department['name'])
+            declared[Department][dept_key] = _fields(department, DEPARTMENT_FIELDS)
+            programs = dict(school_programs)
+            programs.update(_programs(department.get('programs'), dept_where))
+            for program_name, fields in programs.items():
+                declared[Program][dept_key + (program_name,)] = fields
+    return declared
+
+
+# ==================== SYNC ====================
+
+def _existing(model):
+    """{natural key: row} in one query; with duplicate keys the oldest row wins"""
+    if model is Department:
+        rows, key = Department.objects.order_by('-id'), lambda row: (row.school.name, row.name)
+    elif model is Program:
+        rows = Program.objects.select_related('department__school').order_by('-id')
+        key = lambda row: (row.department.school.name, row.department.name, row.name)
+    elif model is School:
+        rows, key = School.objects.order_by('-id'), lambda row: row.name
+    else:
+        type_field = {GoverningBody: 'body_type', AcademicSection: 'section_type', SupportCell: 'cell_type'}[model]
+        rows, key = model.objects.order_by('-id'), lambda row: getattr(row, type_field)
+    return {key(row): row for row in rows}
+
+
+def _apply(model, declared, new_row, counts, batch_size):
+    """Create missing rows and update changed ones; returns {key: row} for every declared key"""
+    existing = _existing(model)
+    to_create, to_update, changed_fields = [], [], set()
+    for key, fields in declared.items():
+        row = existing.get(key)
+        if row is None:
+            to_create.append((key, new_row(key, fields)))
+            continue
+        changed = {field for field, value in fields.items() if getattr(row, field) != value}
+        if changed:
+            for field in changed:
+                setattr(row, field, fields[field])
+            to_update.append(row)
+            changed_fields |= changed
+        else:
+            counts['unchanged'] += 1
+
+    model.objects.bulk_create([row for _, row in to_create], batch_size=batch_size)
+    if to_update:
+        if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+            now = timezone.now()
+            for row in to_update:
+                row.updated_at = now
+            changed_fields.add('updated_at')
+        model.objects.bulk_update(to_update, sorted(changed_fields), batch_size=batch_size)
+    counts['created'] += len(to_create)
+    counts['updated'] += len(to_update)
+    existing.update(to_create)
+    return {key: existing[key] for key in declared}
+
+
+def sync(data, dry_run=False, batch_size=500):
+    """Apply a declared structure (see module docstring); returns {section: Counter(created, updated, unchanged)}.
+
+    With dry_run the changes are made and then rolled back, so the counts are exact.
+    """
+    declared = flatten(data)
+    report = {name: Counter(created=0, updated=0, unchanged=0) for name in
+              ('governing_bodies', 'schools', 'departments', 'programs', 'academic_sections', 'support_cells')}
+
+    with transaction.atomic():
+        _apply(GoverningBody, declared[GoverningBody], lambda key, fields: GoverningBody(body_type=key, **fields),
+               report['governing_bodies'], batch_size)
+        schools = _apply(School, declared[School], lambda key, fields: School(name=key, **fields),
+                         report['schools'], batch_size)
+        departments = _apply(
+            Department, declared[Department],
+            lambda key, fields: Department(school=schools[key[0]], name=key[1], **fields),
+            report['departments'], batch_size,
+        )
+        _apply(
+            Program, declared[Program],
+            lambda key, fields: Program(department=departments[key[:2]], name=key[2], **fields),
+            report['programs'], batch_size,
+        )
+        _apply(AcademicSection, declared[AcademicSection],
+               lambda key, fields: AcademicSection(section_type=key, **fields),
+               report['academic_sections'], batch_size)
+        _apply(SupportCell, declared[SupportCell], lambda key, fields: SupportCell(cell_type=key, **fields),
+               report['support_cells'], batch_size)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            if any(report[section]['created'] or report[section]['updated'] for section in ('schools', 'departments')):
+                matcher = org_matching.OrgMatcher.from_database()
+                org_matching.link_profiles(matcher=matcher)
+                org_matching.link_course_sections(matcher=matcher)
+            if any(report[section]['created'] for section in ('schools', 'departments', 'programs')):
+                counters.reconcile()
+            if report['departments']['created'] or report['departments']['updated']:
+                eligibility.rebuild_branch_index()
+
+    if not dry_run and any(counts['created'] or counts['updated'] for counts in report.values()):
+        structure.invalidate()
+    return report
@@ -0,0 +1,50 @@
+"""
+Template warm-up.
+
+Compiles every portal template up front so the first request after a deploy
+does not pay for parsing ~55 large templates. With the cached loader
+(production settings) the compiled templates stay in the worker's memory;
+ErpAppConfig.ready() runs this at startup when TEMPLATE_WARMUP_ON_STARTUP is
+set, and the warm_templates command runs it on demand.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, loader
+
+logger = logging.getLogger(__name__)
+
+# Included by most portal pages; compiled on first render otherwise
+SHARED_TEMPLATES = ['includes/chatbot.html']
+
+
+def default_template_names():
+    from .views import AVAILABLE_TEMPLATES
+    return [f'{name}.html' for name in AVAILABLE_TEMPLATES] + SHARED_TEMPLATES
+
+
+def warm_up(template_names=None):
+    """Compile the templates. Returns (timings, total seconds); timings is a list of
+    (template name, seconds, error message or None)"""
+    timings = []
+    started = time.monotonic()
+    for name in template_names or default_template_names():
+        template_started = time.monotonic()
+        error = None
+        try:
+            loader.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            error = f'{e.__class__.__name__}: {e}'
+        timings.append((name, time.monotonic() - template_started, error))
+    total = time.monotonic() - started
+
+    failed = sum(1 for _, _, error in timings if error)
+    logger.info('Template warm-up: compiled %d templates in %.1f ms (%d failed)',
+                len(timings) - failed, total * 1000, failed)
+    return timings, total
+
+
+def warm_up_on_startup():
+    if getattr(settings, 'TEMPLATE_WARMUP_ON_STARTUP', False):
+        warm_up()
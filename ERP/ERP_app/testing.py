@@ -0,0 +1,81 @@
+"""
+Query-budget helpers for tests and ad-hoc checks.
+
+    from ERP_app.testing import QueryBudgetMixin, assert_max_queries
+
+    with assert_max_queries(2):
+        [str(app) for app in PlacementApplication.objects.all()[:50]]
+
+    class CrcViewTests(QueryBudgetMixin, TestCase):
+        def test_dashboard(self):
+            self.assertViewQueries('crc-portal')
+
+VIEW_QUERY_BUDGETS holds the agreed maximum per URL name; a view whose
+queries grow with the number of rows it lists (an N+1) blows its budget as
+soon as the test data has more than a handful of rows (ERP_app/tests.py
+requests each one). A failure lists the captured SQL with repeated
+statement shapes first.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .instrumentation import repeated_shapes
+
+# Maximum queries per request, by URL name, with cold caches. Budgets are for an
+# anonymous request with the demo users already created.
+VIEW_QUERY_BUDGETS = {
+    'crc-portal': 4,
+    'crc-view-applications': 4,
+    'crc-eligible-students': 3,
+    'crc-placement-stats': 2,
+    'admin-placement-approval': 1,
+    'placement': 4,
+    'student-eligible-drives': 4,
+    'university-structure-api': 6,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def describe_queries(queries):
+    lines = [f'{count}x {shape}' for count, shape in repeated_shapes(query['sql'] for query in queries)]
+    lines += [f'{n}. {query["sql"]}' for n, query in enumerate(queries, 1)]
+    return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_queries(max_queries, using=DEFAULT_DB_ALIAS):
+    """Fail with QueryBudgetExceeded if the block runs more than `max_queries` queries"""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > max_queries:
+        raise QueryBudgetExceeded(
+            f'{len(context)} queries executed, budget is {max_queries}:\n'
+            f'{describe_queries(context.captured_queries)}'
+        )
+
+
+def assert_view_queries(client, url_name, max_queries=None, args=None, kwargs=None, method='get',
+                        data=None, using=DEFAULT_DB_ALIAS, **extra):
+    """Request the view named `url_name` with `client` within its budget; returns the response"""
+    if max_queries is None:
+        max_queries = VIEW_QUERY_BUDGETS[url_name]
+    url = reverse(url_name, args=args, kwargs=kwargs)
+    with assert_max_queries(max_queries, using=using):
+        response = getattr(client, method)(url, data, **extra)
+    return response
+
+
+class QueryBudgetMixin:
+    """TestCase mixin: self.assertViewQueries('crc-portal') and self.assertMaxQueries(n)"""
+
+    def assertMaxQueries(self, max_queries, using=DEFAULT_DB_ALIAS):
+        return assert_max_queries(max_queries, using=using)
+
+    def assertViewQueries(self, url_name, max_queries=None, **kwargs):
+        return assert_view_queries(self.client, url_name, max_queries, **kwargs)
@@ -0,0 +1,486 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import documents, leaves, loadgen, profiles, rollups
+from .ingestion import ingest_attendance
+from .models import (
+    ApplicationRequest, AttendanceDailyRollup, AttendanceRecord, AttendanceRosterEntry, BackgroundJob, Department,
+    LeaveDay, PlacementUpdate, School, SearchEntry, UserProfile,
+)
+from .testing import VIEW_QUERY_BUDGETS, QueryBudgetExceeded, QueryBudgetMixin, assert_max_queries
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every view in VIEW_QUERY_BUDGETS, with cold caches, over enough rows to expose an N+1"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Ids cached by earlier test classes point at rolled-back rows
+        cache.clear()
+        loadgen.generate(students=60, drives=12, applications_per_drive=15, requests=50, months=1, courses=2)
+        cls.drive = PlacementUpdate.objects.filter(status='approved').order_by('id').first()
+        # The budgets assume the demo accounts exist
+        profiles.get_demo_profile()
+        profiles.get_reviewer_id(None)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_budgeted_view_is_covered(self):
+        tested = {name[len('test_'):].replace('_', '-') for name in dir(self) if name.startswith('test_')}
+        self.assertEqual(set(VIEW_QUERY_BUDGETS) - tested, set())
+
+    def test_crc_portal(self):
+        self.assertEqual(self.assertViewQueries('crc-portal').status_code, 200)
+
+    def test_crc_view_applications(self):
+        response = self.assertViewQueries('crc-view-applications', args=[self.drive.id])
+        self.assertEqual(response.status_code, 200)
+
+    def test_crc_eligible_students(self):
+        response = self.assertViewQueries('crc-eligible-students', args=[self.drive.id])
+        self.assertTrue(response.json()['success'])
+
+    def test_crc_placement_stats(self):
+        self.assertTrue(self.assertViewQueries('crc-placement-stats').json()['success'])
+
+    def test_admin_placement_approval(self):
+        self.assertEqual(self.assertViewQueries('admin-placement-approval').status_code, 200)
+
+    def test_placement(self):
+        self.assertEqual(self.assertViewQueries('placement').status_code, 200)
+
+    def test_student_eligible_drives(self):
+        self.assertEqual(self.assertViewQueries('student-eligible-drives').status_code, 200)
+
+    def test_university_structure_api(self):
+        self.assertEqual(self.assertViewQueries('university-structure-api').status_code, 200)
+
+
+class AssertMaxQueriesTests(TestCase):
+
+    def test_over_budget_lists_repeated_statements(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '3 queries executed, budget is 2'):
+            with assert_max_queries(2):
+                for _ in range(3):
+                    list(PlacementUpdate.objects.all())
+
+
+def make_student(username, enrollment_no, department='Computer Science Engineering (CSE)', **fields):
+    user = User.objects.create(username=username, first_name='Student', last_name=username)
+    UserProfile.objects.create(
+        user=user, role='student', enrollment_no=enrollment_no, department=department,
+        school='School of Engineering', year=2, section='A', **fields,
+    )
+    return user
+
+
+def make_application(student, application_type='leave', status='pending', **fields):
+    fields = {
+        'student_name': f'{student.first_name} {student.last_name}', 'enrollment_no': 'E1',
+        'department': 'Computer Science Engineering (CSE)', 'mobile': '9999999999',
+        'email': 'student@university.edu', 'reason': 'Fever / Illness', **fields,
+    }
+    return ApplicationRequest.objects.create(student=student, application_type=application_type, status=status, **fields)
+
+
+class AttendanceRollupTests(TestCase):
+    """The incrementally maintained rollup tables always equal a full rollups.rebuild()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.faculty = User.objects.create(username='faculty')
+        cls.other_faculty = User.objects.create(username='other_faculty')
+        cls.students = [make_student(f's{n}', f'E{n}') for n in range(3)]
+        ingest_attendance([
+            {'enrollment_no': f'E{n}', 'date': f'2026-01-0{day}', 'course': 'Maths', 'status': status}
+            for n in range(3) for day, status in ((1, 'present'), (2, 'absent'), (3, 'late'))
+        ], default_faculty=cls.faculty)
+
+    def state(self):
+        buckets = set(AttendanceDailyRollup.objects.filter(total_count__gt=0).values_list(
+            'date', 'course_section_id', 'faculty_id', 'present_count', 'absent_count', 'late_count', 'total_count',
+        ))
+        roster = set(AttendanceRosterEntry.objects.values_list('course_section_id', 'faculty_id', 'student_id'))
+        return buckets, roster
+
+    def assertMatchesRebuild(self):
+        live = self.state()
+        rollups.rebuild()
+        self.assertEqual(live, self.state())
+
+    def test_bulk_import(self):
+        buckets, roster = self.state()
+        self.assertEqual(sum(bucket[-1] for bucket in buckets), 9)
+        self.assertEqual(len(roster), 3)
+        self.assertMatchesRebuild()
+
+    def test_create_edit_and_delete(self):
+        record = AttendanceRecord.objects.filter(student=self.students[0]).order_by('date').first()
+        AttendanceRecord.objects.create(
+            student=self.students[1], course_section=record.course_section, faculty=self.faculty,
+            date=date(2026, 1, 4), status=AttendanceRecord.PRESENT,
+        )
+        record.status = AttendanceRecord.LATE
+        record.faculty = None
+        record.save()
+        AttendanceRecord.objects.filter(student=self.students[2]).order_by('date').first().delete()
+        self.assertMatchesRebuild()
+
+    def test_student_leaves_roster_with_last_record(self):
+        for record in AttendanceRecord.objects.filter(student=self.students[0]):
+            record.delete()
+        self.assertNotIn(self.students[0].pk, {entry[2] for entry in self.state()[1]})
+        self.assertMatchesRebuild()
+
+    def test_moving_every_record_to_another_faculty(self):
+        for record in AttendanceRecord.objects.filter(student=self.students[1]):
+            record.faculty = self.other_faculty
+            record.save()
+        roster = self.state()[1]
+        self.assertEqual({entry[1] for entry in roster if entry[2] == self.students[1].pk}, {self.other_faculty.pk})
+        self.assertMatchesRebuild()
+
+
+class AttendanceInputValidationTests(TestCase):
+    """Malformed bulk-mark bodies and import files are refused before anything is written"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create(username='faculty')
+        make_student('s1', 'E1')
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def bulk_mark(self, body):
+        return self.client.post(reverse('attendance-bulk-mark'), data=body, content_type='application/json')
+
+    def import_file(self, name, content, **options):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        call_command('import_attendance', path, stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_bulk_mark_rejects_malformed_bodies(self):
+        for body, message in (
+            ('{', 'Invalid JSON body'),
+            ('[]', 'JSON body must be an object'),
+            ('"records"', 'JSON body must be an object'),
+            (json.dumps({'records': {'enrollment_no': 'E1'}}), 'records must be a list of objects'),
+            (json.dumps({'records': ['E1']}), 'records must be a list of objects'),
+            (json.dumps({'records': []}), 'No attendance records given'),
+        ):
+            with self.subTest(body=body):
+                response = self.bulk_mark(body)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], message)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_bulk_mark_lists_invalid_rows(self):
+        response = self.bulk_mark(json.dumps({'date': '2026-01-05', 'course': 'Maths', 'records': [
+            {'enrollment_no': 'E1', 'status': 'present'},
+            {'enrollment_no': 'E404', 'status': 'present'},
+            {'enrollment_no': 'E1', 'status': 'present', 'faculty': 7},
+        ]}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['error'] for error in response.json()['errors']],
+                         ['Unknown enrollment number', 'Unknown faculty "7"'])
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_bulk_mark(self):
+        body = json.dumps({'date': '2026-01-05', 'course': 'Maths', 'faculty': 'faculty', 'records': [
+            {'enrollment_no': 'E1', 'status': 'late'},
+        ]})
+        self.assertEqual(self.bulk_mark(body).json()['created'], 1)
+        # Marking again skips the existing row
+        self.assertEqual(self.bulk_mark(body).json()['skipped'], 1)
+        self.assertEqual(AttendanceRecord.objects.get().status, AttendanceRecord.LATE)
+
+    def test_import_rejects_malformed_json(self):
+        for content, message in (
+            ('[{', 'Invalid JSON'),
+            ('{"enrollment_no": "E1"}', 'A JSON file must hold a list of objects'),
+            ('["E1", 2]', '2 invalid attendance row(s), nothing imported'),
+        ):
+            with self.subTest(content=content):
+                with self.assertRaisesMessage(CommandError, message):
+                    self.import_file('attendance.json', content)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_import(self):
+        rows = [{'enrollment_no': 'E1', 'date': '2026-01-05', 'course': 'Maths', 'status': 'present'}]
+        self.import_file('attendance.json', json.dumps(rows), faculty='faculty')
+        self.import_file('attendance.csv', 'enrollment_no,date,course,status\nE1,2026-01-06,Maths,absent\n')
+        self.assertEqual(AttendanceRecord.objects.count(), 2)
+        self.assertEqual(AttendanceDailyRollup.objects.filter(total_count=1).count(), 2)
+
+
+class LeaveCalendarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_student('s1', 'E1')
+        cls.leave = make_application(cls.student, from_date=date(2026, 2, 2), to_date=date(2026, 2, 4))
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def check(self, from_date, to_date, student=None):
+        with transaction.atomic():
+            return leaves.check_new_leave((student or self.student).pk, from_date, to_date)
+
+    def test_days_follow_the_application(self):
+        days = LeaveDay.objects.filter(application=self.leave)
+        self.assertEqual(sorted(days.values_list('date', flat=True)),
+                         [date(2026, 2, 2), date(2026, 2, 3), date(2026, 2, 4)])
+        self.assertFalse(days.filter(approved=True).exists())
+
+        self.leave.status = 'approved'
+        self.leave.save()
+        self.assertEqual(days.filter(approved=True).count(), 3)
+
+        self.leave.status = 'rejected'
+        self.leave.save()
+        self.assertFalse(days.exists())
+
+    def test_changing_the_type_drops_the_days(self):
+        self.leave.application_type = 'bonafide'
+        self.leave.save()
+        self.assertFalse(LeaveDay.objects.filter(application=self.leave).exists())
+
+    def test_overlap(self):
+        with self.assertRaisesMessage(leaves.LeaveError, f'Overlaps your pending leave application #{self.leave.pk}'):
+            self.check('2026-02-04', '2026-02-06')
+        self.assertEqual(self.check('2026-02-05', '2026-02-06'), (date(2026, 2, 5), date(2026, 2, 6)))
+        # Another student's leave is no conflict
+        self.check('2026-02-01', '2026-02-10', student=make_student('s2', 'E2'))
+
+    def test_invalid_ranges(self):
+        for from_date, to_date, message in (
+            (None, '2026-03-01', 'needs a from date and a to date'),
+            ('2026-03-02', '2026-03-01', 'The leave ends before it starts'),
+            ('2026-02-30', '2026-03-01', 'Invalid leave dates'),
+            ('2026-03-01', '2026-06-01', 'A leave can cover at most 60 days'),
+        ):
+            with self.subTest(from_date=from_date, to_date=to_date):
+                with self.assertRaisesMessage(leaves.LeaveError, message):
+                    self.check(from_date, to_date)
+
+    @skipUnlessDBFeature('has_select_for_update')
+    def test_locks_the_student_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.check('2026-03-01', '2026-03-02')
+        self.assertTrue(any('FOR UPDATE' in query['sql'] for query in queries.captured_queries))
+
+    def test_submit_application(self):
+        student = profiles.get_demo_profile().user
+        make_application(student, status='approved', from_date=date(2026, 3, 10), to_date=date(2026, 3, 12))
+
+        def submit(from_date, to_date):
+            return self.client.post(reverse('submit-application'), {
+                'application_type': 'leave', 'reason': 'Fever / Illness', 'from_date': from_date, 'to_date': to_date,
+            }).json()
+
+        refused = submit('2026-03-12', '2026-03-14')
+        self.assertFalse(refused['success'])
+        self.assertIn('Overlaps your approved leave application', refused['message'])
+
+        submitted = submit('2026-03-13', '2026-03-14')
+        self.assertTrue(submitted['success'])
+        self.assertEqual(LeaveDay.objects.filter(application_id=submitted['application_id']).count(), 2)
+
+
+class ApplicationDocumentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_student('s1', 'E1')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        document_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, document_root)
+        settings_override = override_settings(DOCUMENT_ROOT=document_root, DOCUMENT_SENDFILE_HEADER=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, application, **headers):
+        response = self.client.get(reverse('application-document', args=[application.pk]), **headers)
+        self.addCleanup(response.close)
+        return response
+
+    def run_jobs(self):
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+    def test_build_pdf(self):
+        text = '# Title\n\n' + 'A long paragraph. ' * 400
+        pages = documents.layout(text)
+        self.assertGreater(len(pages), 1)
+        pdf = documents.build_pdf(text)
+        self.assertTrue(pdf.startswith(b'%PDF-1.4\n'))
+        self.assertTrue(pdf.endswith(b'%%EOF\n'))
+        self.assertIn(b'/Count %d' % len(pages), pdf)
+        # Same text, same bytes
+        self.assertEqual(pdf, documents.build_pdf(text))
+
+    def test_render_refuses_characters_the_fonts_cannot_show(self):
+        application = make_application(self.student, application_type='bonafide', student_name='राम')
+        with self.assertRaisesMessage(documents.DocumentError, 'The PDF cannot show these characters'):
+            documents.render(application)
+        # cp1252 covers accented Latin names
+        application.student_name = 'José Müller'
+        self.assertTrue(documents.render(application).startswith(b'%PDF'))
+
+    def test_serve_renders_in_the_worker(self):
+        application = make_application(self.student, application_type='bonafide', status='approved')
+        pending = self.get(application)
+        self.assertEqual(pending.status_code, 202)
+        self.assertEqual(pending['Retry-After'], str(documents.RETRY_AFTER))
+        # Asking again while the job is queued does not queue another one
+        self.assertEqual(self.get(application).json()['job_id'], pending.json()['job_id'])
+
+        self.run_jobs()
+        application.refresh_from_db()
+        response = self.get(application)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['ETag'], f'"{application.document_digest}"')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(self.get(application, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_serve_reports_a_request_that_cannot_be_rendered(self):
+        application = make_application(self.student, application_type='bonafide', status='approved',
+                                       student_name='राम')
+        self.assertEqual(self.get(application).status_code, 202)
+        self.run_jobs()
+        response = self.get(application)
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('cannot show these characters', response.json()['message'])
+
+    def test_approval_queues_one_render(self):
+        application = make_application(self.student, application_type='bonafide')
+        with self.captureOnCommitCallbacks(execute=True):
+            application.status = 'approved'
+            application.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            application.admin_notes = 'Signed'
+            application.save()
+        self.assertEqual(BackgroundJob.objects.filter(task=documents.GENERATE_DOCUMENTS).count(), 1)
+
+    def test_only_approved_requests_are_served(self):
+        application = make_application(self.student, application_type='bonafide')
+        self.assertEqual(self.get(application).status_code, 404)
+
+
+class MigrationBackfillTests(TransactionTestCase):
+    """Data written under the baseline schema comes out of the migrations linked and indexed"""
+
+    baseline = [('ERP_app', '0001_initial')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes()
+        executor.migrate(self.baseline)
+        self.addCleanup(self.migrate_to_latest)
+        self.seed(executor.loader.project_state(self.baseline).apps)
+        self.migrate_to_latest()
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.latest)
+
+    def seed(self, apps):
+        User = apps.get_model('auth', 'User')
+        School = apps.get_model('ERP_app', 'School')
+        Department = apps.get_model('ERP_app', 'Department')
+        UserProfile = apps.get_model('ERP_app', 'UserProfile')
+        AttendanceRecord = apps.get_model('ERP_app', 'AttendanceRecord')
+        ApplicationRequest = apps.get_model('ERP_app', 'ApplicationRequest')
+        PlacementUpdate = apps.get_model('ERP_app', 'PlacementUpdate')
+        PlacementApplication = apps.get_model('ERP_app', 'PlacementApplication')
+
+        school = School.objects.create(name='School of Engineering', short_name='SOE')
+        Department.objects.create(school=school, name='Computer Science Engineering (CSE)', short_name='CSE')
+        Department.objects.create(school=school, name='Department of Physics', short_name='PHY')
+        faculty = User.objects.create(username='faculty')
+        for n, department in enumerate(('Dept. of Physics', 'CSE', 'CSE')):
+            student = User.objects.create(username=f's{n}')
+            UserProfile.objects.create(user=student, role='student', enrollment_no=f'E{n}', department=department,
+                                       school='School of Engineering')
+            for day in (1, 2):
+                AttendanceRecord.objects.create(
+                    student=student, enrollment_no=f'E{n}', student_name=f'Student {n}', department='CSE',
+                    school='SOE', year=2, section='A', course='Maths', faculty=faculty,
+                    date=date(2026, 1, day), status='absent' if day == 2 else 'present',
+                )
+            ApplicationRequest.objects.create(
+                student=student, application_type='leave', status='approved' if n else 'pending',
+                student_name=f'Student {n}', enrollment_no=f'E{n}', department=department, mobile='1',
+                email='student@university.edu', reason='Fever / Illness',
+                from_date=date(2026, 2, 1), to_date=date(2026, 2, 3),
+            )
+        drive = PlacementUpdate.objects.create(
+            company_name='Acme', role='Developer', package=Decimal('5'), branches_allowed='CSE, Physics',
+            last_date=date(2030, 1, 1), drive_date=date(2030, 1, 2), job_location='Pune', mode='online',
+            description='-', status='approved',
+        )
+        PlacementUpdate.objects.create(
+            company_name='Beta', role='Developer', package=Decimal('5'), branches_allowed='All Branches',
+            last_date=date(2030, 1, 1), drive_date=date(2030, 1, 2), job_location='Pune', mode='online',
+            description='-', status='approved',
+        )
+        PlacementApplication.objects.create(placement=drive, student=User.objects.get(username='s1'),
+                                            enrollment_no='E1', student_name='Student 1', department='CSE',
+                                            cgpa=Decimal('8.10'))
+
+    # One test: every run reverses and replays all the migrations
+    def test_backfills(self):
+        with self.subTest('attendance'):
+            records = AttendanceRecord.objects.select_related('course_section__department')
+            self.assertEqual({(record.course_section.department.short_name, record.course_section.course)
+                              for record in records}, {('CSE', 'Maths')})
+            self.assertEqual(records.filter(status=AttendanceRecord.ABSENT).count(), 3)
+            self.assertEqual(User.objects.get(username='s2').first_name, 'Student')
+            self.assertEqual(set(AttendanceDailyRollup.objects.values_list('present_count', 'absent_count', 'total_count')),
+                             {(3, 0, 3), (0, 3, 3)})
+            self.assertEqual(AttendanceRosterEntry.objects.count(), 3)
+
+        with self.subTest('structure links and counters'):
+            cse, physics = Department.objects.get(short_name='CSE'), Department.objects.get(short_name='PHY')
+            self.assertEqual(dict(UserProfile.objects.values_list('enrollment_no', 'department_ref')),
+                             {'E0': physics.pk, 'E1': cse.pk, 'E2': cse.pk})
+            self.assertEqual((cse.student_count, physics.student_count), (2, 1))
+            self.assertEqual(School.objects.get().department_count, 2)
+
+        with self.subTest('placement eligibility'):
+            drive = PlacementUpdate.objects.get(company_name='Acme')
+            self.assertEqual(set(drive.branches.values_list('short_name', flat=True)), {'CSE', 'PHY'})
+            self.assertFalse(drive.all_branches)
+            self.assertTrue(PlacementUpdate.objects.get(company_name='Beta').all_branches)
+            self.assertEqual(UserProfile.objects.get(enrollment_no='E1').cgpa, Decimal('8.10'))
+
+        with self.subTest('search index'):
+            self.assertEqual(set(SearchEntry.objects.filter(kind='student').values_list('code', flat=True)),
+                             {'e0', 'e1', 'e2'})
+
+        with self.subTest('leave calendar'):
+            self.assertEqual(LeaveDay.objects.count(), 9)
+            self.assertEqual(LeaveDay.objects.filter(approved=True).count(), 6)
@@ -0,0 +1,209 @@
+"""
+Deferred processing of placement uploads (resumes, job descriptions).
+
+The request only moves the uploaded file into UPLOAD_STAGING_DIR (a rename
+for large uploads, which Django has already spooled to disk) and queues a
+process_upload job. The run_jobs worker then does the slow part: size and
+type checks, the optional virus scan, extracting text, and finally copying
+the file into MEDIA storage and attaching it to the model row. The file it
+replaces, and the staged copy, are deleted only once that has committed. The
+job result is what the student sees when polling the job status.
+
+Text is extracted from .docx with the standard library; PDF text needs the
+optional pypdf package, and without it PDFs are stored with an empty text
+excerpt.
+"""
+import os
+import re
+import shutil
+import subprocess
+import uuid
+import zipfile
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+
+from . import jobs
+
+try:
+    import pypdf
+except ImportError:  # optional: PDFs are stored without extracted text
+    pypdf = None
+
+PROCESS_UPLOAD = 'ERP_app.uploads.process_upload'
+
+# Leading bytes of each accepted file type
+SIGNATURES = {
+    '.pdf': [b'%PDF'],
+    '.doc': [b'\xd0\xcf\x11\xe0'],
+    '.docx': [b'PK\x03\x04'],
+}
+
+TEXT_EXCERPT_LENGTH = 500
+
+
+class UploadRejected(jobs.PermanentJobError):
+    pass
+
+
+def get_max_size():
+    return getattr(settings, 'UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+
+
+def get_allowed_extensions():
+    return getattr(settings, 'UPLOAD_ALLOWED_EXTENSIONS', ['.pdf', '.doc', '.docx'])
+
+
+def get_staging_dir():
+    return str(getattr(settings, 'UPLOAD_STAGING_DIR', os.path.join(settings.BASE_DIR, 'upload_staging')))
+
+
+def extension_of(name):
+    return os.path.splitext(name or '')[1].lower()
+
+
+def validate_upload(upload):
+    """Checks that need no file I/O, so obviously bad uploads fail in the request.
+    Returns an error message or None."""
+    if extension_of(upload.name) not in get_allowed_extensions():
+        return f'Unsupported file type; allowed: {", ".join(get_allowed_extensions())}'
+    if upload.size > get_max_size():
+        return f'File is larger than {get_max_size() // (1024 * 1024)} MB'
+    return None
+
+
+# ==================== REQUEST SIDE ====================
+
+def stage_upload(upload):
+    """Move an UploadedFile into the staging directory and return its path"""
+    staging_dir = get_staging_dir()
+    os.makedirs(staging_dir, exist_ok=True)
+    path = os.path.join(staging_dir, f'{uuid.uuid4().hex}{extension_of(upload.name)}')
+
+    if hasattr(upload, 'temporary_file_path'):
+        # Already on disk: a rename, not a copy, when staging is on the same filesystem
+        shutil.move(upload.temporary_file_path(), path)
+    else:
+        with open(path, 'wb') as fh:
+            for chunk in upload.chunks():
+                fh.write(chunk)
+    return path
+
+
+def queue_upload(upload, instance, field_name, created_by=None):
+    """Stage `upload` for instance.<field_name> and queue its processing; returns the job"""
+    return jobs.enqueue(PROCESS_UPLOAD, {
+        'model': instance._meta.label,
+        'pk': instance.pk,
+        'field': field_name,
+        'staged_path': stage_upload(upload),
+        'original_name': os.path.basename(upload.name),
+    }, created_by=created_by)
+
+
+# ==================== WORKER SIDE ====================
+
+def process_upload(job):
+    payload = job.payload
+    path = payload['staged_path']
+    extension = extension_of(payload['original_name'])
+    if not os.path.exists(path):
+        raise UploadRejected('The uploaded file is no longer available; please upload it again')
+
+    size = os.path.getsize(path)
+    if size > get_max_size():
+        raise UploadRejected(f'File is larger than {get_max_size() // (1024 * 1024)} MB')
+    check_signature(path, extension)
+    scan_for_viruses(path)
+    text = extract_text(path, extension)
+
+    model = apps.get_model(payload['model'])
+    field = model._meta.get_field(payload['field'])
+    instance = model.objects.select_for_update().filter(pk=payload['pk']).first()
+    if instance is None:
+        raise UploadRejected('The record this file belongs to was deleted')
+    previous_name = getattr(instance, field.attname).name
+
+    # Stored last, so a failed attempt leaves nothing behind in MEDIA storage
+    with open(path, 'rb') as fh:
+        stored_name = field.storage.save(field.generate_filename(instance, payload['original_name']), File(fh))
+    try:
+        # update() rather than save(): the request may have changed other fields meanwhile
+        model.objects.filter(pk=instance.pk).update(**{field.attname: stored_name})
+        transaction.on_commit(
+            lambda: replace_done(field.storage, previous_name, stored_name, path), robust=True,
+        )
+    except Exception:
+        field.storage.delete(stored_name)
+        raise
+
+    return {
+        'file': stored_name,
+        'url': field.storage.url(stored_name),
+        'size': size,
+        'text_length': len(text),
+        'text_excerpt': text[:TEXT_EXCERPT_LENGTH],
+    }
+
+
+def replace_done(storage, previous_name, stored_name, staged_path):
+    """Once the new file is committed: drop the file it replaced and the staged copy"""
+    if previous_name and previous_name != stored_name:
+        storage.delete(previous_name)
+    if os.path.exists(staged_path):
+        os.remove(staged_path)
+
+
+def discard_staged_file(job):
+    """Called once process_upload has failed for good"""
+    path = job.payload.get('staged_path')
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+process_upload.on_failure = discard_staged_file
+
+
+def check_signature(path, extension):
+    with open(path, 'rb') as fh:
+        head = fh.read(8)
+    if not any(head.startswith(signature) for signature in SIGNATURES.get(extension, [])):
+        raise UploadRejected(f'File content does not match its {extension} extension')
+
+
+def scan_for_viruses(path):
+    """Run UPLOAD_VIRUS_SCAN_COMMAND (e.g. ['clamdscan', '--no-summary']) on the file, if configured.
+
+    Exit status 0 means clean and 1 means infected (the ClamAV convention);
+    anything else is treated as a scanner failure and the job is retried.
+    """
+    command = getattr(settings, 'UPLOAD_VIRUS_SCAN_COMMAND', None)
+    if not command:
+        return
+    completed = subprocess.run(list(command) + [path], capture_output=True, text=True, timeout=300)
+    if completed.returncode == 1:
+        raise UploadRejected('The file was rejected by the virus scanner')
+    if completed.returncode != 0:
+        raise RuntimeError(f'Virus scanner failed ({completed.returncode}): {completed.stderr.strip()}')
+
+
+def extract_text(path, extension):
+    """Plain text of the document, '' when the format is not supported"""
+    if extension == '.docx':
+        try:
+            with zipfile.ZipFile(path) as archive:
+                xml = archive.read('word/document.xml').decode('utf-8', errors='replace')
+        except (zipfile.BadZipFile, KeyError):
+            return ''
+        xml = re.sub(r'</w:p>', '\n', xml)
+        return re.sub(r'<[^>]+>', '', xml).strip()
+    if extension == '.pdf' and pypdf is not None:
+        try:
+            reader = pypdf.PdfReader(path)
+            return '\n'.join(page.extract_text() or '' for page in reader.pages).strip()
+        except Exception:
+            return ''
+    return ''
+
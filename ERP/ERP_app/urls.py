@@ -65,6 +65,8 @@ urlpatterns = [
     path('admin-attendance-dashboard/', views.admin_attendance_dashboard, name='admin-attendance-dashboard'),
     path('dean-attendance-dashboard/', views.dean_attendance_dashboard, name='dean-attendance-dashboard'),
     path('hod-attendance-dashboard/', views.hod_attendance_dashboard, name='hod-attendance-dashboard'),
+    path('attendance/bulk-mark/', views.attendance_bulk_mark, name='attendance-bulk-mark'),
+    path('api/attendance/shortage/', views.attendance_shortage_api, name='attendance-shortage-api'),
     
     # Admin Search
     path('admin-search/', views.admin_search, name='admin-search'),
@@ -73,20 +75,30 @@ urlpatterns = [
     path('crc/add-company/', views.crc_add_company, name='crc-add-company'),
     path('crc/edit-company/<int:company_id>/', views.crc_edit_company, name='crc-edit-company'),
     path('crc/applications/<int:company_id>/', views.crc_view_applications, name='crc-view-applications'),
+    path('crc/applications/<int:company_id>/export/', views.crc_export_applications, name='crc-export-applications'),
+    path('crc/eligible-students/<int:company_id>/', views.crc_eligible_students, name='crc-eligible-students'),
+    path('api/crc/placement-stats/', views.crc_placement_stats, name='crc-placement-stats'),
     
     # Admin Placement Approval
     path('admin/placement-approval/', views.admin_placement_approval, name='admin-placement-approval'),
     path('admin/approve-placement/<int:company_id>/', views.admin_approve_placement, name='admin-approve-placement'),
+    path('api/reviews/<str:target>/', views.bulk_review, name='bulk-review'),
+    path('admin/request-metrics/', views.admin_request_metrics, name='admin-request-metrics'),
     
     # Student Placement Views
     path('student/apply-placement/<int:placement_id>/', views.student_apply_placement, name='student-apply-placement'),
+    path('student/upload-status/<int:job_id>/', views.student_upload_status, name='student-upload-status'),
+    path('student/eligible-drives/', views.student_eligible_drives, name='student-eligible-drives'),
     
     # Student Application Center
     path('application-center/', views.application_center, name='application-center'),
     path('application-form/<str:app_type>/', views.application_form, name='application-form'),
     path('submit-application/', views.submit_application, name='submit-application'),
     path('view-application/<int:app_id>/', views.view_application, name='view-application'),
+    path('view-application/<int:app_id>/pdf/', views.application_document, name='application-document'),
     path('application-status/', views.application_status, name='application-status'),
+    path('api/applications/history/', views.student_application_history, name='student-application-history'),
+    path('api/applications/review-queue/', views.reviewer_application_queue, name='reviewer-application-queue'),
     
     # University Structure API
     path('api/university-structure/', views.get_university_structure, name='university-structure-api'),
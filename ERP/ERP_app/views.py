@@ -1,14 +1,35 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import Http404, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db import transaction
 from django.db.models import Q, Count, Avg, Sum
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
+from django.utils.text import slugify
 from django.views.decorators.http import require_http_methods
+from django.contrib.admin.views.decorators import staff_member_required
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from functools import partial
 import json
+from . import documents, instrumentation, leaves, profiles, reviews
+from .aggregation import aggregate_attendance, aggregate_rollup
+from .eligibility import eligible_drives, eligible_students_page
+from .exports import streaming_export
+from .ingestion import AttendanceImportError, ingest_attendance
+from .shortage import get_shortage_threshold, shortage_queryset
+from .jobs import job_status
+from .org_matching import filter_attendance
+from .page_cache import render_page
+from .pagination import counted_page, keyset_page
+from .placement_stats import get_stats as get_placement_stats
+from .search import attendance_search_targets, search_all
+from .structure import get_cached_structure
+from .uploads import queue_upload, validate_upload
 from .models import (
-    AttendanceRecord, PlacementUpdate, PlacementApplication, UserProfile, ApplicationRequest,
-    GoverningBody, School, Department, Program, FacultyMember, AcademicSection, SupportCell
+    AttendanceRecord, AttendanceDailyRollup, AttendanceRosterEntry, PlacementUpdate, PlacementApplication, ApplicationRequest,
+    BackgroundJob,
 )
 
 # List of all available templates
@@ -69,6 +90,64 @@ AVAILABLE_TEMPLATES = [
     'womens-cell',
 ]
 
+# Pages served through the page cache (page_cache.py): only templates that render
+# no per-request data, i.e. no CSRF token, user, profile or database rows. A page
+# must be added here explicitly; crc-portal and placement are not cacheable.
+CACHEABLE_PAGES = frozenset([
+    'index',
+    'account-office-portal',
+    'admin-dashboard',
+    'admin-student-registration',
+    'alumni-relations',
+    'anti-ragging',
+    'assignment',
+    'attendance',
+    'calendar',
+    'chancellor-president-portal',
+    'class',
+    'college-info',
+    'cultural-committee',
+    'dashboard',
+    'dean-academics-portal',
+    'disciplinary-committee',
+    'environmental-sustainability',
+    'events',
+    'exam-form-main',
+    'exam-form-reappear',
+    'examination',
+    'external-datesheet',
+    'faculty-portal',
+    'fees',
+    'finance-portal',
+    'hostel',
+    'hr-department',
+    'innovation-startup',
+    'internal-datesheet',
+    'international-relations',
+    'iqac',
+    'legal-cell',
+    'library',
+    'maintenance-security',
+    'medical-center',
+    'nss-ncc',
+    'online-learning',
+    'pr-office',
+    'registrar-office',
+    'registrar-portal',
+    'registration',
+    'research-innovation',
+    'result',
+    'scholarship-portal',
+    'sports-committee',
+    'student-welfare',
+    'syllabus',
+    'test-navigation',
+    'transport-fee',
+    'university-structure',
+    'vice-chancellor-portal',
+    'womens-cell',
+])
+
 
 def page_view(request, page_name):
     """Generic view to render any template page"""
@@ -83,6 +162,8 @@ def page_view(request, page_name):
     }
     
     try:
+        if page_name in CACHEABLE_PAGES:
+            return render_page(request, page_name, template_name, context)
         return render(request, template_name, context)
     except Exception as e:
         # If template doesn't exist, return 404
@@ -91,131 +172,80 @@ def page_view(request, page_name):
 
 def index(request):
     """Home page view"""
-    return render(request, 'index.html', {'current_page': 'index'})
+    return render_page(request, 'index', 'index.html', {'current_page': 'index'})
 
 
 # ==================== UNIVERSITY STRUCTURE VIEWS ====================
 
 def get_university_structure(request):
-    """Get complete university structure from database"""
-    structure = {
-        'governing_bodies': list(GoverningBody.objects.filter(is_active=True).values()),
-        'schools': [],
-        'academic_sections': list(AcademicSection.objects.filter(is_active=True).values()),
-        'support_cells': list(SupportCell.objects.filter(is_active=True).values()),
-    }
+    """Get complete university structure, served from the versioned cache with ETag/Last-Modified"""
+    entry = get_cached_structure()
+    use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+    etag = entry['gzip_etag'] if use_gzip else entry['etag']
     
-    # Get schools with departments and programs
-    schools = School.objects.filter(is_active=True).prefetch_related('departments__programs')
-    for school in schools:
-        school_data = {
-            'id': school.id,
-            'name': school.name,
-            'short_name': school.short_name,
-            'icon': school.icon,
-            'color': school.color,
-            'departments': []
-        }
-        
-        for dept in school.departments.filter(is_active=True):
-            dept_data = {
-                'id': dept.id,
-                'name': dept.name,
-                'short_name': dept.short_name,
-                'hod_id': dept.hod_id,
-                'programs': list(dept.programs.filter(is_active=True).values('id', 'name', 'degree_type'))
-            }
-            school_data['departments'].append(dept_data)
-        
-        structure['schools'].append(school_data)
-    
-    return JsonResponse(structure)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(entry['last_modified'].timestamp()),
+    )
+    if response is None:
+        response = HttpResponse(entry['gzip_body'] if use_gzip else entry['body'], content_type='application/json')
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+    
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(entry['last_modified'].timestamp())
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
 
 
 # ==================== ATTENDANCE VIEWS ====================
 
+ADMIN_ATTENDANCE_GROUPINGS = {
+    'school_wise': ['school'],
+    'dept_wise': ['department'],
+    'year_wise': ['year'],
+    'section_wise': ['year', 'section'],
+    'course_wise': ['course'],
+    'faculty_wise': ['faculty__username', 'faculty__first_name', 'faculty__last_name'],
+}
+
+
 def admin_attendance_dashboard(request):
     """Admin: Complete university attendance dashboard"""
     search_query = request.GET.get('search', '')
     
-    # Base queryset (handle if table doesn't exist)
-    try:
-        attendance_records = AttendanceRecord.objects.all()
-    except:
-        attendance_records = AttendanceRecord.objects.none()
-    
-    # Search functionality
+    students, course_sections = None, None
     if search_query:
-        attendance_records = attendance_records.filter(
-            Q(enrollment_no__icontains=search_query) |
-            Q(student_name__icontains=search_query) |
-            Q(department__icontains=search_query) |
-            Q(contact_no__icontains=search_query) |
-            Q(school__icontains=search_query)
-        )
-    
-    # School-wise attendance
-    school_wise = attendance_records.values('school').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-        attendance_percentage=Avg('id', filter=Q(status='present')) * 100 / Count('id')
-    )
-    
-    # Department-wise attendance
-    dept_wise = attendance_records.values('department').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
-    
-    # Year-wise attendance
-    year_wise = attendance_records.values('year').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
-    
-    # Section-wise attendance
-    section_wise = attendance_records.values('year', 'section').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
+        # Resolved through indexed lookups; the attendance rows are never text-scanned
+        students, course_sections = attendance_search_targets(search_query)
     
-    # Course-wise attendance
-    course_wise = attendance_records.values('course').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
-    
-    # Faculty-wise attendance
-    faculty_wise = attendance_records.values('faculty__username', 'faculty__first_name', 'faculty__last_name').annotate(
-        total_classes=Count('id'),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
+    if students is not None:
+        # Individual students: the rollup does not keep them, so aggregate their records
+        attendance_records = AttendanceRecord.objects.filter(
+            Q(student_id__in=students) | Q(course_section_id__in=course_sections)
+        )
+        breakdowns = aggregate_attendance(attendance_records, ADMIN_ATTENDANCE_GROUPINGS)
+    else:
+        rollup_records = AttendanceDailyRollup.objects.all()
+        roster = AttendanceRosterEntry.objects.all()
+        if course_sections is not None:
+            # Department/school matches cover whole course sections, which the rollup keeps
+            rollup_records = rollup_records.filter(course_section_id__in=course_sections)
+            roster = roster.filter(course_section_id__in=course_sections)
+        breakdowns = aggregate_rollup(rollup_records, roster, ADMIN_ATTENDANCE_GROUPINGS)
     
     # Overall statistics
-    total_records = attendance_records.count()
-    total_present = attendance_records.filter(status='present').count()
-    total_absent = attendance_records.filter(status='absent').count()
-    overall_percentage = (total_present / total_records * 100) if total_records > 0 else 0
+    total_records = breakdowns.totals.get('total_classes', 0)
+    total_present = breakdowns.totals.get('total_present', 0)
     
-    context = {
-        'school_wise': school_wise,
-        'dept_wise': dept_wise,
-        'year_wise': year_wise,
-        'section_wise': section_wise,
-        'course_wise': course_wise,
-        'faculty_wise': faculty_wise,
+    context = breakdowns.as_context()
+    context.update({
         'total_records': total_records,
         'total_present': total_present,
-        'total_absent': total_absent,
-        'overall_percentage': overall_percentage,
+        'total_absent': breakdowns.totals.get('total_absent', 0),
+        'overall_percentage': (total_present / total_records * 100) if total_records > 0 else 0,
         'search_query': search_query,
-    }
+    })
     
     return render(request, 'admin-attendance-dashboard.html', context)
 
@@ -225,46 +255,21 @@ def dean_attendance_dashboard(request):
     # For demo, use a default school
     school = request.GET.get('school', 'School of Engineering')
     
-    attendance_records = AttendanceRecord.objects.filter(school=school)
+    attendance_records = filter_attendance(AttendanceRecord.objects.all(), school=school)
     
-    # All departments in school
-    dept_wise = attendance_records.values('department').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
-    
-    # All semesters
-    semester_wise = attendance_records.values('year').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
+    # Departments and semesters in a single scan, with records on approved leave flagged
+    breakdowns = aggregate_attendance(attendance_records, {
+        'dept_wise': ['department'],
+        'semester_wise': ['year'],
+    }, flag_leave=True)
     
-    # Shortage list (below 75%)
-    all_students = attendance_records.values('student', 'enrollment_no', 'student_name', 'department').annotate(
-        total_classes=Count('id'),
-        present_count=Count('id', filter=Q(status='present')),
-    )
-    
-    shortage_list = []
-    for student in all_students:
-        if student['total_classes'] > 0:
-            percentage = (student['present_count'] / student['total_classes']) * 100
-            if percentage < 75:
-                shortage_list.append({
-                    'enrollment_no': student['enrollment_no'],
-                    'student_name': student['student_name'],
-                    'department': student['department'],
-                    'percentage': round(percentage, 2),
-                    'present': student['present_count'],
-                    'total': student['total_classes'],
-                })
+    # Shortage list (below the threshold, approved leave excused), filtered in SQL
+    shortage_list = list(shortage_queryset(attendance_records, extra_fields=['department']))
     
     context = {
         'school': school,
-        'dept_wise': dept_wise,
-        'semester_wise': semester_wise,
+        'dept_wise': breakdowns['dept_wise'],
+        'semester_wise': breakdowns['semester_wise'],
         'shortage_list': shortage_list,
     }
     
@@ -276,159 +281,169 @@ def hod_attendance_dashboard(request):
     # For demo, use a default department
     department = request.GET.get('department', 'Computer Science Engineering')
     
-    attendance_records = AttendanceRecord.objects.filter(department=department)
+    attendance_records = filter_attendance(AttendanceRecord.objects.all(), department=department)
     
-    # All batches
-    batch_wise = attendance_records.values('year', 'section').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
+    # Batches and subjects in a single scan, with records on approved leave flagged
+    breakdowns = aggregate_attendance(attendance_records, {
+        'batch_wise': ['year', 'section'],
+        'subject_wise': ['course'],
+    }, flag_leave=True)
     
-    # All subjects
-    subject_wise = attendance_records.values('course').annotate(
-        total_students=Count('student', distinct=True),
-        total_present=Count('id', filter=Q(status='present')),
-        total_absent=Count('id', filter=Q(status='absent')),
-    )
+    # Shortage students (approved leave excused), filtered in SQL
+    shortage_students = list(shortage_queryset(attendance_records, extra_fields=['year', 'section']))
     
-    # Shortage students
-    all_students = attendance_records.values('student', 'enrollment_no', 'student_name', 'year', 'section').annotate(
-        total_classes=Count('id'),
-        present_count=Count('id', filter=Q(status='present')),
-    )
-    
-    shortage_students = []
-    for student in all_students:
-        if student['total_classes'] > 0:
-            percentage = (student['present_count'] / student['total_classes']) * 100
-            if percentage < 75:
-                shortage_students.append({
-                    'enrollment_no': student['enrollment_no'],
-                    'student_name': student['student_name'],
-                    'year': student['year'],
-                    'section': student['section'],
-                    'percentage': round(percentage, 2),
-                    'present': student['present_count'],
-                    'total': student['total_classes'],
-                })
-    
-    # Daily summary
+    # Daily, weekly and monthly summaries in one conditional aggregate
     today = timezone.now().date()
-    daily_summary = attendance_records.filter(date=today).aggregate(
-        total=Count('id'),
-        present=Count('id', filter=Q(status='present')),
-        absent=Count('id', filter=Q(status='absent')),
-    )
-    
-    # Weekly summary
     week_start = today - timedelta(days=today.weekday())
-    weekly_summary = attendance_records.filter(date__gte=week_start).aggregate(
-        total=Count('id'),
-        present=Count('id', filter=Q(status='present')),
-        absent=Count('id', filter=Q(status='absent')),
-    )
-    
-    # Monthly summary
     month_start = today.replace(day=1)
-    monthly_summary = attendance_records.filter(date__gte=month_start).aggregate(
-        total=Count('id'),
-        present=Count('id', filter=Q(status='present')),
-        absent=Count('id', filter=Q(status='absent')),
-    )
+    periods = {'daily': Q(date=today), 'weekly': Q(date__gte=week_start), 'monthly': Q(date__gte=month_start)}
+    aggregates = {}
+    for period, period_filter in periods.items():
+        aggregates[f'{period}_total'] = Count('id', filter=period_filter)
+        aggregates[f'{period}_present'] = Count('id', filter=period_filter & Q(status=AttendanceRecord.PRESENT))
+        aggregates[f'{period}_absent'] = Count('id', filter=period_filter & Q(status=AttendanceRecord.ABSENT))
+        aggregates[f'{period}_on_leave'] = Count('id', filter=period_filter & Q(on_leave=True))
+    summary = leaves.annotate_on_leave(attendance_records).aggregate(**aggregates)
     
     context = {
         'department': department,
-        'batch_wise': batch_wise,
-        'subject_wise': subject_wise,
+        'batch_wise': breakdowns['batch_wise'],
+        'subject_wise': breakdowns['subject_wise'],
         'shortage_students': shortage_students,
-        'daily_summary': daily_summary,
-        'weekly_summary': weekly_summary,
-        'monthly_summary': monthly_summary,
     }
+    for period in periods:
+        context[f'{period}_summary'] = {
+            'total': summary[f'{period}_total'],
+            'present': summary[f'{period}_present'],
+            'absent': summary[f'{period}_absent'],
+            'on_leave': summary[f'{period}_on_leave'],
+        }
     
     return render(request, 'hod-attendance-dashboard.html', context)
 
 
-# ==================== ADMIN SEARCH ====================
+def parse_date_param(value):
+    """A YYYY-MM-DD query parameter as a date (None when empty); raises ValueError"""
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(value)
+    return parsed
 
-def admin_search(request):
-    """Admin search functionality"""
-    query = request.GET.get('q', '')
-    results = {
-        'students': [],
-        'departments': [],
-        'hods': [],
-        'colleges': [],
-    }
+
+def attendance_shortage_api(request):
+    """Paginated JSON list of students below the attendance threshold"""
+    attendance_records = filter_attendance(
+        AttendanceRecord.objects.all(), school=request.GET.get('school'), department=request.GET.get('department'),
+    )
     
-    if query:
-        # Search students
-        students = UserProfile.objects.filter(
-            Q(enrollment_no__icontains=query) |
-            Q(user__first_name__icontains=query) |
-            Q(user__last_name__icontains=query) |
-            Q(contact_no__icontains=query)
-        ).filter(role='student')[:10]
-        
-        results['students'] = [{
-            'enrollment_no': s.enrollment_no,
-            'name': f"{s.user.first_name} {s.user.last_name}",
-            'contact': s.contact_no,
-            'department': s.department,
-        } for s in students]
-        
-        # Search departments
-        departments = UserProfile.objects.filter(
-            Q(department__icontains=query)
-        ).values('department', 'school').distinct()[:10]
-        
-        results['departments'] = list(departments)
-        
-        # Search HODs
-        hods = UserProfile.objects.filter(
-            Q(role='hod') &
-            (Q(user__first_name__icontains=query) |
-             Q(user__last_name__icontains=query) |
-             Q(department__icontains=query))
-        )[:10]
-        
-        results['hods'] = [{
-            'name': f"{h.user.first_name} {h.user.last_name}",
-            'department': h.department,
-            'contact': h.contact_no,
-        } for h in hods]
-        
-        # Search colleges
-        colleges = UserProfile.objects.filter(
-            Q(college_name__icontains=query)
-        ).values('college_name').distinct()[:10]
-        
-        results['colleges'] = list(colleges)
+    try:
+        threshold = get_shortage_threshold(request.GET.get('threshold'))
+        page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid threshold or page_size'}, status=400)
     
-    return JsonResponse(results)
+    try:
+        date_from = parse_date_param(request.GET.get('from'))
+        date_to = parse_date_param(request.GET.get('to'))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid from or to date; use YYYY-MM-DD'}, status=400)
+    
+    shortages = shortage_queryset(
+        attendance_records,
+        threshold=threshold,
+        extra_fields=['department', 'year', 'section'],
+        course=request.GET.get('course'),
+        date_from=date_from,
+        date_to=date_to,
+        per_course=request.GET.get('per_course') == '1',
+        exclude_leave=request.GET.get('include_leave') != '1',
+    )
+    # One grouped query: the total comes with the page rather than from a second COUNT
+    results, count, number, num_pages = counted_page(shortages, request.GET.get('page'), page_size)
+    
+    return JsonResponse({
+        'success': True,
+        'threshold': threshold,
+        'count': count,
+        'page': number,
+        'num_pages': num_pages,
+        'results': results,
+    })
+
+
+@require_http_methods(['POST'])
+def attendance_bulk_mark(request):
+    """Faculty: mark attendance for a whole section in one request
+    
+    JSON body: {"date": "YYYY-MM-DD", "course": "...", "faculty": "<username>",
+    "records": [{"enrollment_no": "...", "status": "present|absent|late"}, ...]}.
+    date, course and faculty may also be given per record.
+    """
+    try:
+        payload = json.loads(request.body or '{}')
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON body'}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({'success': False, 'message': 'JSON body must be an object'}, status=400)
+    records = payload.get('records', [])
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return JsonResponse({'success': False, 'message': 'records must be a list of objects'}, status=400)
+    
+    defaults = {key: payload[key] for key in ('date', 'course', 'faculty') if payload.get(key)}
+    rows = [{**defaults, **record} for record in records]
+    if not rows:
+        return JsonResponse({'success': False, 'message': 'No attendance records given'}, status=400)
+    
+    try:
+        result = ingest_attendance(rows)
+    except AttendanceImportError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'errors': e.errors}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f"Marked attendance for {result['created']} students.",
+        **result,
+    })
+
+
+# ==================== ADMIN SEARCH ====================
+
+def admin_search(request):
+    """Admin search functionality, served from the search index in one ranked query"""
+    return JsonResponse(search_all(request.GET.get('q', '')))
 
 
 # ==================== CRC PLACEMENT VIEWS ====================
 
+DASHBOARD_COMPANIES_PAGE_SIZE = 50
+
 def crc_dashboard(request):
     """CRC Dashboard"""
     # Since app uses client-side auth, we'll show the page without user check
     # Client-side JavaScript will handle authentication
     
-    # Get all companies (for demo, show all pending/approved)
+    # Newest companies first, one keyset page at a time
     try:
-        companies = PlacementUpdate.objects.all().order_by('-created_at')
-        # Statistics
-        total_companies = companies.count()
-        pending = companies.filter(status='pending').count()
-        approved = companies.filter(status='approved').count()
-        rejected = companies.filter(status='rejected').count()
-        # Get all applications (for demo)
-        all_applications = PlacementApplication.objects.all().order_by('-applied_at')[:20]
+        companies, companies_next = keyset_page(
+            PlacementUpdate.objects.all(), 'created_at', request.GET.get('companies_after'), DASHBOARD_COMPANIES_PAGE_SIZE,
+        )
+        # Statistics, from the cached single-query summary
+        stats = get_placement_stats()['stats']
+        application_counts = {row['id']: row['applications']['total'] for row in stats['per_company']}
+        for company in companies:
+            company.application_count = application_counts.get(company.id, 0)
+        total_companies = stats['companies']['total']
+        pending = stats['companies']['pending']
+        approved = stats['companies']['approved']
+        rejected = stats['companies']['rejected']
+        # Most recent applications across all companies
+        all_applications = PlacementApplication.objects.order_by('-applied_at')[:20]
     except Exception:
         # If database tables don't exist yet, use empty data
         companies = []
+        companies_next = None
         total_companies = 0
         pending = 0
         approved = 0
@@ -437,6 +452,7 @@ def crc_dashboard(request):
     
     context = {
         'companies': companies,
+        'companies_next': companies_next,
         'total_companies': total_companies,
         'pending': pending,
         'approved': approved,
@@ -447,9 +463,30 @@ def crc_dashboard(request):
     return render(request, 'crc-portal.html', context)
 
 
+def crc_placement_stats(request):
+    """CRC: Placement status counters and per-company application counts, for polling"""
+    entry = get_placement_stats()
+    
+    response = get_conditional_response(
+        request, etag=entry['etag'], last_modified=int(entry['last_modified'].timestamp()),
+    )
+    if response is None:
+        response = JsonResponse({'success': True, **entry['stats']})
+    
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'].timestamp())
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
 def crc_add_company(request):
     """CRC: Add new company"""
     if request.method == 'POST':
+        jd_file = request.FILES.get('job_description_file')
+        upload_error = validate_upload(jd_file) if jd_file is not None else None
+        if upload_error:
+            return JsonResponse({'success': False, 'message': upload_error})
+        
         # Get or create a default user for demo purposes
         from django.contrib.auth.models import User
         default_user, _ = User.objects.get_or_create(username='crc_user', defaults={'email': 'crc@university.edu'})
@@ -469,11 +506,12 @@ def crc_add_company(request):
             status='pending',
         )
         
-        if 'job_description_file' in request.FILES:
-            company.job_description_file = request.FILES['job_description_file']
-            company.save()
+        response = {'success': True, 'message': 'Company added successfully! Waiting for admin approval.'}
+        if jd_file is not None:
+            # Stored, checked and attached by the run_jobs worker
+            response['job_id'] = queue_upload(jd_file, company, 'job_description_file', created_by=default_user).id
         
-        return JsonResponse({'success': True, 'message': 'Company added successfully! Waiting for admin approval.'})
+        return JsonResponse(response)
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
@@ -483,6 +521,11 @@ def crc_edit_company(request, company_id):
     company = get_object_or_404(PlacementUpdate, id=company_id)
     
     if request.method == 'POST':
+        jd_file = request.FILES.get('job_description_file')
+        upload_error = validate_upload(jd_file) if jd_file is not None else None
+        if upload_error:
+            return JsonResponse({'success': False, 'message': upload_error})
+        
         company.company_name = request.POST.get('company_name')
         company.role = request.POST.get('role')
         company.package = request.POST.get('package')
@@ -493,13 +536,14 @@ def crc_edit_company(request, company_id):
         company.job_location = request.POST.get('job_location')
         company.mode = request.POST.get('mode')
         company.description = request.POST.get('description')
-        
-        if 'job_description_file' in request.FILES:
-            company.job_description_file = request.FILES['job_description_file']
-        
         company.save()
         
-        return JsonResponse({'success': True, 'message': 'Company updated successfully!'})
+        response = {'success': True, 'message': 'Company updated successfully!'}
+        if jd_file is not None:
+            # The current file stays in place until the worker has accepted the new one
+            response['job_id'] = queue_upload(jd_file, company, 'job_description_file', created_by=company.created_by).id
+        
+        return JsonResponse(response)
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
@@ -509,7 +553,7 @@ def crc_edit_company(request, company_id):
 def admin_placement_approval(request):
     """Admin: View and approve/reject placements"""
     try:
-        pending_companies = PlacementUpdate.objects.filter(status='pending').order_by('-created_at')
+        pending_companies = PlacementUpdate.objects.filter(status='pending').select_related('created_by').order_by('-created_at')
     except:
         pending_companies = []
     
@@ -527,26 +571,66 @@ def admin_approve_placement(request, company_id):
     if request.method == 'POST':
         action = request.POST.get('action')
         
-        # Get or create default admin user
-        from django.contrib.auth.models import User
-        admin_user, _ = User.objects.get_or_create(username='admin_user', defaults={'email': 'admin@university.edu'})
-        
-        if action == 'approve':
-            company.status = 'approved'
-            company.approved_by = admin_user
-            company.approved_at = timezone.now()
-            company.save()
-            return JsonResponse({'success': True, 'message': 'Company approved successfully!'})
-        elif action == 'reject':
-            company.status = 'rejected'
-            company.approved_by = admin_user
-            company.approved_at = timezone.now()
-            company.save()
+        if action in ('approve', 'reject'):
+            result, = reviews.review('placement_update', [company.id], action, profiles.get_reviewer_id(request))
+            if result['outcome'] != 'updated':
+                return JsonResponse({'success': False, 'message': f"Company is already {result['status']}."})
+            if action == 'approve':
+                return JsonResponse({'success': True, 'message': 'Company approved successfully!'})
             return JsonResponse({'success': True, 'message': 'Company rejected.'})
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
 
+# ==================== BULK REVIEW ====================
+
+# URL segment -> reviews.TARGETS key
+REVIEW_TARGETS = {
+    'application-requests': 'application_request',
+    'placements': 'placement_update',
+}
+
+
+@require_http_methods(['POST'])
+def bulk_review(request, target):
+    """Reviewer: apply one action to many application requests or placement drives
+    
+    JSON body: {"ids": [1, 2, ...], "action": "approve|reject|in_process", "notes": "..."};
+    a form post with repeated ids fields works too. Responds with an outcome per id.
+    """
+    if target not in REVIEW_TARGETS:
+        raise Http404('Unknown review target')
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or '{}')
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Invalid JSON body'}, status=400)
+        if not isinstance(payload, dict):
+            return JsonResponse({'success': False, 'message': 'JSON body must be an object'}, status=400)
+        ids = payload.get('ids', [])
+        if not isinstance(payload.get('notes') or '', str):
+            return JsonResponse({'success': False, 'message': 'notes must be a string'}, status=400)
+    else:
+        payload = request.POST
+        ids = request.POST.getlist('ids')
+    
+    try:
+        results = reviews.review(
+            REVIEW_TARGETS[target], reviews.parse_ids(ids), payload.get('action'),
+            profiles.get_reviewer_id(request), notes=payload.get('notes') or None,
+        )
+    except reviews.ReviewError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    updated = sum(result['outcome'] == 'updated' for result in results)
+    return JsonResponse({
+        'success': True,
+        'message': f'Updated {updated} of {len(results)}.',
+        'updated': updated,
+        'results': results,
+    })
+
+
 # ==================== STUDENT PLACEMENT VIEWS ====================
 
 def student_placement_page(request):
@@ -561,9 +645,9 @@ def student_placement_page(request):
     
     # Get student's applications
     try:
-        from django.contrib.auth.models import User
-        default_user, _ = User.objects.get_or_create(username='student_user', defaults={'email': 'student@university.edu'})
-        student_applications = PlacementApplication.objects.filter(student=default_user).values_list('placement_id', flat=True)
+        student_applications = PlacementApplication.objects.filter(
+            student_id=profiles.get_student_id(request),
+        ).values_list('placement_id', flat=True)
     except:
         student_applications = []
     
@@ -580,87 +664,165 @@ def student_apply_placement(request, placement_id):
     placement = get_object_or_404(PlacementUpdate, id=placement_id, status='approved')
     
     if request.method == 'POST':
-        # Get or create default user
-        from django.contrib.auth.models import User
-        default_user, _ = User.objects.get_or_create(username='student_user', defaults={'email': 'student@university.edu'})
+        profile = request.profile
+        default_user = profile.user
         
         # Check if already applied
         if PlacementApplication.objects.filter(placement=placement, student=default_user).exists():
             return JsonResponse({'success': False, 'message': 'You have already applied for this position.'})
         
+        resume = request.FILES.get('resume')
+        upload_error = validate_upload(resume) if resume is not None else None
+        if upload_error:
+            return JsonResponse({'success': False, 'message': upload_error})
+        
         try:
-            profile, _ = UserProfile.objects.get_or_create(
-                user=default_user,
-                defaults={
-                    'enrollment_no': 'STU001',
-                    'department': 'Computer Science',
-                    'role': 'student'
-                }
-            )
-            
             application = PlacementApplication.objects.create(
                 placement=placement,
                 student=default_user,
-                enrollment_no=profile.enrollment_no if profile else 'STU001',
+                enrollment_no=profile.enrollment_no,
                 student_name=f"{default_user.first_name or 'Student'} {default_user.last_name or 'User'}",
-                department=profile.department if profile else 'Computer Science',
+                department=profile.department,
                 cgpa=request.POST.get('cgpa') or None,
                 status='applied',
             )
             
-            if 'resume' in request.FILES:
-                application.resume = request.FILES['resume']
-                application.save()
+            response = {'success': True, 'message': 'Application submitted successfully!'}
+            if resume is not None:
+                # Stored, checked and attached by the run_jobs worker; poll student-upload-status
+                response['job_id'] = queue_upload(resume, application, 'resume', created_by=default_user).id
+                response['message'] = 'Application submitted successfully! Your resume is being processed.'
             
-            return JsonResponse({'success': True, 'message': 'Application submitted successfully!'})
+            return JsonResponse(response)
         except Exception as e:
             return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
 
 
+def student_upload_status(request, job_id):
+    """Student: Processing status of an uploaded resume"""
+    job = get_object_or_404(BackgroundJob, id=job_id, created_by_id=request.profile.user_id)
+    return JsonResponse({'success': True, 'job': job_status(job)})
+
+
+def student_eligible_drives(request):
+    """Student: Open placement drives the student is eligible for"""
+    profile = request.profile
+    drives = eligible_drives(profile).order_by('last_date', 'id').values(
+        'id', 'company_name', 'role', 'package', 'eligibility_cgpa', 'last_date', 'drive_date', 'job_location', 'mode',
+    )
+    return JsonResponse({'success': True, 'cgpa': profile.cgpa, 'department': profile.department, 'drives': list(drives)})
+
+
 # ==================== CRC APPLICATION VIEWER ====================
 
+APPLICATIONS_PAGE_SIZE = 50
+
+APPLICATION_EXPORT_COLUMNS = [
+    ('enrollment_no', 'Enrollment No.'),
+    ('student_name', 'Student Name'),
+    ('department', 'Department'),
+    ('cgpa', 'CGPA'),
+    ('status', 'Status'),
+    ('applied_at', 'Applied At'),
+    ('resume', 'Resume'),
+    ('notes', 'Notes'),
+]
+
+
+def filter_applications(applications, params):
+    """Narrow applications by the status, department and min_cgpa query parameters"""
+    if params.get('status'):
+        applications = applications.filter(status=params['status'])
+    if params.get('department'):
+        applications = applications.filter(department=params['department'])
+    if params.get('min_cgpa'):
+        try:
+            applications = applications.filter(cgpa__gte=Decimal(params['min_cgpa']))
+        except InvalidOperation:
+            pass
+    return applications
+
+
 def crc_view_applications(request, company_id):
-    """CRC: View applications for a specific company"""
+    """CRC: View applications for a specific company, newest first, one keyset page at a time"""
     company = get_object_or_404(PlacementUpdate, id=company_id)
     
-    applications = PlacementApplication.objects.filter(placement=company).order_by('-applied_at')
+    applications = filter_applications(PlacementApplication.objects.filter(placement=company), request.GET)
+    page, next_cursor = keyset_page(applications, 'applied_at', request.GET.get('after'), APPLICATIONS_PAGE_SIZE)
+    
+    # Links keep the current filters
+    filters = request.GET.copy()
+    filters.pop('after', None)
+    next_query = None
+    if next_cursor:
+        next_params = filters.copy()
+        next_params['after'] = next_cursor
+        next_query = next_params.urlencode()
+    
+    departments = PlacementApplication.objects.filter(placement=company).order_by('department').values_list(
+        'department', flat=True,
+    ).distinct()
     
     context = {
         'company': company,
-        'applications': applications,
+        'applications': page,
+        'total': applications.count(),
+        'next_query': next_query,
+        'filter_query': filters.urlencode(),
+        'filters': {key: request.GET.get(key, '') for key in ('status', 'department', 'min_cgpa')},
+        'status_choices': PlacementApplication._meta.get_field('status').choices,
+        'departments': departments,
     }
     
     return render(request, 'crc-applications.html', context)
 
 
+def crc_export_applications(request, company_id):
+    """CRC: Download a company's (filtered) applications as CSV or XLSX"""
+    company = get_object_or_404(PlacementUpdate, id=company_id)
+    
+    applications = filter_applications(PlacementApplication.objects.filter(placement=company), request.GET)
+    rows = applications.order_by('-applied_at', '-id').values_list(
+        *[field for field, _ in APPLICATION_EXPORT_COLUMNS]
+    ).iterator(chunk_size=2000)
+    
+    return streaming_export(
+        [label for _, label in APPLICATION_EXPORT_COLUMNS],
+        rows,
+        slugify(f'{company.company_name} {company.role} applications') or 'applications',
+        file_format=request.GET.get('format', 'csv'),
+        sheet_name='Applications',
+    )
+
+
+def crc_eligible_students(request, company_id):
+    """CRC: Students eligible for a company's drive, 100 per page"""
+    company = get_object_or_404(PlacementUpdate, id=company_id)
+    
+    page = eligible_students_page(company, request.GET.get('page'), 100)
+    return JsonResponse({'success': True, **page})
+
+
 # ==================== STUDENT APPLICATION CENTER ====================
 
+APPLICATION_HISTORY_PAGE_SIZE = 20
+
 def application_center(request):
     """Student Application Center - Main page"""
-    # For demo, get or create a default user profile
-    from django.contrib.auth.models import User
-    default_user, _ = User.objects.get_or_create(username='student_user', defaults={'email': 'student@university.edu'})
+    profile = request.profile
     
-    try:
-        profile, _ = UserProfile.objects.get_or_create(
-            user=default_user,
-            defaults={
-                'enrollment_no': 'STU001',
-                'department': 'Computer Science',
-                'role': 'student'
-            }
-        )
-    except:
-        profile = None
-    
-    # Get student's applications
-    applications = ApplicationRequest.objects.filter(student=default_user).order_by('-created_at')
+    # Student's applications, newest first, one keyset page at a time
+    applications, applications_next = keyset_page(
+        ApplicationRequest.objects.filter(student_id=profile.user_id), 'created_at',
+        request.GET.get('after'), APPLICATION_HISTORY_PAGE_SIZE,
+    )
     
     context = {
         'applications': applications,
-        'profile': profile or {'user': {'first_name': 'Student', 'last_name': 'User'}, 'enrollment_no': 'STU001', 'department': 'Computer Science'},
+        'applications_next': applications_next,
+        'profile': profile,
     }
     
     return render(request, 'application-center.html', context)
@@ -668,27 +830,7 @@ def application_center(request):
 
 def application_form(request, app_type):
     """Student Application Form - Dynamic form based on application type"""
-    # For demo, get or create a default user profile
-    from django.contrib.auth.models import User
-    default_user, _ = User.objects.get_or_create(username='student_user', defaults={'email': 'student@university.edu'})
-    
-    try:
-        profile, _ = UserProfile.objects.get_or_create(
-            user=default_user,
-            defaults={
-                'enrollment_no': 'STU001',
-                'department': 'Computer Science',
-                'role': 'student',
-                'contact_no': '1234567890'
-            }
-        )
-    except:
-        profile = type('obj', (object,), {
-            'user': type('obj', (object,), {'first_name': 'Student', 'last_name': 'User', 'email': 'student@university.edu'})(),
-            'enrollment_no': 'STU001',
-            'department': 'Computer Science',
-            'contact_no': '1234567890'
-        })()
+    profile = request.profile
     
     # Valid application types
     valid_types = [choice[0] for choice in ApplicationRequest.APPLICATION_TYPES]
@@ -711,46 +853,43 @@ def application_form(request, app_type):
 def submit_application(request):
     """Submit student application"""
     if request.method == 'POST':
-        # Get or create default user
-        from django.contrib.auth.models import User
-        default_user, _ = User.objects.get_or_create(username='student_user', defaults={'email': 'student@university.edu'})
+        profile = request.profile
+        default_user = profile.user
         
-        try:
-            profile, _ = UserProfile.objects.get_or_create(
-                user=default_user,
-                defaults={
-                    'enrollment_no': 'STU001',
-                    'department': 'Computer Science',
-                    'role': 'student'
-                }
-            )
-        except:
-            profile = None
+        application_type = request.POST.get('application_type')
+        from_date = request.POST.get('from_date') or None
+        to_date = request.POST.get('to_date') or None
         
         try:
-            application = ApplicationRequest.objects.create(
-                student=default_user,
-                application_type=request.POST.get('application_type'),
-                student_name=f"{default_user.first_name or 'Student'} {default_user.last_name or 'User'}",
-                enrollment_no=profile.enrollment_no if profile else 'STU001',
-                department=profile.department if profile else 'Computer Science',
-                course=request.POST.get('course', ''),
-                semester=request.POST.get('semester', ''),
-                mobile=profile.contact_no if profile else '1234567890',
-                email=default_user.email or 'student@university.edu',
-                reason=request.POST.get('reason'),
-                custom_reason=request.POST.get('custom_reason', ''),
-                from_date=request.POST.get('from_date') or None,
-                to_date=request.POST.get('to_date') or None,
-                extra_note=request.POST.get('extra_note', ''),
-                status='pending',
-            )
+            with transaction.atomic():
+                if application_type == 'leave':
+                    # One index seek on the leave calendar
+                    from_date, to_date = leaves.check_new_leave(default_user.pk, from_date, to_date)
+                application = ApplicationRequest.objects.create(
+                    student=default_user,
+                    application_type=application_type,
+                    student_name=f"{default_user.first_name or 'Student'} {default_user.last_name or 'User'}",
+                    enrollment_no=profile.enrollment_no,
+                    department=profile.department,
+                    course=request.POST.get('course', ''),
+                    semester=request.POST.get('semester', ''),
+                    mobile=profile.contact_no,
+                    email=default_user.email or 'student@university.edu',
+                    reason=request.POST.get('reason'),
+                    custom_reason=request.POST.get('custom_reason', ''),
+                    from_date=from_date,
+                    to_date=to_date,
+                    extra_note=request.POST.get('extra_note', ''),
+                    status='pending',
+                )
             
             return JsonResponse({
                 'success': True,
                 'message': 'Application submitted successfully!',
                 'application_id': application.id
             })
+        except leaves.LeaveError as e:
+            return JsonResponse({'success': False, 'message': str(e)})
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -772,6 +911,13 @@ def view_application(request, app_id):
     return render(request, 'application-view.html', context)
 
 
+@require_http_methods(['GET', 'HEAD'])
+def application_document(request, app_id):
+    """The server-generated PDF of an approved application (?download=1 for an attachment)"""
+    application = get_object_or_404(ApplicationRequest.objects.select_related('reviewed_by'), id=app_id, status='approved')
+    return documents.serve(request, application, as_attachment=request.GET.get('download') == '1')
+
+
 def get_reason_options(app_type):
     """Get reason options based on application type"""
     reasons = {
@@ -853,14 +999,75 @@ def get_reason_options(app_type):
 
 def application_status(request):
     """View all applications status"""
-    # For demo, get or create default user
-    from django.contrib.auth.models import User
-    default_user, _ = User.objects.get_or_create(username='student_user', defaults={'email': 'student@university.edu'})
-    
-    applications = ApplicationRequest.objects.filter(student=default_user).order_by('-created_at')
+    applications, applications_next = keyset_page(
+        ApplicationRequest.objects.filter(student_id=request.profile.user_id), 'created_at',
+        request.GET.get('after'), APPLICATION_HISTORY_PAGE_SIZE,
+    )
     
     context = {
         'applications': applications,
+        'applications_next': applications_next,
     }
     
     return render(request, 'application-status.html', context)
+
+
+# ==================== APPLICATION REQUEST APIS ====================
+
+REVIEW_QUEUE_PAGE_SIZE = 50
+MAX_APPLICATION_PAGE_SIZE = 200
+
+APPLICATION_REQUEST_FIELDS = [
+    'id', 'application_type', 'student_name', 'enrollment_no', 'department', 'reason',
+    'from_date', 'to_date', 'status', 'created_at', 'reviewed_at',
+]
+
+
+def application_request_page(request, applications, default_page_size, descending):
+    """One keyset page of `applications` as a JSON response, narrowed by ?type and ?after"""
+    try:
+        page_size = min(max(int(request.GET.get('page_size', default_page_size)), 1), MAX_APPLICATION_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid page_size'}, status=400)
+    if request.GET.get('type'):
+        applications = applications.filter(application_type=request.GET['type'])
+    
+    page, next_cursor = keyset_page(
+        applications.only(*APPLICATION_REQUEST_FIELDS), 'created_at', request.GET.get('after'), page_size,
+        descending=descending,
+    )
+    results = []
+    for application in page:
+        row = {field: getattr(application, field) for field in APPLICATION_REQUEST_FIELDS}
+        row['application_type_display'] = application.get_application_type_display()
+        results.append(row)
+    return JsonResponse({'success': True, 'results': results, 'next': next_cursor})
+
+
+def student_application_history(request):
+    """Student: Their application requests, newest first; ?type, ?status, ?after=<next cursor>"""
+    applications = ApplicationRequest.objects.filter(student_id=request.profile.user_id)
+    if request.GET.get('status'):
+        applications = applications.filter(status=request.GET['status'])
+    return application_request_page(request, applications, APPLICATION_HISTORY_PAGE_SIZE, descending=True)
+
+
+def reviewer_application_queue(request):
+    """Reviewer work queue: application requests oldest first; ?status (default pending), ?type,
+    ?department, ?after=<next cursor>"""
+    applications = ApplicationRequest.objects.filter(status=request.GET.get('status') or 'pending')
+    if request.GET.get('department'):
+        applications = applications.filter(department=request.GET['department'])
+    return application_request_page(request, applications, REVIEW_QUEUE_PAGE_SIZE, descending=False)
+
+
+# ==================== REQUEST METRICS ====================
+
+@staff_member_required
+def admin_request_metrics(request):
+    """Admin: Per-view query/timing summary collected by RequestMetricsMiddleware in this process"""
+    if request.method == 'POST' and request.POST.get('action') == 'reset':
+        instrumentation.reset()
+        return JsonResponse({'success': True, 'message': 'Request metrics reset.'})
+    
+    return JsonResponse({'success': True, 'enabled': instrumentation.is_enabled(), **instrumentation.snapshot()})
@@ -35,21 +35,29 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Inactive unless REQUEST_METRICS_ENABLED (see ERP_app/instrumentation.py)
+    'ERP_app.instrumentation.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Lazy request.profile, cached per user (see ERP_app/profiles.py)
+    'ERP_app.profiles.CurrentProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'ERP_project.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -57,10 +65,29 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compile each template once per process and keep it; with DEBUG on,
+            # the dev server's autoreloader resets this cache when a template changes
+            'loaders': [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
 
+# Compile every portal template when the app starts (see ERP_app/template_warmup.py)
+TEMPLATE_WARMUP_ON_STARTUP = not DEBUG
+
+# Report the warm-up time at startup
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ERP_app.template_warmup': {'handlers': ['console'], 'level': 'INFO'},
+        'ERP_app.instrumentation': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 WSGI_APPLICATION = 'ERP_project.wsgi.application'
 
 
@@ -124,6 +151,73 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Attendance below this percentage is reported as a shortage
+ATTENDANCE_SHORTAGE_THRESHOLD = 75
+
+# Rows per INSERT when bulk-importing attendance
+ATTENDANCE_IMPORT_BATCH_SIZE = 1000
+
+# Minimum similarity (0-1) for fuzzy admin search matches
+ADMIN_SEARCH_MIN_SIMILARITY = 0.5
+
+# Seconds a serialized university structure may live in the cache
+# (signals invalidate it on change; this bounds staleness across processes)
+UNIVERSITY_STRUCTURE_CACHE_TIMEOUT = 3600
+
+# Full-page cache for the static portal pages (see ERP_app/page_cache.py).
+# Off while DEBUG is on; point PAGE_CACHE_ALIAS at a FileBasedCache entry in
+# CACHES to share it between processes. Install `brotli` for br responses.
+PAGE_CACHE_ENABLED = not DEBUG
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Background jobs (python manage.py run_jobs): seconds before a job whose
+# worker stopped responding is handed to another worker
+JOB_LOCK_TIMEOUT = 15 * 60
+
+# Placement uploads, processed by the job worker (see ERP_app/uploads.py)
+# PDF text excerpts need the optional pypdf package (pip install pypdf);
+# without it PDFs are still accepted and stored, with no extracted text.
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+UPLOAD_ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx']
+# Outside MEDIA_ROOT so unchecked files are never served
+UPLOAD_STAGING_DIR = BASE_DIR / 'upload_staging'
+# e.g. ['clamdscan', '--no-summary']; None skips the scan
+UPLOAD_VIRUS_SCAN_COMMAND = None
+
+# PDFs of approved application requests (see ERP_app/documents.py), stored
+# by content hash. To let the web server send them, set the header to
+# 'X-Sendfile' (Apache, the value is the file path) or 'X-Accel-Redirect'
+# (nginx, the value is DOCUMENT_SENDFILE_PREFIX + the path under DOCUMENT_ROOT,
+# e.g. an `internal` location aliased to DOCUMENT_ROOT).
+DOCUMENT_ROOT = MEDIA_ROOT / 'documents'
+DOCUMENT_SENDFILE_HEADER = None
+DOCUMENT_SENDFILE_PREFIX = None
+
+# Longest leave a student can apply for, in days; also the most days of one
+# leave the leave calendar indexes (see ERP_app/leaves.py)
+LEAVE_MAX_DAYS = 60
+
+# Seconds a drive's cached eligible-student list may live (signals invalidate
+# it when drives, departments or student CGPA/department change)
+PLACEMENT_ELIGIBILITY_CACHE_TIMEOUT = 3600
+
+# Seconds the CRC placement statistics may live in the cache (signals
+# invalidate them on every drive or application save)
+PLACEMENT_STATS_CACHE_TIMEOUT = 3600
+
+# Seconds a user's profile may live in the request profile cache (signals
+# drop it when the user or profile is saved)
+REQUEST_PROFILE_CACHE_TIMEOUT = 15 * 60
+
+# Per-request metrics (query count, DB/template time, response size, N+1
+# warnings), summarized per view at /admin/request-metrics/. Only this share
+# of requests is measured; the window is the number of samples kept per view.
+REQUEST_METRICS_ENABLED = False
+REQUEST_METRICS_SAMPLE_RATE = 0.1
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = 5
+REQUEST_METRICS_WINDOW = 1000
+
 # Login URL - redirect to index page for authentication
 LOGIN_URL = '/'
 LOGIN_REDIRECT_URL = '/dashboard/'
@@ -7,8 +7,10 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # App routes first: admin/placement-approval/ and admin/approve-placement/ live
+    # under the same prefix and would otherwise hit the Django admin's catch-all
     path('', include('ERP_app.urls')),
+    path('admin/', admin.site.urls),
 ]
 
 # Serve static and media files during development